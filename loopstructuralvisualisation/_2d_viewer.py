@@ -3,6 +3,8 @@ import numpy as np
 
 from LoopStructural.utils import getLogger
 
+from ._lookup_table import stratigraphic_lookup_table
+
 logger = getLogger(__name__)
 from LoopStructural.modelling.features import FeatureType
 
@@ -50,9 +52,9 @@ class Loop2DView:
     @model.setter
     def model(self, model):
         if model is not None:
-            bb = np.array([model.origin[:2], model.maximum[:2]])
-            self.bounding_box = bb  # model.bounding_box
-            self.nsteps = model.nsteps[:2]
+            bounding_box = model.bounding_box
+            self.bounding_box = np.array([bounding_box.origin[:2], bounding_box.maximum[:2]])
+            self.nsteps = bounding_box.nsteps[:2]
             self._model = model
             self._update_grid()
 
@@ -298,22 +300,15 @@ class Loop2DView:
         z : int/numpy array, optional
             height of the map surface (could also be a dem), by default 0
         cmap : str/matplotlib colourmap, optional
-            specify a colour map, by default 'tab20'
+            specify a colour map, by default the colours of the stratigraphic column
+            from the lookup table shared with the 3D view, see Loop3DView.set_unit_colour
         """
-        if cmap is None:
-            import matplotlib.colors as colors
-
-            colours = []
-            boundaries = []
-            data = []
-            for g in self.model.stratigraphic_column.keys():
-                if g == "faults":
-                    continue
-                for v in self.model.stratigraphic_column[g].values():
-                    data.append((v["id"], v["colour"]))
-                    colours.append(v["colour"])
-                    boundaries.append(v["id"])  # print(u,v)
-            cmap = colors.ListedColormap(colours)
+        lookup = None
+        norm = None
+        if cmap is None and self.model is not None:
+            lookup = stratigraphic_lookup_table(self.model)
+            cmap = lookup.cmap
+            norm = lookup.norm
 
         zz = np.zeros_like(self.xx)
         zz[:] = z  # self.bounding_box[1,2]
@@ -322,7 +317,7 @@ class Loop2DView:
             logger.error("Mapview needs a model assigned to plot model on map")
             return
         vals = self.model.evaluate_model(pts.T, scale=True)
-        return self.ax.imshow(
+        image = self.ax.imshow(
             vals.reshape(self.nsteps).T,
             extent=[
                 self.bounding_box[0, 0],
@@ -332,7 +327,12 @@ class Loop2DView:
             ],
             origin="lower",
             cmap=cmap,
+            norm=norm,
+            interpolation="nearest",
         )
+        if lookup is not None:
+            lookup.add_artist(image)
+        return image
 
     def add_fault_displacements(self, z=0, cmap="rainbow"):
 
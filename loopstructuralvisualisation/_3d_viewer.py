@@ -1,6 +1,10 @@
+import functools
 import pyvista as pv
 import numpy as np
 import re
+import threading
+from vtkmodules.vtkCommonExecutionModel import vtkAlgorithm, vtkAlgorithmOutput
+from vtkmodules.vtkRenderingCore import vtkColorTransferFunction
 
 from LoopStructural.datatypes import VectorPoints, ValuePoints
 from LoopStructural.modelling.features import BaseFeature, StructuralFrame
@@ -11,60 +15,402 @@ from LoopStructural import GeologicalModel
 from LoopStructural.utils import getLogger
 from typing import Callable, Union, Optional, List
 
+from ._animation import AnimationMixin
+from ._async import AsyncPlotMixin, check_cancelled
+from ._cache import ViewerCache, feature_version, model_version
+from ._compact import compact_dataset, smallest_integer_dtype
+from ._evaluated_slicer import EvaluatedSlicerMixin
+from ._fold import FoldMixin
+from ._image_data import as_image_data
+from ._lookup_table import StratigraphicLookupTable, stratigraphic_lookup_table
+from ._memory import MemoryBudgetMixin, dataset_nbytes, source_dataset, track_memory
+from ._merged_data import MergedDataMixin
+from ._mesh_assembly import combine_surfaces
+from ._out_of_core import OutOfCoreMixin
+from ._query import QueryMixin
+from ._refinement import BlockModelRefinementMixin
+from ._restoration import FaultRestorationMixin
+from ._structural_frame import StructuralFrameMixin
+from ._unit_visibility import UnitVisibilityMixin
+
 logger = getLogger(__name__)
 
 
-class Loop3DView(pv.Plotter):
-    def __init__(self, model=None, background='white', *args, **kwargs):
+class Loop3DView(
+    UnitVisibilityMixin,
+    BlockModelRefinementMixin,
+    OutOfCoreMixin,
+    FaultRestorationMixin,
+    MemoryBudgetMixin,
+    AnimationMixin,
+    QueryMixin,
+    AsyncPlotMixin,
+    MergedDataMixin,
+    FoldMixin,
+    StructuralFrameMixin,
+    EvaluatedSlicerMixin,
+    pv.Plotter,
+):
+    def __init__(
+        self,
+        model=None,
+        background='white',
+        *args,
+        compact: bool = False,
+        memory_budget: Optional[int] = None,
+        track_memory: bool = False,
+        **kwargs,
+    ):
         """Loop3DView is a subclass of pyvista. Plotter that is designed to
         interface with the LoopStructural geological modelling package.
 
+        Multiple views can be created with the pyvista ``shape`` argument. Objects are
+        added to the active view selected with ``subplot``, ``link_views`` synchronises
+        the cameras and ``share_actor`` shows an object in another view without
+        copying its dataset.
+
         Parameters
         ----------
         model : GeologicalModel, optional
             A loopstructural model used as reference for some methods, by default None
         background : str, optional
             colour for the background, by default 'white'
+        compact : bool, optional
+            convert meshes to float32 and the smallest integer type for categorical
+            ids when they are added, see add_mesh, by default False
+        memory_budget : Optional[int], optional
+            bytes the objects and cached products may use, hidden objects are released
+            when it is exceeded and rebuilt when shown, by default None
+        track_memory : bool, optional
+            record the peak memory allocated by each plot call with tracemalloc, see
+            memory_report. This slows down the plot calls, by default False
         """
-        if 'shape' in kwargs:
-            logger.warning('shape argument is not used in Loop3DView')
-            kwargs.pop('shape')
         super().__init__(*args, **kwargs)
         self.set_background(background)
         self.model = model
         self.objects = {}
+        self._object_callbacks = []
+        self.compact = compact
+        self.bytes_saved = 0
+        self.cache = ViewerCache()
+        self._block_models = {}
+        self._out_of_core = {}
+        self._merged_data = {}
+        self._restorations = {}
+        self._locators = {}
+        self.memory_budget = memory_budget
+        self._use_count = 0
+        self.track_memory = track_memory
+        self._tracking_memory = False
+
+    def add_object_callback(self, callback: Callable[[str, str], None]):
+        """Register a function that is called when an object is added to, removed from
+        or modified in the viewer. The callback is called with the event ('added',
+        'removed' or 'modified') and the name of the object.
+
+        Parameters
+        ----------
+        callback : Callable[[str, str], None]
+            function called with (event, name)
+        """
+        self._object_callbacks.append(callback)
+
+    def remove_object_callback(self, callback: Callable[[str, str], None]):
+        """Stop calling a function registered with add_object_callback"""
+        if callback in self._object_callbacks:
+            self._object_callbacks.remove(callback)
+
+    def _notify_object_callbacks(self, event: str, name: str):
+        for callback in self._object_callbacks:
+            try:
+                callback(event, name)
+            except Exception as e:
+                logger.error(f'Object callback failed for {name}: {e}')
+
+    def add_mesh(
+        self,
+        *args,
+        group: Optional[str] = None,
+        compact: Optional[bool] = None,
+        recipe: Optional[Callable[[], pv.DataSet]] = None,
+        **kwargs,
+    ):
+        """Add a mesh to the viewer, see pyvista.Plotter.add_mesh.
+        The name is made unique and valid for the trame object menu and the object is
+        recorded in Loop3DView.objects.
+
+        Parameters
+        ----------
+        group : Optional[str], optional
+            name of the feature or model the object belongs to, used to group objects
+            in the object menu, by default None
+        compact : Optional[bool], optional
+            convert the points and scalars of the mesh to float32 and categorical ids
+            to the smallest integer type in place before it is added. The bytes saved
+            are recorded in Loop3DView.objects and Loop3DView.bytes_saved,
+            by default Loop3DView.compact
+        recipe : Optional[Callable[[], pv.DataSet]], optional
+            function building the mesh again, used to release the mesh of the object
+            when it is hidden and the memory budget is exceeded, by default None
+        """
+        kwargs['name'] = self._object_name(kwargs.get('name'))
+        if compact is None:
+            compact = self.compact
+        saved = 0
+        if compact:
+            args, saved = self._compact_mesh(args, kwargs)
+        actor = super().add_mesh(*args, **kwargs)
+        self._record_object(kwargs['name'], actor, group, saved, compact, recipe)
+        return actor
 
-    def subplot(self, *args, **kwargs):
-        logger.warning('subplot is not supported in Loop3DView')
-        return self
+    def add_volume(self, *args, group: Optional[str] = None, **kwargs):
+        """Add a volume to the viewer, see pyvista.Plotter.add_volume.
+        The name is made unique and the object is recorded in Loop3DView.objects
+        in the same way as add_mesh.
+
+        Parameters
+        ----------
+        group : Optional[str], optional
+            name of the feature or model the object belongs to, used to group objects
+            in the object menu, by default None
+        """
+        kwargs['name'] = self._object_name(kwargs.get('name'))
+        actor = super().add_volume(*args, **kwargs)
+        self._record_object(kwargs['name'], actor, group, 0, False, None)
+        return actor
+
+    def _record_object(
+        self,
+        name: str,
+        actor,
+        group: Optional[str],
+        saved: int,
+        compact: bool,
+        recipe: Optional[Callable[[], pv.DataSet]],
+        shared_from: Optional[str] = None,
+    ):
+        """Add an object to Loop3DView.objects and apply the memory budget. The dataset of
+        an object shared from another object belongs to that object, its size is not
+        counted again and it is released and rebuilt with that object.
+        """
+        self._use_count += 1
+        self.objects[name] = {
+            'group': group,
+            'subplot': self._active_subplot,
+            'bytes_saved': saved,
+            'nbytes': 0 if shared_from is not None else dataset_nbytes(source_dataset(actor)),
+            'compact': compact,
+            'recipe': recipe,
+            'evicted': False,
+            'last_used': self._use_count,
+            'peak_bytes': None,
+            'created_by': None,
+            'shared_from': shared_from,
+        }
+        self._notify_object_callbacks('added', name)
+        self._enforce_memory_budget()
 
-    def add_mesh(self, *args, **kwargs):
-        if 'name' not in kwargs or kwargs['name'] is None:
+    def _object_name(self, name: Optional[str]) -> str:
+        """Make a name valid for the trame object menu and unique in the viewer"""
+        if name is None:
             name = 'unnamed_object'
-            kwargs['name'] = name
             logger.warning(
                 f'No name provided, using {name}. Pass name argument to add_mesh to remove this error'
             )
-        kwargs['name'] = kwargs['name'].replace(' ', '_')
-        kwargs['name'] = re.sub(r'[^a-zA-Z0-9_$]', '_', kwargs['name'])
-        if kwargs['name'][0].isdigit():
-            kwargs['name'] = 'ls_' + kwargs['name']
-        if kwargs['name'][0] == '_':
-            kwargs['name'] = 'ls' + kwargs['name']
-        kwargs['name'] = self.increment_name(kwargs['name'])
-        if '__opacity' in kwargs['name']:
+        name = name.replace(' ', '_')
+        name = re.sub(r'[^a-zA-Z0-9_$]', '_', name)
+        if name[0].isdigit():
+            name = 'ls_' + name
+        if name[0] == '_':
+            name = 'ls' + name
+        name = self.increment_name(name)
+        if '__opacity' in name:
             raise ValueError('Cannot use __opacity in name')
-        if '__visibility' in kwargs['name']:
+        if '__visibility' in name:
             raise ValueError('Cannot use __visibility in name')
-        if '__control_visibility' in kwargs['name']:
+        if '__control_visibility' in name:
             raise ValueError('Cannot use __control_visibility in name')
-        return super().add_mesh(*args, **kwargs)
+        return name
+
+    def _compact_mesh(self, args: tuple, kwargs: dict):
+        """Apply compact_dataset to the mesh passed to add_mesh"""
+        if len(args) > 0:
+            mesh = args[0]
+        else:
+            mesh = kwargs.get('mesh')
+        # pipeline outputs (e.g. the outline added by the widgets) have no data to compact
+        if mesh is None or isinstance(
+            mesh, (np.ndarray, pv.MultiBlock, vtkAlgorithm, vtkAlgorithmOutput)
+        ):
+            return args, 0
+        mesh = pv.wrap(mesh)
+        if not isinstance(mesh, pv.DataSet):
+            return args, 0
+        saved = compact_dataset(mesh)
+        self.bytes_saved += saved
+        logger.info(f'Compacting {kwargs["name"]} saved {saved / 1024**2:.1f} MiB')
+        if len(args) > 0:
+            args = (mesh, *args[1:])
+        else:
+            kwargs['mesh'] = mesh
+        return args, saved
+
+    @property
+    def _active_subplot(self) -> tuple:
+        """location (row, column) of the active view"""
+        loc = self.renderers.index_to_loc(self.renderers.active_index)
+        return tuple(int(i) for i in np.atleast_1d(loc))
+
+    def _object_renderer(self, name: str) -> pv.Renderer:
+        """Renderer of the view an object was added to, the active view if it is unknown"""
+        loc = self.objects.get(name, {}).get('subplot')
+        if loc is None:
+            return self.renderer
+        return self.renderers[self.renderers.loc_to_index(loc[0] if len(loc) == 1 else loc)]
+
+    def _object_actor(self, name: str):
+        """Actor of an object in any view, Plotter.actors only holds the active view"""
+        actor = self._object_renderer(name).actors.get(name)
+        if actor is not None:
+            return actor
+        for renderer in self.renderers:
+            if name in renderer.actors:
+                return renderer.actors[name]
+        return None
+
+    def share_actor(
+        self,
+        name: Union[str, List[str]],
+        index_row: int,
+        index_column: Optional[int] = None,
+    ) -> Union[pv.Actor, List[pv.Actor]]:
+        """Show objects in another view without copying them.
+
+        The new actor uses the same mapper, and so the same dataset and colour map,
+        as the original. Changing the data of the object changes it in both views,
+        while the opacity, colour and visibility of each view are independent.
+        The active view is restored afterwards.
+
+        Parameters
+        ----------
+        name : Union[str, List[str]]
+            name of the object, or list of names, in any view
+        index_row : int
+            row of the view to add the object to, or the index of the view if
+            index_column is None
+        index_column : Optional[int], optional
+            column of the view to add the object to, by default None
+
+        Returns
+        -------
+        Union[pv.Actor, List[pv.Actor]]
+            the actor(s) added to the other view
+
+        Examples
+        --------
+        >>> view = Loop3DView(model, shape=(1, 2))
+        >>> view.plot_block_model()
+        >>> view.share_actor('block_model_1', 0, 1)
+        >>> view.link_views()
+        """
+        names = [name] if isinstance(name, str) else list(name)
+        sources = []
+        for n in names:
+            source = self._object_actor(n)
+            if source is None:
+                raise ValueError(f'{n} is not an object in the viewer')
+            sources.append((n, source))
+        if index_column is None:
+            loc = tuple(int(i) for i in np.atleast_1d(self.renderers.index_to_loc(index_row)))
+        else:
+            loc = (index_row, index_column)
+        active = self._active_subplot
+        shared = []
+        try:
+            self.subplot(*loc)
+            for n, source in sources:
+                actor = pv.Actor(mapper=source.mapper, prop=source.prop.copy())
+                actor.visibility = source.visibility
+                actor.user_matrix = source.user_matrix
+                new_name = self.increment_name(n)
+                self.add_actor(actor, name=new_name, reset_camera=False)
+                obj = self.objects.get(n, {})
+                self._record_object(
+                    new_name,
+                    actor,
+                    obj.get('group'),
+                    0,
+                    obj.get('compact', False),
+                    None,
+                    shared_from=obj.get('shared_from') or n,
+                )
+                if obj.get('evicted'):
+                    self.objects[new_name]['evicted'] = True
+                shared.append(actor)
+        finally:
+            self.subplot(*active)
+        return shared[0] if isinstance(name, str) else shared
+
+    def remove_actor(self, actor, *args, **kwargs):
+        """Remove an actor from the viewer, see pyvista.Plotter.remove_actor"""
+        if isinstance(actor, str):
+            names = [actor]
+        elif isinstance(actor, (list, tuple)):
+            names = [a if isinstance(a, str) else self._actor_name(a) for a in actor]
+        else:
+            names = [self._actor_name(actor)]
+        removed = super().remove_actor(actor, *args, **kwargs)
+        for name in names:
+            if name is None or self._object_actor(name) is not None:
+                continue
+            self._remove_object_record(name)
+            self.clear_block_model_refinement(name, render=False)
+            self._block_models.pop(name, None)
+            self._out_of_core.pop(name, None)
+            for block_model in self._block_models.values():
+                refinement = block_model.get('refinement')
+                if refinement is not None and refinement['name'] == name:
+                    # the refined grid was removed, show the parent cells again
+                    block_model.pop('refinement')
+                    self._apply_block_model_mask(block_model)
+            self._merged_data.pop(name, None)
+            self._restorations.pop(name, None)
+            self._locators.pop(name, None)
+            self._notify_object_callbacks('removed', name)
+        return removed
+
+    def _remove_object_record(self, name: str):
+        """Remove an object from Loop3DView.objects. The objects sharing its dataset keep
+        the mapper, the first of them becomes the owner of the dataset and its recipe.
+        """
+        removed = self.objects.pop(name, None)
+        if removed is None or removed['shared_from'] is not None:
+            return
+        heirs = [n for n, o in self.objects.items() if o['shared_from'] == name]
+        if len(heirs) == 0:
+            return
+        self.objects[heirs[0]].update(
+            shared_from=None,
+            recipe=removed['recipe'],
+            nbytes=removed['nbytes'],
+            compact=removed['compact'],
+        )
+        for n in heirs[1:]:
+            self.objects[n]['shared_from'] = heirs[0]
+
+    def _actor_name(self, actor) -> Optional[str]:
+        for renderer in self.renderers:
+            for name, a in renderer.actors.items():
+                if a is actor:
+                    return name
+        return None
 
     def increment_name(self, name):
         parts = name.split('_')
         if len(parts) == 1:
             name = name + '_1'
-        while name in self.actors:
+        # names are unique across all views so objects can be found by name
+        while name in self.objects or self._object_actor(name) is not None:
             parts = name.split('_')
             try:
                 parts[-1] = str(int(parts[-1]) + 1)
@@ -97,6 +443,7 @@ class Loop3DView(pv.Plotter):
 
         return scale
 
+    @track_memory
     def plot_surface(
         self,
         geological_feature: BaseFeature,
@@ -142,31 +489,114 @@ class Loop3DView(pv.Plotter):
         show_scalar_bar : bool, optional
             Whether to show the scalar bar, by default False
         """
+        mesh = self._build_surface(geological_feature, value, paint_with, bounding_box)
+        return self._add_surface(
+            mesh,
+            geological_feature,
+            recipe=functools.partial(
+                self._build_surface, geological_feature, value, paint_with, bounding_box
+            ),
+            paint_with=paint_with,
+            colour=colour,
+            cmap=cmap,
+            opacity=opacity,
+            vmin=vmin,
+            vmax=vmax,
+            pyvista_kwargs=pyvista_kwargs,
+            show_scalar_bar=show_scalar_bar,
+            slicer=slicer,
+            name=name,
+        )
 
+    def _build_surface(
+        self,
+        geological_feature: BaseFeature,
+        value: Optional[Union[float, int]] = None,
+        paint_with: Optional[BaseFeature] = None,
+        bounding_box: Optional[BoundingBox] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> pv.DataSet:
+        """Evaluate the isosurfaces of a feature as one mesh, contoured from the cached
+        scalar field of the feature if there is one
+        """
+        key = self._scalar_field_key(geological_feature, bounding_box)
+        grid = self.cache.get(key) if key is not None else None
+        if grid is not None and geological_feature.name in grid.point_data:
+            logger.info(f'Contouring cached scalar field of {geological_feature.name}')
+            return self._contour_scalar_field(grid, geological_feature.name, value, paint_with)
+        check_cancelled(cancelled)
+        surfaces = geological_feature.surfaces(value, bounding_box=bounding_box)
+        check_cancelled(cancelled)
+        mesh = combine_surfaces(surfaces)
+        if paint_with is not None and mesh.n_points > 0:
+            self._paint_mesh(mesh, paint_with)
+        return mesh
+
+    def _paint_mesh(self, mesh: pv.DataSet, paint_with: BaseFeature):
+        """Evaluate a feature at the points of a mesh as the active 'values' array"""
+        points = mesh.points
+        if self.model is not None:
+            points = self.model.scale(points, inplace=False)
+        mesh["values"] = paint_with(points)
+        mesh.set_active_scalars("values")
+
+    def _contour_scalar_field(
+        self,
+        grid: pv.DataSet,
+        scalars: str,
+        value: Optional[Union[float, int, List[float]]] = None,
+        paint_with: Optional[BaseFeature] = None,
+    ) -> pv.DataSet:
+        """Extract isosurfaces from an evaluated scalar field. The values are chosen
+        in the same way as BaseFeature.surfaces
+        """
+        field = np.asarray(grid.point_data[scalars])
+        vmin, vmax = np.nanmin(field), np.nanmax(field)
+        if value is None:
+            isovalues = [(vmax - vmin) / 2 + vmin]
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            isovalues = list(value)
+        elif isinstance(value, (int, np.integer)) and value > 0:
+            buffer = (vmax - vmin) * 0.05
+            isovalues = list(np.linspace(vmin + buffer, vmax - buffer, value))
+        elif isinstance(value, (int, np.integer)) and value < 0:
+            raise ValueError("Number of isosurfaces must be greater than 1")
+        else:
+            isovalues = [float(value)]
+        mesh = grid.contour(isosurfaces=isovalues, scalars=scalars, preference='point')
+        if paint_with is not None and mesh.n_points > 0:
+            self._paint_mesh(mesh, paint_with)
+        return mesh
+
+    def _add_surface(
+        self,
+        mesh: pv.DataSet,
+        geological_feature: BaseFeature,
+        recipe: Optional[Callable[[], pv.DataSet]] = None,
+        paint_with: Optional[BaseFeature] = None,
+        colour: Optional[str] = "red",
+        cmap: Optional[str] = None,
+        opacity: Optional[float] = None,
+        vmin: Optional[float] = None,
+        vmax: Optional[float] = None,
+        pyvista_kwargs: dict = {},
+        show_scalar_bar: bool = False,
+        slicer: bool = False,
+        name: Optional[str] = None,
+    ):
+        """Add a mesh built by _build_surface to the viewer"""
         if name is None:
             name = geological_feature.name + '_surfaces'
         name = self.increment_name(name)  # , 'surface')
-
-        surfaces = geological_feature.surfaces(value, bounding_box=bounding_box)
-        meshes = []
-        for surface in surfaces:
-            s = surface.vtk()
-            if paint_with is not None:
-                clim = [paint_with.min(), paint_with.max()]
-                if vmin is not None:
-                    clim[0] = vmin
-                if vmax is not None:
-                    clim[1] = vmax
-                pyvista_kwargs["clim"] = clim
-                pts = np.copy(surface.vertices)
-                if self.model is not None:
-                    pts = self.model.scale(pts)
-                scalars = paint_with(pts)
-                s["values"] = scalars
-                s.set_active_scalars("values")
-                colour = None
-            meshes.append(s)
-        mesh = pv.MultiBlock(meshes).combine()
+        pyvista_kwargs = dict(pyvista_kwargs)
+        if paint_with is not None:
+            clim = [paint_with.min(), paint_with.max()]
+            if vmin is not None:
+                clim[0] = vmin
+            if vmax is not None:
+                clim[1] = vmax
+            pyvista_kwargs["clim"] = clim
+            colour = None
         actor = None
         try:
 
@@ -177,6 +607,7 @@ class Loop3DView(pv.Plotter):
                     cmap=cmap,
                     opacity=opacity,
                     name=name,
+                    group=geological_feature.name,
                     **pyvista_kwargs,
                 )
             else:
@@ -186,6 +617,8 @@ class Loop3DView(pv.Plotter):
                     cmap=cmap,
                     opacity=opacity,
                     name=name,
+                    group=geological_feature.name,
+                    recipe=recipe,
                     **pyvista_kwargs,
                 )
 
@@ -195,6 +628,7 @@ class Loop3DView(pv.Plotter):
             self.remove_scalar_bar('values')
         return actor
 
+    @track_memory
     def plot_scalar_field(
         self,
         geological_feature: BaseFeature,
@@ -207,6 +641,8 @@ class Loop3DView(pv.Plotter):
         slicer: bool = False,
         name: Optional[str] = None,
         bounding_box: Optional[BoundingBox] = None,
+        volume: bool = False,
+        slicer_resolution: Optional[List[int]] = None,
     ):
         """Plot a volume with the scalar field as the property
         calls feature.scalar_field() to get the scalar field and
@@ -228,36 +664,259 @@ class Loop3DView(pv.Plotter):
             additional kwargs sent to add_mesh, by default {}
         show_scalar_bar : bool, optional
             whether to show or hide the scalar bar, by default False
-        slicer : bool, optional
-            whether to plot using a plane slicer widget, by default False
+        slicer : Union[bool, str], optional
+            whether to plot using a plane slicer widget. If 'evaluate' the feature is
+            only evaluated on the plane when the widget is released instead of
+            clipping the full volume, by default False
         name : Optional[str], optional
             name for the object to appear in the object list, by default None
+        volume : bool, optional
+            render the scalar field as a volume, the opacity is a pyvista opacity
+            transfer function or a constant, by default False
+        slicer_resolution : Optional[List[int]], optional
+            number of steps along each axis of the grid used to sample the plane when
+            slicer is 'evaluate', by default the nsteps of the bounding box
 
         Returns
         -------
         pv.Actor
             a reference to the actor that is added to the mesh
         """
+        if slicer == 'evaluate':
+            return self._plot_evaluated_slicer(
+                geological_feature.evaluate_value,
+                ('scalar_field', feature_version(geological_feature)),
+                scalars=geological_feature.name,
+                name=name if name is not None else geological_feature.name + '_slice',
+                group=geological_feature.name,
+                bounding_box=bounding_box,
+                resolution=slicer_resolution,
+                cmap=cmap,
+                clim=(
+                    geological_feature.min() if vmin is None else vmin,
+                    geological_feature.max() if vmax is None else vmax,
+                ),
+                opacity=opacity,
+                pyvista_kwargs=pyvista_kwargs,
+                show_scalar_bar=show_scalar_bar,
+            )
+        grid = self._build_scalar_field(geological_feature, bounding_box)
+        return self._add_scalar_field(
+            grid,
+            geological_feature,
+            recipe=functools.partial(self._build_scalar_field, geological_feature, bounding_box),
+            cmap=cmap,
+            vmin=vmin,
+            vmax=vmax,
+            opacity=opacity,
+            pyvista_kwargs=pyvista_kwargs,
+            show_scalar_bar=show_scalar_bar,
+            slicer=slicer,
+            name=name,
+            volume=volume,
+        )
+
+    def _build_scalar_field(
+        self,
+        geological_feature: BaseFeature,
+        bounding_box: Optional[BoundingBox] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> pv.DataSet:
+        """Evaluate the scalar field of a feature on a regular grid, a shallow copy of
+        the grid cached per feature version and bounding box is returned
+        """
+        check_cancelled(cancelled)
+        key = self._scalar_field_key(geological_feature, bounding_box)
+        if key is None:
+            return geological_feature.scalar_field(bounding_box=bounding_box).vtk()
+        grid = self.cache.get(
+            key, lambda: geological_feature.scalar_field(bounding_box=bounding_box).vtk()
+        )
+        return grid.copy(deep=False)
+
+    def _scalar_field_key(
+        self, geological_feature: BaseFeature, bounding_box: Optional[BoundingBox] = None
+    ) -> Optional[tuple]:
+        """Cache key of the scalar field of a feature, None if there is no bounding box"""
+        if bounding_box is None:
+            model = getattr(geological_feature, 'model', None)
+            if model is None:
+                return None
+            bounding_box = model.bounding_box
+        return (
+            'scalar_field',
+            feature_version(geological_feature),
+            tuple(np.asarray(bounding_box.origin, dtype=float)),
+            tuple(np.asarray(bounding_box.maximum, dtype=float)),
+            tuple(np.asarray(bounding_box.nsteps, dtype=int)),
+        )
+
+    @track_memory
+    def plot_feature(
+        self,
+        geological_feature: BaseFeature,
+        value: Optional[Union[float, int, List[float]]] = None,
+        scalar_field: bool = True,
+        surfaces: bool = True,
+        volume: bool = False,
+        slicer: bool = False,
+        cmap: str = "viridis",
+        colour: Optional[str] = "red",
+        opacity: Optional[float] = None,
+        surface_opacity: Optional[float] = None,
+        paint_with: Optional[BaseFeature] = None,
+        pyvista_kwargs: dict = {},
+        show_scalar_bar: bool = False,
+        name: Optional[str] = None,
+        bounding_box: Optional[BoundingBox] = None,
+    ) -> dict:
+        """Plot the scalar field and isosurfaces of a feature from a single evaluation
+        of the scalar field
+
+        Parameters
+        ----------
+        geological_feature : BaseFeature
+            The geological feature to plot
+        value : Optional[Union[float, int, List[float]]], optional
+            isosurface value, list of values or number of surfaces, by default average value of feature
+        scalar_field : bool, optional
+            whether to plot the scalar field, by default True
+        surfaces : bool, optional
+            whether to plot the isosurfaces, by default True
+        volume : bool, optional
+            render the scalar field as a volume, see plot_scalar_field, by default False
+        slicer : bool, optional
+            plot the scalar field with a plane slicer widget, by default False
+        cmap : str, optional
+            matplotlib colourmap of the scalar field, by default "viridis"
+        colour : Optional[str], optional
+            colour of the surfaces, by default "red"
+        opacity : Optional[float], optional
+            opacity of the scalar field, by default None
+        surface_opacity : Optional[float], optional
+            opacity of the surfaces, by default None
+        paint_with : Optional[BaseFeature], optional
+            Paint the surfaces with the value of another geological feature, by default None
+        pyvista_kwargs : dict, optional
+            additional kwargs sent to add_mesh for the scalar field, by default {}
+        show_scalar_bar : bool, optional
+            whether to show or hide the scalar bar, by default False
+        name : Optional[str], optional
+            prefix of the object names, by default the feature name
+        bounding_box : Optional[BoundingBox], optional
+            bounding box to evaluate the feature in, by default the model bounding box
+
+        Returns
+        -------
+        dict
+            actors added with the keys 'scalar_field' and 'surfaces'
+        """
+        if name is None:
+            name = geological_feature.name
+        grid = self._build_scalar_field(geological_feature, bounding_box)
+        actors = {}
+        if scalar_field:
+            actors['scalar_field'] = self._add_scalar_field(
+                grid,
+                geological_feature,
+                recipe=functools.partial(
+                    self._build_scalar_field, geological_feature, bounding_box
+                ),
+                cmap=cmap,
+                opacity=opacity,
+                pyvista_kwargs=pyvista_kwargs,
+                show_scalar_bar=show_scalar_bar,
+                slicer=slicer,
+                name=f'{name}_scalar_field',
+                volume=volume,
+            )
+        if surfaces:
+            mesh = self._contour_scalar_field(grid, geological_feature.name, value, paint_with)
+            actors['surfaces'] = self._add_surface(
+                mesh,
+                geological_feature,
+                recipe=functools.partial(
+                    self._build_surface, geological_feature, value, paint_with, bounding_box
+                ),
+                paint_with=paint_with,
+                colour=colour,
+                cmap=cmap,
+                opacity=surface_opacity,
+                show_scalar_bar=show_scalar_bar,
+                name=f'{name}_surfaces',
+            )
+        return actors
 
+    def _add_scalar_field(
+        self,
+        grid: pv.DataSet,
+        geological_feature: BaseFeature,
+        recipe: Optional[Callable[[], pv.DataSet]] = None,
+        cmap: str = "viridis",
+        vmin: Optional[float] = None,
+        vmax: Optional[float] = None,
+        opacity: Optional[float] = None,
+        pyvista_kwargs: dict = {},
+        show_scalar_bar: bool = False,
+        slicer: bool = False,
+        name: Optional[str] = None,
+        volume: bool = False,
+    ):
+        """Add a grid built by _build_scalar_field to the viewer"""
         if name is None:
             name = geological_feature.name + '_scalar_field'
         name = self.increment_name(name)  # , 'scalar_field')
-
-        volume = geological_feature.scalar_field(bounding_box=bounding_box).vtk()
-        if vmin is not None:
-            pyvista_kwargs["clim"][0] = vmin
-        if vmax is not None:
-            pyvista_kwargs["clim"][1] = vmax
+        pyvista_kwargs = dict(pyvista_kwargs)
+        if vmin is not None or vmax is not None:
+            clim = list(pyvista_kwargs.get("clim", grid.get_data_range()))
+            if vmin is not None:
+                clim[0] = vmin
+            if vmax is not None:
+                clim[1] = vmax
+            pyvista_kwargs["clim"] = clim
+        if volume:
+            if opacity is None:
+                opacity = 'linear'
+            elif np.isscalar(opacity) and not isinstance(opacity, str):
+                opacity = np.full(pyvista_kwargs.get('n_colors', 256), opacity)
+            scalars = geological_feature.name
+            if scalars not in grid.point_data:
+                scalars = None
+            return self._add_image_volume(
+                as_image_data(grid, preference='point'),
+                scalars=scalars,
+                cmap=cmap,
+                opacity=opacity,
+                name=name,
+                group=geological_feature.name,
+                show_scalar_bar=show_scalar_bar,
+                slicer=slicer,
+                **pyvista_kwargs,
+            )
         if slicer:
             actor = self.add_mesh_clip_plane(
-                volume, cmap=cmap, opacity=opacity, name=name, **pyvista_kwargs
+                grid,
+                cmap=cmap,
+                opacity=opacity,
+                name=name,
+                group=geological_feature.name,
+                **pyvista_kwargs,
             )
         else:
-            actor = self.add_mesh(volume, cmap=cmap, opacity=opacity, name=name, **pyvista_kwargs)
+            actor = self.add_mesh(
+                grid,
+                cmap=cmap,
+                opacity=opacity,
+                name=name,
+                group=geological_feature.name,
+                recipe=recipe,
+                **pyvista_kwargs,
+            )
         if not show_scalar_bar:
             self.remove_scalar_bar(geological_feature.name)
         return actor
 
+    @track_memory
     def plot_block_model(
         self,
         cmap=None,
@@ -267,6 +926,9 @@ class Loop3DView(pv.Plotter):
         slicer: bool = False,
         threshold: Optional[Union[float, List[float]]] = None,
         name: Optional[str] = None,
+        volume: bool = False,
+        opacity: Optional[float] = None,
+        slicer_resolution: Optional[List[int]] = None,
     ):
         """Plot a voxel model where the stratigraphic id is the active scalar.
         It will use the colours defined in the stratigraphic column of the model
@@ -284,37 +946,281 @@ class Loop3DView(pv.Plotter):
             additional arguments to be passed to pyvista add_mesh, by default {}
         show_scalar_bar : bool, optional
             whether show/hide the scalar bar, by default False
-        slicer : bool, optional
-            If an interactive plane slicing tool should be added, by default False
+        slicer : Union[bool, str], optional
+            If an interactive plane slicing tool should be added. If 'evaluate' the
+            model is only evaluated on the plane when the widget is released instead
+            of clipping the full block model, by default False
         threshold : Optional[Union[float, List[float]]], optional
             Whether to threshold values of the stratigraphy. Uses same syntax as pyvista threshold., by default None
+        volume : bool, optional
+            render the units as a volume instead of the outer surface of the grid,
+            by default False
+        opacity : Optional[float], optional
+            opacity of the block model, or of each unit when rendered as a volume,
+            by default None
+        slicer_resolution : Optional[List[int]], optional
+            number of steps along each axis of the grid used to sample the plane when
+            slicer is 'evaluate', by default the nsteps of the bounding box
         """
         model = self._check_model(model)
+        if slicer == 'evaluate':
+            clim = pyvista_kwargs.get('clim', None)
+            if clim is None:
+                clim = self._unit_id_range(model)
+            return self._plot_evaluated_slicer(
+                lambda points: model.evaluate_model(points, scale=True),
+                ('block_model', model_version(model)),
+                scalars='stratigraphy',
+                name=name if name is not None else 'block_model_slice',
+                group='model',
+                bounding_box=model.bounding_box,
+                resolution=slicer_resolution,
+                cmap=cmap if cmap is not None else self._build_stratigraphic_cmap(model),
+                clim=clim,
+                opacity=opacity,
+                pyvista_kwargs={k: v for k, v in pyvista_kwargs.items() if k != 'clim'},
+                show_scalar_bar=show_scalar_bar,
+            )
+        block = self._build_block_model(model, threshold)
+        return self._add_block_model(
+            block,
+            model,
+            cmap=cmap,
+            pyvista_kwargs=pyvista_kwargs,
+            show_scalar_bar=show_scalar_bar,
+            slicer=slicer,
+            name=name,
+            volume=volume,
+            opacity=opacity,
+        )
+
+    def _evaluate_block_model(self, model: GeologicalModel) -> dict:
+        """Evaluate the block model and index the cells by unit"""
+        grid, _ids = model.get_block_model()
+        grid = grid.vtk()
+        stratigraphy = np.asarray(grid.cell_data['stratigraphy'])
+        offset = int(np.min(stratigraphy)) if stratigraphy.size > 0 else 0
+        unit_index = stratigraphy - offset
+        unit_index = unit_index.astype(smallest_integer_dtype(unit_index), copy=False)
+        n_units = int(np.max(unit_index)) + 1 if unit_index.size > 0 else 0
+        return {'grid': grid, 'unit_index': unit_index, 'offset': offset, 'n_units': n_units}
+
+    def _cached_block_model(self, model: GeologicalModel) -> dict:
+        """Block model of the current version of the model, only evaluated once"""
+        return self.cache.get(
+            ('block_model', model_version(model)), lambda: self._evaluate_block_model(model)
+        )
+
+    def _build_block_model(
+        self,
+        model: GeologicalModel,
+        threshold: Optional[Union[float, List[float]]] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> tuple:
+        """Shallow copy of the cached block model of a model with the cells outside of
+        the threshold hidden
+        """
+        check_cancelled(cancelled)
+        cached = self._cached_block_model(model)
+        check_cancelled(cancelled)
+        block = cached['grid'].copy(deep=False)
+        block.set_active_scalars('stratigraphy', preference='cell')
+        ids = np.arange(cached['n_units']) + cached['offset']
+        visible = np.ones(cached['n_units'], dtype=bool)
+        if threshold is not None:
+            if np.isscalar(threshold):
+                visible = ids >= threshold
+            elif isinstance(threshold, (list, tuple, np.ndarray)) and len(threshold) == 2:
+                visible = (ids >= threshold[0]) & (ids <= threshold[1])
+            self._apply_unit_mask(block, cached, visible)
+        return block, {'cache': cached, 'visible': visible, 'model': model}
+
+    def _add_block_model(
+        self,
+        block_model: tuple,
+        model: GeologicalModel,
+        cmap=None,
+        pyvista_kwargs={},
+        show_scalar_bar: bool = False,
+        slicer: bool = False,
+        name: Optional[str] = None,
+        volume: bool = False,
+        opacity: Optional[float] = None,
+    ):
+        """Add a grid built by _build_block_model to the viewer"""
+        block, units = block_model
         if name is None:
             name = 'block_model'
         name = self.increment_name(name)  # , 'block_model')
-        block, codes = model.get_block_model()
-        block = block.vtk()
-        block.set_active_scalars('stratigraphy')
+        pyvista_kwargs = dict(pyvista_kwargs)
         actor = None
         if cmap is None:
             cmap = self._build_stratigraphic_cmap(model)
         if "clim" not in pyvista_kwargs:
             pyvista_kwargs["clim"] = (np.min(block['stratigraphy']), np.max(block['stratigraphy']))
-        if threshold is not None:
-            if isinstance(threshold, float):
-                block = block.threshold(threshold)
-            elif isinstance(threshold, (list, tuple, np.ndarray)) and len(threshold) == 2:
-                block = block.threshold((threshold[0], threshold[1]))
+        if volume:
+            clim = pyvista_kwargs.pop("clim")
+            n_colors = int(clim[1] - clim[0]) + 1
+            actor = self._add_image_volume(
+                as_image_data(block, preference='cell', array_names=['stratigraphy']),
+                scalars='stratigraphy',
+                cmap=cmap,
+                clim=clim,
+                n_colors=n_colors,
+                opacity=np.ones(n_colors),
+                name=name,
+                group='model',
+                show_scalar_bar=show_scalar_bar,
+                slicer=slicer,
+                **pyvista_kwargs,
+            )
+            actor.prop.interpolation_type = 'nearest'
+            self._block_models[name] = dict(
+                units, block=block, volume=True, opacity=1.0 if opacity is None else opacity
+            )
+            self._apply_unit_opacity(actor, self._block_models[name])
+            if isinstance(cmap, pv.LookupTable):
+                self._apply_unit_colours(actor, stratigraphic_lookup_table(model))
+            return actor
+        if opacity is not None:
+            pyvista_kwargs["opacity"] = opacity
         if slicer:
-            actor = self.add_mesh_clip_plane(block, cmap=cmap, name=name, **pyvista_kwargs)
+            actor = self.add_mesh_clip_plane(
+                block, cmap=cmap, name=name, group='model', **pyvista_kwargs
+            )
         else:
-            actor = self.add_mesh(block, cmap=cmap, name=name, **pyvista_kwargs)
+            actor = self.add_mesh(
+                block,
+                cmap=cmap,
+                name=name,
+                group='model',
+                recipe=functools.partial(self._rebuild_block_model, name, model),
+                **pyvista_kwargs,
+            )
+        self._block_models[name] = dict(units, block=block)
 
         if not show_scalar_bar:
             self.remove_scalar_bar('stratigraphy')
         return actor
 
+    def _rebuild_block_model(self, name: str, model: GeologicalModel) -> pv.DataSet:
+        """Recipe of a block model released by the memory budget, the hidden units and
+        refined cells of the block model are hidden again
+        """
+        block, units = self._build_block_model(model)
+        block_model = self._block_models.get(name)
+        if block_model is None:
+            return block
+        if len(block_model['visible']) != units['cache']['n_units']:
+            # the model changed, the units are not the same
+            block_model['visible'] = units['visible']
+        block_model.update(block=block, cache=units['cache'])
+        self._apply_block_model_mask(block_model)
+        return block
+
+    def _add_image_volume(
+        self,
+        image: pv.ImageData,
+        slicer: bool = False,
+        group: Optional[str] = None,
+        **kwargs,
+    ) -> pv.Volume:
+        """Volume render image data with the cpu ray cast mapper"""
+        kwargs.setdefault('mapper', 'fixed_point')
+        if slicer:
+            return self.add_volume_clip_plane(image, group=group, **kwargs)
+        return self.add_volume(image, group=group, **kwargs)
+
+    @staticmethod
+    def _unit_id_range(model: GeologicalModel) -> tuple:
+        """Range of the stratigraphic ids including -1 for unassigned cells"""
+        ids = [row[0] for row in model.stratigraphic_column.get_stratigraphic_ids()]
+        return (min(ids + [-1]), max(ids + [0]))
+
+    def _build_stratigraphic_cmap(self, model: GeologicalModel) -> Optional[pv.LookupTable]:
+        """The cached lookup table of the stratigraphic units of a model, shared by all
+        actors showing the units of the same version of the model. None if the model
+        has no stratigraphic units so the default colourmap is used.
+        """
+        lookup = stratigraphic_lookup_table(model)
+        if len(lookup) == 0:
+            logger.info('No stratigraphic units, using the default colourmap')
+            return None
+        lookup.add_callback(self._stratigraphic_colours_changed)
+        return lookup.lookup_table
+
+    def set_unit_colour(
+        self, unit: Union[str, int], colour, model: Optional[GeologicalModel] = None
+    ):
+        """Change the colour of a stratigraphic unit.
+        The lookup table shared by the block models, slices and 2D views of the model
+        is updated in place, the grids are not evaluated or uploaded again.
+
+        Parameters
+        ----------
+        unit : Union[str, int]
+            unit name or stratigraphic id
+        colour : str or rgb(a) tuple
+            any matplotlib colour
+        model : GeologicalModel, optional
+            the model to pass if it is not the active geologicalmodel, by default None
+        """
+        model = self._check_model(model)
+        stratigraphic_lookup_table(model).set_colour(unit, colour)
+        self.render()
+
+    def _stratigraphic_colours_changed(self, lookup: StratigraphicLookupTable):
+        """Volumes can not share the lookup table, update their transfer functions"""
+        for name, block_model in self._block_models.items():
+            actor = self._object_actor(name)
+            if not block_model.get('volume') or actor is None:
+                continue
+            if stratigraphic_lookup_table(block_model['model']) is lookup:
+                self._apply_unit_colours(actor, lookup)
+
+    @staticmethod
+    def _apply_unit_colours(actor: pv.Volume, lookup: StratigraphicLookupTable):
+        """Give each unit of a volume rendered block model the colour of the unit in the
+        lookup table with a step per unit in the colour transfer function
+        """
+        function = vtkColorTransferFunction()
+        for value, rgb in lookup.colour_steps():
+            function.AddRGBPoint(value, *rgb)
+        actor.prop.SetColor(function)
+
+    def _objects_modified(self):
+        """Render after objects were changed in place"""
+        # viewers observing the objects (e.g. trame) schedule their own render
+        if not self._object_callbacks:
+            self.render()
+
+    def set_object_visibility(self, name: str, visible: bool):
+        """Show or hide an object. The dataset of an object released by the memory
+        budget is rebuilt from its recipe when it is shown again.
+
+        Parameters
+        ----------
+        name : str
+            name of the object
+        visible : bool
+            whether to show the object
+        """
+        actor = self._object_actor(name)
+        if actor is None:
+            raise ValueError(f'{name} is not an object in the viewer')
+        obj = self.objects.get(name)
+        if obj is not None:
+            self._use_count += 1
+            obj['last_used'] = self._use_count
+            if visible and obj['evicted']:
+                self._restore_object(obj['shared_from'] or name)
+        # SetVisibility as pyvista volumes have no visibility property
+        actor.SetVisibility(bool(visible))
+        self._notify_object_callbacks('modified', name)
+        self._enforce_memory_budget()
+        self._objects_modified()
+
+    @track_memory
     def plot_fault_displacements(
         self,
         fault_list: Optional[List[FaultSegment]] = None,
@@ -359,11 +1265,12 @@ class Loop3DView(pv.Plotter):
             displacement_value[~np.isnan(disp)] += disp[~np.isnan(disp)]
         volume = bounding_box.vtk()
         volume['displacement'] = displacement_value
-        actor = self.add_mesh(volume, cmap=cmap, **pyvista_kwargs)
+        actor = self.add_mesh(volume, cmap=cmap, name=name, group='faults', **pyvista_kwargs)
         if not show_scalar_bar:
             self.remove_scalar_bar('displacement')
         return actor
 
+    @track_memory
     def plot_model_surfaces(
         self,
         strati: bool = True,
@@ -405,12 +1312,9 @@ class Loop3DView(pv.Plotter):
 
         actors = []
         if strati:
-            strati_surfaces = []
             surfaces = model.get_stratigraphic_surfaces()
             if cmap is None:
                 cmap = model.stratigraphic_column.cmap().colors
-            for s in surfaces:
-                strati_surfaces.append(s.vtk())
             if name is None:
                 object_name = 'model_surfaces'
             else:
@@ -418,9 +1322,10 @@ class Loop3DView(pv.Plotter):
             object_name = self.increment_name(object_name)  # , 'model_surfaces')
             actors.append(
                 self.add_mesh(
-                    pv.MultiBlock(strati_surfaces).combine(),
+                    combine_surfaces(surfaces),
                     cmap=cmap,
                     name=object_name,
+                    group='model',
                     **pyvista_kwargs,
                 )
             )
@@ -435,10 +1340,17 @@ class Loop3DView(pv.Plotter):
                     object_name = f'{name}_{f.name}_surface'
                 object_name = self.increment_name(object_name)  # , 'fault_surfaces')
                 actors.append(
-                    self.add_mesh(f.vtk(), color=fault_colour, name=object_name, **pyvista_kwargs)
+                    self.add_mesh(
+                        f.vtk(),
+                        color=fault_colour,
+                        name=object_name,
+                        group=f.name,
+                        **pyvista_kwargs,
+                    )
                 )
         return actors
 
+    @track_memory
     def plot_vector_field(
         self,
         geological_feature: BaseFeature,
@@ -474,18 +1386,19 @@ class Loop3DView(pv.Plotter):
         name = self.increment_name(name)  # , 'vector_field')
         vectorfield = geological_feature.vector_field(bounding_box=bounding_box)
         scale = self._get_vector_scale(scale)
+        glyphs = functools.partial(
+            vectorfield.vtk,
+            scale=scale,
+            geom=geom,
+            normalise=normalise,
+            scalars=scalars,
+            scale_function=scale_function,
+        )
         return self.add_mesh(
-            vectorfield.vtk(
-                scale=scale,
-                geom=geom,
-                normalise=normalise,
-                scalars=scalars,
-                scale_function=scale_function,
-            ),
-            name=name,
-            **pyvista_kwargs,
+            glyphs(), name=name, group=geological_feature.name, recipe=glyphs, **pyvista_kwargs
         )
 
+    @track_memory
     def plot_data(
         self,
         feature: Union[BaseFeature, StructuralFrame],
@@ -497,6 +1410,10 @@ class Loop3DView(pv.Plotter):
         scalars: Optional[np.ndarray] = None,
         normalise: bool = True,
         pyvista_kwargs: dict = {},
+        merge: bool = False,
+        point_style: str = 'auto',
+        radius: Optional[Union[float, np.ndarray]] = None,
+        sprite_threshold: int = 100_000,
     ) -> List[pv.Actor]:
         """Add the data associated with a feature to the plotter
 
@@ -518,6 +1435,21 @@ class Loop3DView(pv.Plotter):
             normalise the vectors to be unit norm, by default True
         pyvista_kwargs : dict, optional
             additional kwargs to pass to pyvista add_mesh, by default {}
+        merge : bool, optional
+            add the value data of all features as one actor and the vector data as
+            another, with a feature_id array to colour or filter by feature. See
+            set_data_visibility, by default False
+        point_style : str, optional
+            'points' to add the value data as a point cloud with the pyvista_kwargs,
+            'sprite' to render each value point as a sphere sprite drawn by the gpu
+            from a single vertex, or 'auto' to use sprites for value data with more
+            than sprite_threshold points, by default 'auto'
+        radius : Optional[Union[float, np.ndarray]], optional
+            radius of the sprites in model units, or one radius per value point, by
+            default the sprites are sized from the point_size in pyvista_kwargs
+        sprite_threshold : int, optional
+            number of value points above which sprites are used when point_style is
+            'auto', by default 100000
 
         Returns
         -------
@@ -538,6 +1470,25 @@ class Loop3DView(pv.Plotter):
         logger.info(f"Vector scale is {scale}")
         actors = []
         bb = self.model.bounding_box if self.model is not None else None
+        sprites = {
+            'point_style': point_style,
+            'radius': radius,
+            'sprite_threshold': sprite_threshold,
+        }
+        if merge:
+            return self._plot_merged_data(
+                feature,
+                value,
+                vector,
+                scale,
+                geom,
+                name,
+                scalars,
+                normalise,
+                pyvista_kwargs,
+                bb,
+                sprites,
+            )
         for f in feature:
             for d in f.get_data():
                 if isinstance(d, ValuePoints):
@@ -547,9 +1498,15 @@ class Loop3DView(pv.Plotter):
                         else:
                             object_name = f'{d.name}_values_{name}'
                         object_name = self.increment_name(object_name)  # , 'values')
+                        points = functools.partial(d.vtk, scalars=scalars)
                         actors.append(
-                            self.add_mesh(
-                                d.vtk(scalars=scalars), name=object_name, **pyvista_kwargs
+                            self._add_value_points(
+                                points(),
+                                name=object_name,
+                                group=f.name,
+                                recipe=points,
+                                pyvista_kwargs=pyvista_kwargs,
+                                **sprites,
                             )
                         )
                 if isinstance(d, VectorPoints):
@@ -559,27 +1516,78 @@ class Loop3DView(pv.Plotter):
                         else:
                             object_name = f'{d.name}_vectors_{name}'
                         object_name = self.increment_name(object_name)  # , 'vectors')
+                        glyphs = functools.partial(
+                            d.vtk,
+                            geom=geom,
+                            scale=scale,
+                            scalars=scalars,
+                            bb=bb,
+                            tolerance=None,
+                            normalise=normalise,
+                        )
                         actors.append(
                             self.add_mesh(
-                                d.vtk(
-                                    geom=geom,
-                                    scale=scale,
-                                    scalars=scalars,
-                                    bb=bb,
-                                    tolerance=None,
-                                    normalise=normalise,
-                                ),
-                                name=name,
+                                glyphs(),
+                                name=object_name,
+                                group=f.name,
+                                recipe=glyphs,
                                 **pyvista_kwargs,
                             )
                         )
         return actors
 
-    def plot_fold(self, folded_feature: BaseFeature, pyvista_kwargs={}):
+    def _add_value_points(
+        self,
+        points: pv.PolyData,
+        name: str,
+        group: Optional[str],
+        point_style: str = 'auto',
+        radius: Optional[Union[float, np.ndarray]] = None,
+        sprite_threshold: int = 100_000,
+        recipe: Optional[Callable[[], pv.DataSet]] = None,
+        pyvista_kwargs: dict = {},
+    ) -> pv.Actor:
+        """Add value points as a point cloud or as sphere sprites, see plot_data.
+        Sprites are drawn by the point gaussian mapper from one vertex per point, the
+        radius array is the only extra memory.
+        """
+        if point_style not in ('auto', 'points', 'sprite'):
+            raise ValueError(f'point_style must be auto, points or sprite, not {point_style}')
+        if point_style == 'points' or (
+            point_style == 'auto' and points.n_points <= sprite_threshold
+        ):
+            return self.add_mesh(points, name=name, group=group, recipe=recipe, **pyvista_kwargs)
+        logger.info(f'Rendering {points.n_points} points of {name} as sprites')
+        pyvista_kwargs = dict(pyvista_kwargs)
+        pyvista_kwargs.setdefault('style', 'points_gaussian')
+        pyvista_kwargs.setdefault('render_points_as_spheres', True)
+        pyvista_kwargs.setdefault('emissive', False)
+        if radius is not None and not np.isscalar(radius):
+            radius = np.asarray(radius, dtype=np.float32)
+            if len(radius) != points.n_points:
+                raise ValueError(
+                    f'radius has {len(radius)} values but there are {points.n_points} points'
+                )
+            points.point_data['radius'] = radius
+            if recipe is not None:
+                build = recipe
+
+                def recipe():
+                    rebuilt = build()
+                    rebuilt.point_data['radius'] = radius
+                    return rebuilt
 
-        # folded_feature.
-        pass
+        actor = self.add_mesh(points, name=name, group=group, recipe=recipe, **pyvista_kwargs)
+        if radius is None:
+            return actor
+        if np.isscalar(radius):
+            actor.mapper.scale_factor = float(radius)
+        else:
+            actor.mapper.scale_array = 'radius'
+            actor.mapper.scale_factor = 1.0
+        return actor
 
+    @track_memory
     def plot_fault(
         self,
         fault: FaultSegment,
@@ -627,7 +1635,9 @@ class Loop3DView(pv.Plotter):
                 surface_name = f'{fault.name}_surface_{name}'
             surface_name = self.increment_name(surface_name)
             surf = fault.surfaces([0], bounding_box=bounding_box)[0]
-            actors.append(self.add_mesh(surf.vtk(), name=surface_name, **pyvista_kwargs))
+            actors.append(
+                self.add_mesh(surf.vtk(), name=surface_name, group=fault.name, **pyvista_kwargs)
+            )
         if slip_vector:
             if name is None:
                 vector_name = fault.name + '_vector'
@@ -641,6 +1651,7 @@ class Loop3DView(pv.Plotter):
                 self.add_mesh(
                     vectorfield.vtk(scale=vector_scale, normalise=False),
                     name=vector_name,
+                    group=fault.name,
                     **pyvista_kwargs,
                 )
             )
@@ -660,11 +1671,14 @@ class Loop3DView(pv.Plotter):
                 geom = geom.rotate_y(90)
             else:
                 raise ValueError(f"Unknown glyph type {geom}")
-            actors.append(self.add_mesh(volume, name=volume_name, **pyvista_kwargs))
+            actors.append(
+                self.add_mesh(volume, name=volume_name, group=fault.name, **pyvista_kwargs)
+            )
         if len(actors) == 0:
             logger.warning(f"Nothing added to plot for {fault.name}")
         return actors
 
+    @track_memory
     def plot_fault_ellipsoid(
         self, fault: FaultSegment, name: Optional[str] = None, pyvista_kwargs: dict = {}
     ) -> pv.Actor:
@@ -688,7 +1702,7 @@ class Loop3DView(pv.Plotter):
             name = fault.name + '_ellipsoid'
         name = self.increment_name(name)
         ellipsoid = fault.fault_ellipsoid()
-        return self.add_mesh(ellipsoid, name=name, **pyvista_kwargs)
+        return self.add_mesh(ellipsoid, name=name, group=fault.name, **pyvista_kwargs)
 
     def rotate(self, angles: np.ndarray):
         """Rotate the camera by the given angles
@@ -0,0 +1,311 @@
+"""Camera paths and streaming export of animations, frames are encoded in a
+separate thread through a bounded queue while the next frame is rendered.
+"""
+
+from pathlib import Path
+import queue
+import threading
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from LoopStructural.utils import getLogger
+
+logger = getLogger(__name__)
+
+Vector = Tuple[float, float, float]
+# (position, focal_point, viewup) as used by pyvista Plotter.camera_position
+CameraPose = Tuple[Vector, Vector, Vector]
+
+
+def _rotate(vectors: np.ndarray, axis: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """Rotate a vector by each angle about an axis (Rodrigues' rotation formula)"""
+    axis = axis / np.linalg.norm(axis)
+    cos = np.cos(angles)[:, None]
+    sin = np.sin(angles)[:, None]
+    return vectors * cos + np.cross(axis, vectors) * sin + axis * np.dot(vectors, axis) * (1 - cos)
+
+
+def orbit_path(
+    position: Sequence[float],
+    focal_point: Sequence[float],
+    viewup: Sequence[float],
+    n_frames: int = 120,
+    degrees: float = 360.0,
+) -> List[CameraPose]:
+    """Camera poses orbiting the focal point about the view up axis
+
+    Parameters
+    ----------
+    position : Sequence[float]
+        starting position of the camera
+    focal_point : Sequence[float]
+        point the camera looks at and orbits around
+    viewup : Sequence[float]
+        view up vector, the axis of the orbit
+    n_frames : int, optional
+        number of frames, by default 120
+    degrees : float, optional
+        angle of the orbit, by default 360.0
+
+    Returns
+    -------
+    List[CameraPose]
+        list of (position, focal_point, viewup)
+    """
+    position = np.asarray(position, dtype=float)
+    focal_point = np.asarray(focal_point, dtype=float)
+    viewup = np.asarray(viewup, dtype=float)
+    # a full orbit should not repeat the first frame at the end
+    endpoint = not np.isclose(degrees % 360.0, 0.0)
+    angles = np.deg2rad(np.linspace(0.0, degrees, n_frames, endpoint=endpoint))
+    positions = focal_point + _rotate(position - focal_point, viewup, angles)
+    return [(tuple(p), tuple(focal_point), tuple(viewup)) for p in positions]
+
+
+def keyframe_path(keyframes: Sequence[CameraPose], n_frames: int = 120) -> List[CameraPose]:
+    """Camera poses flying through a list of keyframes.
+    The position, focal point and view up are interpolated linearly between keyframes,
+    the frames are spaced by the distance travelled by the camera so the speed is
+    constant.
+
+    Parameters
+    ----------
+    keyframes : Sequence[CameraPose]
+        list of (position, focal_point, viewup), e.g. from Plotter.camera_position
+    n_frames : int, optional
+        number of frames, by default 120
+
+    Returns
+    -------
+    List[CameraPose]
+        list of (position, focal_point, viewup)
+    """
+    if len(keyframes) < 2:
+        raise ValueError('At least two keyframes are needed for a fly-through')
+    poses = np.array([[np.asarray(v, dtype=float) for v in k] for k in keyframes])
+    distance = np.linalg.norm(np.diff(poses[:, 0, :], axis=0), axis=1)
+    if np.all(distance == 0):
+        distance = np.ones_like(distance)
+    travelled = np.concatenate([[0.0], np.cumsum(distance)])
+    samples = np.linspace(0.0, travelled[-1], n_frames)
+    interpolated = np.empty((n_frames, 3, 3))
+    for i in range(3):
+        for j in range(3):
+            interpolated[:, i, j] = np.interp(samples, travelled, poses[:, i, j])
+    interpolated[:, 2, :] /= np.linalg.norm(interpolated[:, 2, :], axis=1)[:, None]
+    return [tuple(tuple(v) for v in pose) for pose in interpolated]
+
+
+def _writer_kwargs(filename: Union[str, Path], fps: int, quality: int) -> dict:
+    if str(filename).lower().endswith('.gif'):
+        return {'mode': 'I', 'loop': 0, 'duration': 1000 / fps}
+    return {'fps': fps, 'quality': quality, 'macro_block_size': 1}
+
+
+class FrameEncoder:
+    def __init__(
+        self,
+        filename: Union[str, Path],
+        fps: int = 24,
+        quality: int = 5,
+        parallel: bool = True,
+        queue_size: int = 4,
+    ):
+        """Stream frames to a movie or gif file with imageio.
+
+        Parameters
+        ----------
+        filename : Union[str, Path]
+            file to write, the format is chosen from the extension (e.g. mp4 or gif)
+        fps : int, optional
+            frames per second, by default 24
+        quality : int, optional
+            quality of the video from 0 to 10, by default 5
+        parallel : bool, optional
+            encode the frames in a separate thread, by default True
+        queue_size : int, optional
+            maximum number of frames waiting to be encoded, by default 4
+        """
+        try:
+            import imageio
+        except ImportError as e:
+            raise ImportError(
+                'imageio is required to export animations, pip install imageio imageio-ffmpeg'
+            ) from e
+        self.filename = filename
+        self.n_frames = 0
+        self._writer = imageio.get_writer(filename, **_writer_kwargs(filename, fps, quality))
+        self._error = None
+        self._queue = None
+        self._thread = None
+        if parallel:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._encode, daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _encode(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            if self._error is not None:
+                # keep draining so the renderer never blocks on a full queue
+                continue
+            try:
+                self._writer.append_data(frame)
+            except Exception as e:
+                logger.error(f'Failed to encode frame: {e}')
+                self._error = e
+
+    def write(self, frame: np.ndarray):
+        """Add a frame, blocks if the encoder is queue_size frames behind"""
+        if self._error is not None:
+            raise self._error
+        self.n_frames += 1
+        if self._queue is None:
+            self._writer.append_data(frame)
+        else:
+            self._queue.put(frame)
+
+    def close(self):
+        """Wait for the queued frames to be encoded and close the file"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._writer.close()
+        if self._error is not None:
+            raise self._error
+
+
+def render_frames(
+    plotter,
+    path: Sequence[CameraPose],
+    encoder: FrameEncoder,
+    progress: Optional[Callable[[float, str], None]] = None,
+):
+    """Render a frame for each camera pose and write it to the encoder
+
+    Parameters
+    ----------
+    plotter : pv.Plotter
+        plotter to render
+    path : Sequence[CameraPose]
+        camera poses
+    encoder : FrameEncoder
+        encoder the frames are written to
+    progress : Optional[Callable[[float, str], None]], optional
+        function called with the fraction of frames rendered and a message, by default None
+    """
+    n_frames = len(path)
+    for i, pose in enumerate(path):
+        plotter.camera_position = pose
+        plotter.reset_camera_clipping_range()
+        encoder.write(plotter.screenshot(return_img=True))
+        if progress is not None:
+            progress((i + 1) / n_frames, f'Rendered frame {i + 1} of {n_frames}')
+
+
+class AnimationMixin:
+    """Movie and gif export of Loop3DView along a camera path"""
+
+    def camera_path(
+        self,
+        path: str = 'orbit',
+        n_frames: int = 120,
+        keyframes: Optional[List[CameraPose]] = None,
+        degrees: float = 360.0,
+    ) -> List[CameraPose]:
+        """Build the camera poses of an animation starting from the current camera
+
+        Parameters
+        ----------
+        path : str, optional
+            'orbit' to orbit the focal point about the view up axis or 'keyframes'
+            to fly through the keyframes, by default 'orbit'
+        n_frames : int, optional
+            number of frames, by default 120
+        keyframes : Optional[List[CameraPose]], optional
+            camera positions (position, focal_point, viewup) to fly through, by default None
+        degrees : float, optional
+            angle of the orbit, by default 360.0
+
+        Returns
+        -------
+        List[CameraPose]
+            list of (position, focal_point, viewup)
+        """
+        if path == 'orbit':
+            position, focal_point, viewup = self.camera_position
+            return orbit_path(position, focal_point, viewup, n_frames=n_frames, degrees=degrees)
+        if path == 'keyframes':
+            if keyframes is None:
+                raise ValueError('keyframes are required for a keyframes path')
+            return keyframe_path(keyframes, n_frames=n_frames)
+        raise ValueError(f'Unknown camera path {path}, use orbit or keyframes')
+
+    def export_animation(
+        self,
+        filename: str,
+        path: Union[str, List[CameraPose]] = 'orbit',
+        n_frames: int = 120,
+        keyframes: Optional[List[CameraPose]] = None,
+        fps: int = 24,
+        quality: int = 5,
+        parallel: bool = True,
+        queue_size: int = 4,
+        progress: Optional[Callable[[float, str], None]] = None,
+    ) -> int:
+        """Render an animation along a camera path and stream it to a movie or gif.
+        The camera is restored afterwards.
+
+        Parameters
+        ----------
+        filename : str
+            file to write, e.g. 'model.mp4' or 'model.gif'
+        path : Union[str, List[CameraPose]], optional
+            'orbit', 'keyframes' or a list of camera poses, by default 'orbit'
+        n_frames : int, optional
+            number of frames for orbit and keyframes paths, by default 120
+        keyframes : Optional[List[CameraPose]], optional
+            camera positions to fly through for a keyframes path, by default None
+        fps : int, optional
+            frames per second, by default 24
+        quality : int, optional
+            video quality from 0 to 10, by default 5
+        parallel : bool, optional
+            encode frames in a separate thread, by default True
+        queue_size : int, optional
+            maximum number of rendered frames waiting to be encoded, by default 4
+        progress : Optional[Callable[[float, str], None]], optional
+            function called with the fraction of frames rendered and a message, by default None
+
+        Returns
+        -------
+        int
+            number of frames written
+
+        Examples
+        --------
+        >>> view = Loop3DView(model, off_screen=True)
+        >>> view.plot_block_model()
+        >>> view.export_animation('turntable.mp4', n_frames=180)
+        """
+        if isinstance(path, str):
+            path = self.camera_path(path, n_frames=n_frames, keyframes=keyframes)
+        camera = self.camera_position
+        try:
+            with FrameEncoder(
+                filename, fps=fps, quality=quality, parallel=parallel, queue_size=queue_size
+            ) as encoder:
+                render_frames(self, path, encoder, progress=progress)
+        finally:
+            self.camera_position = camera
+        return encoder.n_frames
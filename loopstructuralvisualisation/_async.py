@@ -0,0 +1,189 @@
+import asyncio
+from concurrent.futures import Executor
+import functools
+import threading
+from typing import Callable, List, Optional, Union
+
+from LoopStructural import GeologicalModel
+from LoopStructural.datatypes import BoundingBox
+from LoopStructural.modelling.features import BaseFeature
+
+from ._progress import report_progress
+
+
+def check_cancelled(cancelled: Optional[threading.Event]):
+    """Stop a _build_* method running in an executor when its plot was cancelled"""
+    if cancelled is not None and cancelled.is_set():
+        raise asyncio.CancelledError()
+
+
+class AsyncPlotMixin:
+    """Asynchronous plot methods of Loop3DView that keep the event loop responsive"""
+
+    async def _build_async(
+        self,
+        build: Callable,
+        *args,
+        progress: Optional[Callable[[float, str], None]] = None,
+        executor: Optional[Executor] = None,
+        description: str = '',
+    ):
+        """Run a _build_* method in an executor so the event loop is not blocked.
+        Progress is reported on the event loop thread. When the task is cancelled the
+        build is told to stop at its next stage.
+        """
+        loop = asyncio.get_running_loop()
+        report_progress(progress, 0.0, f'Evaluating {description}')
+        cancelled = threading.Event()
+        try:
+            result = await loop.run_in_executor(
+                executor, functools.partial(build, *args, cancelled=cancelled)
+            )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        report_progress(progress, 0.9, f'Adding {description}')
+        return result
+
+    async def plot_surface_async(
+        self,
+        geological_feature: BaseFeature,
+        value: Optional[Union[float, int]] = None,
+        paint_with: Optional[BaseFeature] = None,
+        bounding_box: Optional[BoundingBox] = None,
+        progress: Optional[Callable[[float, str], None]] = None,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ):
+        """Asynchronous version of plot_surface. The surfaces are extracted in an
+        executor and nothing is added if the task is cancelled.
+
+        Parameters
+        ----------
+        geological_feature : BaseFeature
+            The geological feature to plot
+        value : Optional[Union[float, int, List[float]]], optional
+            isosurface value, or list of values, by default average value of feature
+        paint_with : Optional[BaseFeature], optional
+            Paint the surface with the value of another geological feature, by default None
+        bounding_box : Optional[BoundingBox], optional
+            bounding box to evaluate the surfaces in, by default None
+        progress : Optional[Callable[[float, str], None]], optional
+            function called with the fraction complete and a message, by default None
+        executor : Optional[Executor], optional
+            executor to run the evaluation in, by default the event loop's default executor
+        kwargs :
+            other arguments of plot_surface
+
+        Returns
+        -------
+        pv.Actor
+            the actor added to the scene
+        """
+        mesh = await self._build_async(
+            self._build_surface,
+            geological_feature,
+            value,
+            paint_with,
+            bounding_box,
+            progress=progress,
+            executor=executor,
+            description=geological_feature.name,
+        )
+        actor = self._add_surface(
+            mesh,
+            geological_feature,
+            recipe=functools.partial(
+                self._build_surface, geological_feature, value, paint_with, bounding_box
+            ),
+            paint_with=paint_with,
+            **kwargs,
+        )
+        report_progress(progress, 1.0, f'Added {geological_feature.name}')
+        return actor
+
+    async def plot_scalar_field_async(
+        self,
+        geological_feature: BaseFeature,
+        bounding_box: Optional[BoundingBox] = None,
+        progress: Optional[Callable[[float, str], None]] = None,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ):
+        """Asynchronous version of plot_scalar_field, see plot_surface_async
+
+        Parameters
+        ----------
+        geological_feature : BaseFeature
+            The geological feature to plot the scalar field of
+        bounding_box : Optional[BoundingBox], optional
+            bounding box to evaluate the scalar field in, by default None
+        progress : Optional[Callable[[float, str], None]], optional
+            function called with the fraction complete and a message, by default None
+        executor : Optional[Executor], optional
+            executor to run the evaluation in, by default the event loop's default executor
+        kwargs :
+            other arguments of plot_scalar_field
+
+        Returns
+        -------
+        pv.Actor
+            the actor added to the scene
+        """
+        volume = await self._build_async(
+            self._build_scalar_field,
+            geological_feature,
+            bounding_box,
+            progress=progress,
+            executor=executor,
+            description=geological_feature.name,
+        )
+        actor = self._add_scalar_field(
+            volume,
+            geological_feature,
+            recipe=functools.partial(self._build_scalar_field, geological_feature, bounding_box),
+            **kwargs,
+        )
+        report_progress(progress, 1.0, f'Added {geological_feature.name}')
+        return actor
+
+    async def plot_block_model_async(
+        self,
+        model: Optional[GeologicalModel] = None,
+        threshold: Optional[Union[float, List[float]]] = None,
+        progress: Optional[Callable[[float, str], None]] = None,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ):
+        """Asynchronous version of plot_block_model, see plot_surface_async
+
+        Parameters
+        ----------
+        model : GeologicalModel, optional
+            the model to pass if it is not the active geologicalmodel, by default None
+        threshold : Optional[Union[float, List[float]]], optional
+            Whether to threshold values of the stratigraphy, by default None
+        progress : Optional[Callable[[float, str], None]], optional
+            function called with the fraction complete and a message, by default None
+        executor : Optional[Executor], optional
+            executor to run the evaluation in, by default the event loop's default executor
+        kwargs :
+            other arguments of plot_block_model
+
+        Returns
+        -------
+        pv.Actor
+            the actor added to the scene
+        """
+        model = self._check_model(model)
+        block = await self._build_async(
+            self._build_block_model,
+            model,
+            threshold,
+            progress=progress,
+            executor=executor,
+            description='block model',
+        )
+        actor = self._add_block_model(block, model, **kwargs)
+        report_progress(progress, 1.0, 'Added block model')
+        return actor
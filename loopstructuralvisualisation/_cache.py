@@ -0,0 +1,213 @@
+"""Cache of evaluated model products shared by the viewers, keyed by a version of the
+model that changes when the model is solved again or its bounding box changes.
+"""
+
+from collections import OrderedDict
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import weakref
+
+import numpy as np
+
+from LoopStructural import GeologicalModel
+from LoopStructural.utils import getLogger
+
+logger = getLogger(__name__)
+
+# hash of the solution of up to date interpolators, see _solution_digest
+_solution_digests = weakref.WeakKeyDictionary()
+
+
+def _model_features(model: GeologicalModel) -> list:
+    """All features of a model including the components of structural frames"""
+    features = []
+    for feature in model.features:
+        features.append(feature)
+        features.extend(getattr(feature, 'features', []) or [])
+    return features
+
+
+def _solution_digest(interpolator) -> Optional[bytes]:
+    """Hash of the solution of an interpolator, None if it is not solved. The hash is
+    reused while the interpolator is up to date and its solution is the same array,
+    solving again replaces the solution.
+    """
+    solution = getattr(interpolator, 'c', None)
+    if solution is None:
+        return None
+    up_to_date = bool(getattr(interpolator, 'up_to_date', False))
+    try:
+        memo = _solution_digests.get(interpolator)
+    except TypeError:
+        # interpolators that can not be weakly referenced are hashed every time
+        memo = None
+        up_to_date = False
+    if up_to_date and memo is not None and memo[0] is solution:
+        return memo[1]
+    value = hashlib.blake2b(np.ascontiguousarray(solution).data, digest_size=16).digest()
+    if up_to_date:
+        _solution_digests[interpolator] = (solution, value)
+    return value
+
+
+def _update_feature_digest(digest, feature):
+    digest.update(str(feature.name).encode())
+    solution = _solution_digest(getattr(feature, 'interpolator', None))
+    if solution is not None:
+        digest.update(solution)
+
+
+def feature_version(feature) -> str:
+    """Build a key that changes when a feature is interpolated again
+
+    Parameters
+    ----------
+    feature : BaseFeature
+        the geological feature
+
+    Returns
+    -------
+    str
+        version key of the feature
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_feature_digest(digest, feature)
+    for component in getattr(feature, 'features', []) or []:
+        if component is not None:
+            _update_feature_digest(digest, component)
+    return f'{id(feature)}-{digest.hexdigest()}'
+
+
+def model_digest(model: GeologicalModel) -> str:
+    """Hash of the bounding box, the feature names and the interpolation solution of
+    every feature. Unlike model_version it does not depend on the model object, so it
+    can be stored and compared in another session.
+
+    Parameters
+    ----------
+    model : GeologicalModel
+        the geological model
+
+    Returns
+    -------
+    str
+        hex digest of the model
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    bounding_box = model.bounding_box
+    for values in (bounding_box.origin, bounding_box.maximum, bounding_box.nsteps):
+        digest.update(np.asarray(values, dtype=float).tobytes())
+    for feature in _model_features(model):
+        if feature is None:
+            continue
+        _update_feature_digest(digest, feature)
+    return digest.hexdigest()
+
+
+def model_version(model: GeologicalModel) -> str:
+    """Build a key that changes when the model is updated, see model_digest.
+
+    Parameters
+    ----------
+    model : GeologicalModel
+        the geological model
+
+    Returns
+    -------
+    str
+        version key of the model
+    """
+    return f'{id(model)}-{model_digest(model)}'
+
+
+class ViewerCache:
+    def __init__(self, max_entries: Optional[int] = 16):
+        """Least recently used cache of the products displayed by a viewer.
+
+        Parameters
+        ----------
+        max_entries : Optional[int], optional
+            maximum number of products kept, None for no limit, by default 16
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        # one lock for each product being built, so a product is only built once
+        self._building: Dict[Hashable, threading.Lock] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, builder: Optional[Callable[[], Any]] = None) -> Any:
+        """Get a product from the cache, building and storing it if it is missing.
+        The product is built outside of the cache lock, other threads asking for the
+        same product wait for it instead of building it again.
+
+        Parameters
+        ----------
+        key : Hashable
+            key of the product, should include the model version
+        builder : Optional[Callable[[], Any]], optional
+            function building the product, by default None
+
+        Returns
+        -------
+        Any
+            the cached product, None if it is missing and no builder is given
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if builder is None:
+                return None
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                if key in self._entries:
+                    # built by another thread while waiting
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                self.misses += 1
+            try:
+                value = builder()
+                self.put(key, value)
+            finally:
+                with self._lock:
+                    if self._building.get(key) is building:
+                        del self._building[key]
+        return value
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """The cached products, least recently used first"""
+        with self._lock:
+            return list(self._entries.items())
+
+    def put(self, key: Hashable, value: Any):
+        """Store a product in the cache, evicting the least recently used products"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug(f'Evicted {evicted} from the viewer cache')
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Remove a product, or all products if no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all products from the cache"""
+        self.invalidate()
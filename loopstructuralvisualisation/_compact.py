@@ -0,0 +1,141 @@
+"""Conversion of pyvista datasets to compact dtypes before they are rendered.
+
+Geometry and scalar fields are evaluated in double precision but rendered in
+single precision, so casting them to float32 halves the memory used on the
+host and the size of the buffers uploaded to the GPU without changing what is
+displayed. Categorical arrays such as the stratigraphic unit ids are stored in
+the smallest integer type that holds their range.
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural.utils import getLogger
+
+logger = getLogger(__name__)
+
+# arrays that are always treated as categorical ids
+CATEGORICAL_ARRAYS = ('stratigraphy',)
+
+# datasets where the points are stored explicitly
+_EXPLICIT_POINTS = (pv.PolyData, pv.UnstructuredGrid, pv.StructuredGrid)
+
+# arrays used internally by vtk that must keep their type
+_VTK_ARRAYS = ('vtkGhostType', 'vtkOriginalPointIds', 'vtkOriginalCellIds')
+
+_UNSIGNED = (np.uint8, np.uint16, np.uint32, np.uint64)
+_SIGNED = (np.int8, np.int16, np.int32, np.int64)
+
+
+def smallest_integer_dtype(array: np.ndarray) -> np.dtype:
+    """Find the smallest integer dtype that can store the values of an array.
+    A signed type is used if the array contains negative values (e.g. -1 for
+    unassigned units)
+
+    Parameters
+    ----------
+    array : np.ndarray
+        integer valued array
+
+    Returns
+    -------
+    np.dtype
+        the smallest integer dtype
+    """
+    if array.size == 0:
+        return np.dtype(np.uint8)
+    vmin = int(np.min(array))
+    vmax = int(np.max(array))
+    candidates = _SIGNED if vmin < 0 else _UNSIGNED
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= vmin and vmax <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _is_integer_valued(array: np.ndarray) -> bool:
+    if np.issubdtype(array.dtype, np.integer):
+        return True
+    if not np.issubdtype(array.dtype, np.floating):
+        return False
+    return bool(np.all(np.isfinite(array)) and np.all(np.mod(array, 1) == 0))
+
+
+def compact_array(name: str, array: np.ndarray, categorical: Iterable[str]) -> np.ndarray:
+    """Return the compact version of a data array, the array itself is returned
+    if it is already compact
+
+    Parameters
+    ----------
+    name : str
+        name of the array
+    array : np.ndarray
+        the data array
+    categorical : Iterable[str]
+        names of the arrays that contain integer ids
+
+    Returns
+    -------
+    np.ndarray
+        compact array
+    """
+    if name in _VTK_ARRAYS or array.dtype == bool:
+        return array
+    if (name in categorical and _is_integer_valued(array)) or np.issubdtype(
+        array.dtype, np.integer
+    ):
+        dtype = smallest_integer_dtype(array)
+        if dtype.itemsize < array.dtype.itemsize:
+            return array.astype(dtype)
+        return array
+    if array.dtype == np.float64:
+        return array.astype(np.float32)
+    return array
+
+
+def compact_dataset(dataset: pv.DataSet, categorical: Iterable[str] = CATEGORICAL_ARRAYS) -> int:
+    """Convert the points and data arrays of a dataset to compact dtypes in place.
+
+    Each array is converted directly to its compact type so only the compact copy
+    is allocated, and arrays that are already compact are left untouched so calling
+    this again costs nothing. Single precision points have a resolution of about
+    1 m at 10,000 km, well below what can be seen in a rendered model.
+
+    Parameters
+    ----------
+    dataset : pv.DataSet
+        dataset to convert
+    categorical : Iterable[str], optional
+        names of arrays with integer ids, by default ('stratigraphy',)
+
+    Returns
+    -------
+    int
+        number of bytes saved
+    """
+    categorical = tuple(categorical)
+    saved = 0
+    if isinstance(dataset, _EXPLICIT_POINTS) and dataset.points.dtype == np.float64:
+        saved += dataset.points.nbytes // 2
+        dataset.points = dataset.points.astype(np.float32)
+    elif isinstance(dataset, pv.RectilinearGrid):
+        for axis in ('x', 'y', 'z'):
+            coordinates = getattr(dataset, axis)
+            if coordinates.dtype == np.float64:
+                saved += coordinates.nbytes // 2
+                setattr(dataset, axis, coordinates.astype(np.float32))
+    for data in (dataset.point_data, dataset.cell_data):
+        active = data.active_scalars_name
+        for name in list(data.keys()):
+            array = data[name]
+            compact = compact_array(name, array, categorical)
+            if compact is array:
+                continue
+            saved += array.nbytes - compact.nbytes
+            data[name] = compact
+        if active is not None:
+            data.active_scalars_name = active
+    return saved
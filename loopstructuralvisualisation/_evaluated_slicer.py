@@ -0,0 +1,124 @@
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural.datatypes import BoundingBox
+
+from ._cache import ViewerCache
+
+
+class EvaluatedSlicerMixin:
+    """Plane slicer of Loop3DView evaluating the model on the plane only, see
+    Loop3DView.plot_scalar_field(slicer='evaluate')
+    """
+
+    def _plot_evaluated_slicer(
+        self,
+        evaluate: Callable[[np.ndarray], np.ndarray],
+        version: tuple,
+        scalars: str,
+        name: str,
+        group: str,
+        bounding_box: Optional[BoundingBox] = None,
+        resolution: Optional[List[int]] = None,
+        cmap=None,
+        clim=None,
+        opacity: Optional[float] = None,
+        pyvista_kwargs: dict = {},
+        show_scalar_bar: bool = False,
+        normal: Union[str, List[float]] = 'x',
+        origin: Optional[List[float]] = None,
+        cache_size: int = 32,
+    ) -> pv.Actor:
+        """Add a plane widget that evaluates a function only on the plane when it is
+        released, the slices are cached by the pose of the plane
+
+        Parameters
+        ----------
+        evaluate : Callable[[np.ndarray], np.ndarray]
+            function evaluating the values at an array of points
+        version : tuple
+            key identifying the version of what is evaluated
+        scalars : str
+            name of the evaluated array
+        resolution : Optional[List[int]], optional
+            number of steps of the sampling grid, by default the bounding box nsteps
+        cache_size : int, optional
+            number of plane poses kept in the cache, by default 32
+
+        Returns
+        -------
+        pv.Actor
+            the actor of the slice
+        """
+        if bounding_box is None:
+            if self.model is None:
+                raise ValueError("No bounding box or model provided")
+            bounding_box = self.model.bounding_box
+        nsteps = np.asarray(resolution if resolution is not None else bounding_box.nsteps)
+        bounds_origin = np.asarray(bounding_box.origin, dtype=float)
+        bounds_maximum = np.asarray(bounding_box.maximum, dtype=float)
+        spacing = (bounds_maximum - bounds_origin) / np.maximum(nsteps - 1, 1)
+        sampler = pv.ImageData(dimensions=nsteps, spacing=spacing, origin=bounds_origin)
+        if origin is None:
+            origin = (bounds_origin + bounds_maximum) / 2
+        cache = ViewerCache(max_entries=cache_size)
+        tolerance = float(np.min(spacing)) / 4
+
+        def build_slice(normal, origin) -> pv.PolyData:
+            plane = sampler.slice(normal=normal, origin=origin)
+            if plane.n_points > 0:
+                plane[scalars] = evaluate(np.asarray(plane.points))
+            return plane
+
+        def pose(normal, origin) -> tuple:
+            normal = np.asarray(normal, dtype=float)
+            normal = normal / np.linalg.norm(normal)
+            origin = np.round(np.asarray(origin, dtype=float) / tolerance).astype(int)
+            return (version, tuple(np.round(normal, 4)), tuple(origin))
+
+        def update(normal, origin):
+            plane = cache.get(pose(normal, origin), lambda: build_slice(normal, origin))
+            mesh.shallow_copy(plane)
+            mesh.Modified()
+            self._notify_object_callbacks('modified', name)
+            self._objects_modified()
+
+        widget_normal = normal
+        if isinstance(normal, str):
+            widget_normal = {'x': (1, 0, 0), 'y': (0, 1, 0), 'z': (0, 0, 1)}[normal]
+        mesh = pv.PolyData()
+        mesh.shallow_copy(
+            cache.get(pose(widget_normal, origin), lambda: build_slice(widget_normal, origin))
+        )
+        name = self.increment_name(name)
+        pyvista_kwargs = dict(pyvista_kwargs)
+        if clim is not None:
+            pyvista_kwargs['clim'] = clim
+        actor = self.add_mesh(
+            mesh,
+            scalars=scalars,
+            cmap=cmap,
+            opacity=opacity,
+            name=name,
+            group=group,
+            **pyvista_kwargs,
+        )
+        self.add_plane_widget(
+            update,
+            normal=widget_normal,
+            origin=origin,
+            bounds=[
+                bounds_origin[0],
+                bounds_maximum[0],
+                bounds_origin[1],
+                bounds_maximum[1],
+                bounds_origin[2],
+                bounds_maximum[2],
+            ],
+            interaction_event='end',
+        )
+        if not show_scalar_bar:
+            self.remove_scalar_bar(scalars)
+        return actor
@@ -0,0 +1,317 @@
+"""Vectorised evaluation of the geometry of a fold on a grid, the gradients of the fold
+frame are rotated for all points at once as in FoldEvent.get_deformed_orientation.
+"""
+
+import functools
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural.datatypes import BoundingBox, VectorPoints
+from LoopStructural.modelling.features import BaseFeature
+from LoopStructural.utils import getLogger
+
+from ._cache import feature_version
+from ._memory import track_memory
+
+logger = getLogger(__name__)
+
+
+def normalise(vectors: np.ndarray) -> np.ndarray:
+    """Normalise the rows of an array of vectors in place, zero and nan rows are kept"""
+    norm = np.linalg.norm(vectors, axis=1)
+    mask = np.isfinite(norm) & (norm > 0)
+    vectors[mask] /= norm[mask, None]
+    return vectors
+
+
+def rotate_vectors(vectors: np.ndarray, axes: np.ndarray, angles: np.ndarray) -> np.ndarray:
+    """Rotate each vector about its own axis by its own angle (Rodrigues' rotation formula)
+
+    Parameters
+    ----------
+    vectors : np.ndarray
+        Nx3 vectors to rotate
+    axes : np.ndarray
+        Nx3 unit rotation axes, or a single axis
+    angles : np.ndarray
+        N rotation angles in degrees
+
+    Returns
+    -------
+    np.ndarray
+        Nx3 rotated vectors
+    """
+    axes = np.broadcast_to(axes, vectors.shape)
+    angles = np.deg2rad(angles)[:, None]
+    cos = np.cos(angles)
+    return (
+        vectors * cos
+        + np.cross(axes, vectors) * np.sin(angles)
+        + axes * np.einsum('ij,ij->i', axes, vectors)[:, None] * (1 - cos)
+    )
+
+
+def probe_rotation_angle(
+    rotation_angle: Callable[[np.ndarray], np.ndarray],
+    coordinate: np.ndarray,
+    n_samples: int = 200,
+) -> np.ndarray:
+    """Evaluate a fold rotation angle profile by interpolating between samples
+
+    Parameters
+    ----------
+    rotation_angle : Callable[[np.ndarray], np.ndarray]
+        rotation angle profile, a function of the fold frame coordinate
+    coordinate : np.ndarray
+        value of the fold frame coordinate at each point
+    n_samples : int, optional
+        number of samples of the profile between the minimum and maximum of the
+        coordinate, by default 200
+
+    Returns
+    -------
+    np.ndarray
+        rotation angle at each point in degrees, nan where the coordinate is nan
+    """
+    angle = np.full(coordinate.shape, np.nan)
+    mask = np.isfinite(coordinate)
+    if not np.any(mask):
+        return angle
+    samples = np.linspace(np.min(coordinate[mask]), np.max(coordinate[mask]), n_samples)
+    angle[mask] = np.interp(coordinate[mask], samples, rotation_angle(samples))
+    return angle
+
+
+def evaluate_fold(fold, points: np.ndarray, n_samples: int = 200) -> dict:
+    """Evaluate the fold frame, rotation angles, fold axis and fold limb at points
+
+    Parameters
+    ----------
+    fold : FoldEvent
+        the fold of a folded feature
+    points : np.ndarray
+        Nx3 points in model coordinates
+    n_samples : int, optional
+        number of samples of the rotation angle profiles, see probe_rotation_angle,
+        by default 200
+
+    Returns
+    -------
+    dict
+        arrays 'fold_frame_0' and 'fold_frame_1' of the frame coordinates,
+        'fold_axis_rotation' and 'fold_limb_rotation' in degrees (when the fold has
+        the profile) and the Nx3 unit vectors 'fold_axis' and 'fold_limb'
+    """
+    frame = fold.foldframe
+    gx = frame[0].evaluate_value(points)
+    dgx = normalise(frame[0].evaluate_gradient(points))
+    fold_geometry = {'fold_frame_0': gx}
+    if fold.fold_axis_rotation is not None:
+        gy = frame[1].evaluate_value(points)
+        dgy = normalise(frame[1].evaluate_gradient(points))
+        far = probe_rotation_angle(fold.fold_axis_rotation, gy, n_samples)
+        fold_geometry['fold_frame_1'] = gy
+        fold_geometry['fold_axis_rotation'] = far
+        fold_axis = normalise(rotate_vectors(dgy, dgx, far))
+    elif fold.fold_axis is not None:
+        fold_axis = np.tile(normalise(np.atleast_2d(fold.fold_axis).astype(float)), (len(gx), 1))
+    else:
+        raise ValueError(f'{fold.name} has no fold axis or fold axis rotation angle')
+    fold_geometry['fold_axis'] = fold_axis
+    if fold.fold_limb_rotation is not None:
+        flr = probe_rotation_angle(fold.fold_limb_rotation, gx, n_samples)
+        fold_geometry['fold_limb_rotation'] = flr
+        fold_geometry['fold_limb'] = normalise(rotate_vectors(dgx, fold_axis, -flr))
+    return fold_geometry
+
+
+class FoldMixin:
+    """Fold geometry plots of Loop3DView"""
+
+    @track_memory
+    def plot_fold(
+        self,
+        folded_feature: BaseFeature,
+        fold_axis: bool = True,
+        fold_limb: bool = True,
+        axial_surfaces: bool = True,
+        surfaces: bool = True,
+        value: Optional[Union[float, int, List[float]]] = None,
+        axial_value: Optional[Union[float, int, List[float]]] = None,
+        paint_with: Optional[str] = 'fold_limb_rotation',
+        cmap: str = 'coolwarm',
+        scale: Optional[float] = None,
+        step: int = 5,
+        pyvista_kwargs: dict = {},
+        name: Optional[str] = None,
+        bounding_box: Optional[BoundingBox] = None,
+    ) -> dict:
+        """Plot the fold axis, fold limbs, axial surfaces and surfaces of a folded
+        feature from a single evaluation of its fold frame
+
+        Parameters
+        ----------
+        folded_feature : BaseFeature
+            a feature with a fold, e.g. built with create_and_add_folded_foliation
+        fold_axis : bool, optional
+            whether to plot the fold axis as black glyphs, by default True
+        fold_limb : bool, optional
+            whether to plot the direction of the fold limbs as blue glyphs, by default True
+        axial_surfaces : bool, optional
+            whether to plot the axial surfaces, isosurfaces of the first fold frame
+            coordinate, by default True
+        surfaces : bool, optional
+            whether to plot the isosurfaces of the folded feature, by default True
+        value : Optional[Union[float, int, List[float]]], optional
+            isosurface value, list of values or number of surfaces of the folded
+            feature, by default the average value
+        axial_value : Optional[Union[float, int, List[float]]], optional
+            value, list of values or number of axial surfaces, by default the average value
+        paint_with : Optional[str], optional
+            'fold_limb_rotation' or 'fold_axis_rotation' to paint the surfaces with the
+            rotation angle, or None for a single colour, by default 'fold_limb_rotation'
+        cmap : str, optional
+            colourmap of the rotation angles, by default 'coolwarm'
+        scale : Optional[float], optional
+            scale of the glyphs relative to 5% of the model size, by default None
+        step : int, optional
+            a glyph is added for every step points of the grid along each axis,
+            by default 5
+        pyvista_kwargs : dict, optional
+            additional kwargs sent to add_mesh, by default {}
+        name : Optional[str], optional
+            prefix of the object names, by default the feature name
+        bounding_box : Optional[BoundingBox], optional
+            bounding box to evaluate the fold in, by default the model bounding box
+
+        Returns
+        -------
+        dict
+            actors added with the keys 'fold_axis', 'fold_limb', 'axial_surfaces' and
+            'surfaces'
+        """
+        fold = getattr(folded_feature, 'fold', None)
+        if fold is None:
+            raise ValueError(f'{folded_feature.name} is not a folded feature')
+        if name is None:
+            name = folded_feature.name
+        grid = self._build_fold(folded_feature, bounding_box)
+        actors = {}
+        scale = self._get_vector_scale(scale)
+        for key, plot, colour in (
+            ('fold_axis', fold_axis, 'black'),
+            ('fold_limb', fold_limb, 'blue'),
+        ):
+            if not plot or key not in grid.point_data:
+                continue
+            glyphs = functools.partial(
+                self._build_fold_glyphs, folded_feature, key, scale, step, bounding_box
+            )
+            kwargs = {'color': colour, **pyvista_kwargs}
+            actors[key] = self.add_mesh(
+                glyphs(),
+                name=self.increment_name(f'{name}_{key}'),
+                group=folded_feature.name,
+                recipe=glyphs,
+                **kwargs,
+            )
+        if paint_with is not None and paint_with not in grid.point_data:
+            logger.warning(f'{folded_feature.name} has no {paint_with}, surfaces are not painted')
+            paint_with = None
+        paint_kwargs = {}
+        if paint_with is not None:
+            paint_kwargs = {'scalars': paint_with, 'cmap': cmap, 'show_scalar_bar': False}
+            paint_kwargs['clim'] = grid.get_data_range(paint_with)
+        for key, plot, scalars, isovalue, colour in (
+            ('axial_surfaces', axial_surfaces, 'fold_frame_0', axial_value, 'grey'),
+            ('surfaces', surfaces, folded_feature.name, value, 'red'),
+        ):
+            if not plot:
+                continue
+            surface = functools.partial(
+                self._build_fold_surface, folded_feature, scalars, isovalue, bounding_box
+            )
+            mesh = surface()
+            if mesh.n_points == 0:
+                logger.warning(f'No {key} to plot')
+                continue
+            kwargs = dict(pyvista_kwargs)
+            kwargs.update(paint_kwargs if paint_with is not None else {'color': colour})
+            actors[key] = self.add_mesh(
+                mesh,
+                name=self.increment_name(f'{name}_{key}'),
+                group=folded_feature.name,
+                recipe=surface,
+                **kwargs,
+            )
+        return actors
+
+    def _build_fold(
+        self, folded_feature: BaseFeature, bounding_box: Optional[BoundingBox] = None
+    ) -> pv.RectilinearGrid:
+        """Evaluate a folded feature and the geometry of its fold on one grid, cached per
+        version of the feature and its fold frame
+        """
+        if bounding_box is None:
+            if folded_feature.model is None:
+                raise ValueError('Must specify bounding box')
+            bounding_box = folded_feature.model.bounding_box
+        fold = folded_feature.fold
+        key = (
+            'fold',
+            feature_version(folded_feature),
+            feature_version(fold.foldframe),
+            tuple(np.asarray(bounding_box.origin, dtype=float)),
+            tuple(np.asarray(bounding_box.maximum, dtype=float)),
+            tuple(np.asarray(bounding_box.nsteps, dtype=int)),
+        )
+
+        def evaluate():
+            axes = [
+                np.linspace(bounding_box.origin[i], bounding_box.maximum[i], bounding_box.nsteps[i])
+                for i in range(3)
+            ]
+            grid = pv.RectilinearGrid(*axes)
+            points = grid.points
+            grid.point_data[folded_feature.name] = folded_feature.evaluate_value(points)
+            for array, values in evaluate_fold(fold, points).items():
+                grid.point_data[array] = values
+            return grid
+
+        return self.cache.get(key, evaluate)
+
+    def _build_fold_glyphs(
+        self,
+        folded_feature: BaseFeature,
+        vectors: str,
+        scale: float,
+        step: int,
+        bounding_box: Optional[BoundingBox] = None,
+    ) -> pv.PolyData:
+        """Glyphs of the fold axis or fold limb at every step points of the fold grid"""
+        grid = self._build_fold(folded_feature, bounding_box)
+        index = np.arange(grid.n_points).reshape(grid.dimensions, order='F')
+        index = index[::step, ::step, ::step].ravel(order='F')
+        values = np.asarray(grid.point_data[vectors])[index]
+        index = index[np.all(np.isfinite(values), axis=1)]
+        points = VectorPoints(
+            locations=grid.points[index],
+            vectors=np.asarray(grid.point_data[vectors])[index],
+            name=f'{folded_feature.name}_{vectors}',
+        )
+        return points.vtk(scale=scale, normalise=True)
+
+    def _build_fold_surface(
+        self,
+        folded_feature: BaseFeature,
+        scalars: str,
+        value: Optional[Union[float, int, List[float]]] = None,
+        bounding_box: Optional[BoundingBox] = None,
+    ) -> pv.DataSet:
+        """Contour the folded feature or a fold frame coordinate from the fold grid, the
+        rotation angles are interpolated onto the surfaces by the contour filter
+        """
+        grid = self._build_fold(folded_feature, bounding_box)
+        return self._contour_scalar_field(grid, scalars, value)
@@ -0,0 +1,71 @@
+"""Regular grids wrapped as image data for volume rendering, sharing the data arrays
+of the grid.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pyvista as pv
+
+
+def _axis_spacing(coordinates: np.ndarray, axis: str) -> float:
+    coordinates = np.asarray(coordinates, dtype=float)
+    if coordinates.size < 2:
+        return 1.0
+    spacing = np.diff(coordinates)
+    if not np.allclose(spacing, spacing[0], rtol=1e-6, atol=0):
+        raise ValueError(f'Grid spacing along {axis} is not regular, cannot wrap as ImageData')
+    return float(spacing[0])
+
+
+def as_image_data(
+    grid: pv.DataSet,
+    preference: str = 'point',
+    array_names: Optional[Sequence[str]] = None,
+) -> pv.ImageData:
+    """Wrap a regular grid as image data without copying the data arrays
+
+    Parameters
+    ----------
+    grid : pv.DataSet
+        a pv.RectilinearGrid with regular spacing or pv.ImageData
+    preference : str, optional
+        'point' to use the point data of the grid or 'cell' to use the cell data on an
+        image of the cell centres, by default 'point'
+    array_names : Optional[Sequence[str]], optional
+        names of the arrays to attach, by default all arrays
+
+    Returns
+    -------
+    pv.ImageData
+        image sharing the data arrays of the grid
+    """
+    if isinstance(grid, pv.ImageData):
+        dimensions = np.array(grid.dimensions)
+        spacing = np.array(grid.spacing, dtype=float)
+        origin = np.array(grid.origin, dtype=float)
+    elif isinstance(grid, pv.RectilinearGrid):
+        axes = (grid.x, grid.y, grid.z)
+        dimensions = np.array([len(a) for a in axes])
+        spacing = np.array([_axis_spacing(a, n) for a, n in zip(axes, 'xyz')])
+        origin = np.array([a[0] for a in axes], dtype=float)
+    else:
+        raise TypeError(f'Cannot wrap {type(grid).__name__} as ImageData')
+    if preference == 'cell':
+        dimensions = np.maximum(dimensions - 1, 1)
+        origin = origin + spacing / 2
+        source = grid.GetCellData()
+    elif preference == 'point':
+        source = grid.GetPointData()
+    else:
+        raise ValueError(f'preference must be point or cell, not {preference}')
+    image = pv.ImageData(dimensions=dimensions, spacing=spacing, origin=origin)
+    target = image.GetPointData()
+    for i in range(source.GetNumberOfArrays()):
+        array = source.GetAbstractArray(i)
+        if array is None or array.GetName() == 'vtkGhostType':
+            continue
+        if array_names is not None and array.GetName() not in array_names:
+            continue
+        target.AddArray(array)
+    return image
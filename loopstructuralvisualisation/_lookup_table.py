@@ -0,0 +1,218 @@
+"""Categorical colours of the stratigraphic units shared by the 2D, 3D and column views.
+
+One lookup table is built for each version of a model (and of its stratigraphic
+column) and cached, so every view colours the units from the same table instead of
+walking the stratigraphic column again. The vtk lookup table uses indexed lookup with
+one annotation per unit id, so each id has exactly its unit colour whatever the range
+of the ids and the table can be shared by every actor showing the units. Changing the
+colour of a unit updates the vtk table in place and the matplotlib artists registered
+with the table, no geometry is uploaded again and the model is not evaluated again.
+"""
+
+import inspect
+from typing import Callable, Hashable, List, Tuple, Union
+import weakref
+
+import numpy as np
+import pyvista as pv
+from matplotlib import colors
+
+from LoopStructural import GeologicalModel
+from LoopStructural.utils import getLogger
+
+from ._cache import ViewerCache, model_version
+
+logger = getLogger(__name__)
+
+# colour of values that are not the id of a unit, e.g. outside of the stratigraphic column
+UNASSIGNED_COLOUR = 'lightgrey'
+
+_lookup_tables = ViewerCache(max_entries=8)
+
+
+def _to_rgba(colour) -> Tuple[float, float, float, float]:
+    try:
+        return colors.to_rgba(colour)
+    except ValueError:
+        logger.warning(f'Cannot convert colour {colour}, using {UNASSIGNED_COLOUR}')
+        return colors.to_rgba(UNASSIGNED_COLOUR)
+
+
+def stratigraphic_units(model: GeologicalModel) -> List[dict]:
+    """The units of the stratigraphic column of a model sorted by id
+
+    Parameters
+    ----------
+    model : GeologicalModel
+        the geological model
+
+    Returns
+    -------
+    List[dict]
+        'id', 'name', 'group' and 'colour' of each unit
+    """
+    column = getattr(model, 'stratigraphic_column', None)
+    if column is None:
+        return []
+    units = []
+    for group in column.get_groups():
+        if group == 'faults':
+            continue
+        for unit in group.units:
+            units.append(
+                {'id': int(unit.id), 'name': unit.name, 'group': group.name, 'colour': unit.colour}
+            )
+    return sorted(units, key=lambda u: u['id'])
+
+
+class StratigraphicLookupTable:
+    def __init__(self, units: List[dict], column=None):
+        """Categorical colours of stratigraphic units, see stratigraphic_lookup_table
+
+        Parameters
+        ----------
+        units : List[dict]
+            'id', 'name', 'group' and 'colour' of each unit sorted by id
+        column : StratigraphicColumn, optional
+            the stratigraphic column of the units, the colour of a unit in the column
+            is updated by set_colour, by default None
+        """
+        self.units = units
+        self.column = column
+        self.ids = np.array([u['id'] for u in units], dtype=int)
+        self.names = [u['name'] for u in units]
+        self.rgba = np.array([_to_rgba(u['colour']) for u in units]).reshape(-1, 4)
+        self.lookup_table = pv.LookupTable()
+        self.lookup_table.SetIndexedLookup(True)
+        self.lookup_table.SetNumberOfTableValues(max(len(units), 1))
+        self.lookup_table.nan_color = UNASSIGNED_COLOUR
+        self.lookup_table.annotations = dict(zip(self.ids.tolist(), self.names))
+        self._update_table()
+        self._artists = weakref.WeakSet()
+        self._callbacks = []
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    @property
+    def cmap(self) -> colors.ListedColormap:
+        """Matplotlib colourmap with one colour per unit, use with norm"""
+        cmap = colors.ListedColormap(self.rgba if len(self) > 0 else [UNASSIGNED_COLOUR])
+        cmap.set_under(UNASSIGNED_COLOUR)
+        cmap.set_over(UNASSIGNED_COLOUR)
+        cmap.set_bad(UNASSIGNED_COLOUR)
+        return cmap
+
+    @property
+    def norm(self) -> colors.BoundaryNorm:
+        """Matplotlib norm mapping each unit id to the colour of the unit in cmap"""
+        if len(self) == 0:
+            return colors.BoundaryNorm([-0.5, 0.5], 1)
+        boundaries = np.append(self.ids - 0.5, self.ids[-1] + 0.5)
+        # ids are not always consecutive, values between two ids are unassigned
+        return colors.BoundaryNorm(boundaries, len(boundaries) - 1)
+
+    def colour_steps(self) -> List[Tuple[float, Tuple[float, float, float]]]:
+        """Points of a step transfer function giving each unit id its colour, used to
+        colour volumes which can not use an indexed lookup table
+        """
+        steps = []
+        for unit_id, rgba in zip(self.ids, self.rgba):
+            steps.append((unit_id - 0.5, tuple(rgba[:3])))
+            steps.append((unit_id + 0.499, tuple(rgba[:3])))
+        return steps
+
+    def index(self, unit: Union[str, int]) -> int:
+        """Position of a unit, given by name or id, in the table"""
+        if isinstance(unit, str):
+            if unit not in self.names:
+                raise ValueError(f'{unit} is not a unit in the stratigraphic column')
+            return self.names.index(unit)
+        matches = np.flatnonzero(self.ids == int(unit))
+        if len(matches) == 0:
+            raise ValueError(f'{unit} is not a unit id in the stratigraphic column')
+        return int(matches[0])
+
+    def add_artist(self, artist):
+        """Recolour a matplotlib artist (e.g. an image or patch collection) when the
+        colour of a unit changes, the artist should be coloured with cmap and norm
+        """
+        self._artists.add(artist)
+
+    def add_callback(self, callback: Callable[['StratigraphicLookupTable'], None]):
+        """Call a function with the table when the colour of a unit changes. Methods
+        are held with a weak reference so the table does not keep a view alive.
+        """
+        if inspect.ismethod(callback):
+            reference = weakref.WeakMethod(callback)
+        else:
+
+            def reference():
+                return callback
+
+        if any(r() == callback for r in self._callbacks):
+            return
+        self._callbacks.append(reference)
+
+    def set_colour(self, unit: Union[str, int], colour):
+        """Change the colour of a unit in the table, the stratigraphic column and every
+        view using the table
+
+        Parameters
+        ----------
+        unit : Union[str, int]
+            unit name or stratigraphic id
+        colour : str or rgb(a) tuple
+            any matplotlib colour
+        """
+        i = self.index(unit)
+        self.rgba[i] = _to_rgba(colour)
+        self.units[i]['colour'] = colors.to_hex(self.rgba[i])
+        if self.column is not None:
+            column_unit = self.column.get_unit_by_name(self.names[i])
+            if column_unit is not None:
+                column_unit.colour = self.units[i]['colour']
+        self._update_table()
+        cmap = self.cmap
+        for artist in list(self._artists):
+            artist.set_cmap(cmap)
+        self._callbacks = [r for r in self._callbacks if r() is not None]
+        for reference in list(self._callbacks):
+            callback = reference()
+            if callback is not None:
+                callback(self)
+
+    def _update_table(self):
+        for i, rgba in enumerate(self.rgba):
+            self.lookup_table.SetTableValue(i, *rgba)
+        self.lookup_table.Modified()
+
+
+def _column_key(model: GeologicalModel) -> Hashable:
+    """The ids and names of the units, the colours are not part of the key so that
+    recolouring a unit updates the cached table instead of replacing it
+    """
+    return tuple((u['id'], u['name'], u['group']) for u in stratigraphic_units(model))
+
+
+def stratigraphic_lookup_table(model: GeologicalModel) -> StratigraphicLookupTable:
+    """The lookup table of the stratigraphic units of a model, built once for each
+    version of the model and of its stratigraphic column
+
+    Parameters
+    ----------
+    model : GeologicalModel
+        the geological model
+
+    Returns
+    -------
+    StratigraphicLookupTable
+        the cached lookup table
+    """
+    key = ('stratigraphic_lookup_table', model_version(model), _column_key(model))
+    return _lookup_tables.get(
+        key,
+        lambda: StratigraphicLookupTable(
+            stratigraphic_units(model), getattr(model, 'stratigraphic_column', None)
+        ),
+    )
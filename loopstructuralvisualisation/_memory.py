@@ -0,0 +1,347 @@
+"""Memory accounting of the datasets and cached products of a viewer, shared arrays
+are counted once by the address of their buffer in unique_nbytes.
+"""
+
+import functools
+import tracemalloc
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyvista as pv
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from LoopStructural.utils import getLogger
+
+from ._compact import compact_dataset
+
+logger = getLogger(__name__)
+
+
+def source_dataset(actor) -> Optional[pv.DataSet]:
+    """Dataset shown by an actor, the source of the pipeline feeding its mapper.
+    The mapper may be connected to a filter (e.g. selecting the active scalars) whose
+    output is only updated when the scene is rendered.
+    """
+    algorithm = getattr(actor, 'mapper', None)
+    if algorithm is None:
+        return None
+    while algorithm.GetNumberOfInputPorts() > 0 and algorithm.GetNumberOfInputConnections(0) > 0:
+        algorithm = algorithm.GetInputAlgorithm(0, 0)
+    dataset = pv.wrap(algorithm.GetOutputDataObject(0))
+    return dataset if isinstance(dataset, pv.DataSet) else None
+
+
+def dataset_nbytes(dataset) -> int:
+    """Memory used by the points, cells and arrays of a dataset"""
+    if not isinstance(dataset, pv.DataSet):
+        return 0
+    return int(dataset.actual_memory_size) * 1024
+
+
+def _cell_arrays_nbytes(dataset: pv.DataSet) -> int:
+    if isinstance(dataset, pv.PolyData):
+        cells = (dataset.GetVerts(), dataset.GetLines(), dataset.GetPolys(), dataset.GetStrips())
+        return int(
+            sum(
+                vtk_to_numpy(c.GetConnectivityArray()).nbytes
+                + vtk_to_numpy(c.GetOffsetsArray()).nbytes
+                for c in cells
+            )
+        )
+    if isinstance(dataset, pv.UnstructuredGrid):
+        cells = dataset.GetCells()
+        nbytes = vtk_to_numpy(cells.GetConnectivityArray()).nbytes
+        nbytes += vtk_to_numpy(cells.GetOffsetsArray()).nbytes
+        return int(nbytes + dataset.celltypes.nbytes)
+    # the cells of structured datasets are implicit
+    return 0
+
+
+def _points_nbytes(dataset: pv.DataSet) -> int:
+    if isinstance(dataset, pv.ImageData):
+        return 0
+    if isinstance(dataset, pv.RectilinearGrid):
+        return int(sum(np.asarray(getattr(dataset, a)).nbytes for a in ('x', 'y', 'z')))
+    if dataset.GetPoints() is None:
+        return 0
+    return int(np.asarray(dataset.points).nbytes)
+
+
+def dataset_memory(dataset: pv.DataSet) -> dict:
+    """Bytes used by the points, cells and each data array of a dataset
+
+    Parameters
+    ----------
+    dataset : pv.DataSet
+        the dataset
+
+    Returns
+    -------
+    dict
+        'points', 'cells' and 'arrays' (a dict of 'point/<name>' or 'cell/<name>' to
+        bytes) and the 'total'
+    """
+    arrays = {}
+    for association, data in (('point', dataset.point_data), ('cell', dataset.cell_data)):
+        for name in data.keys():
+            arrays[f'{association}/{name}'] = int(np.asarray(data[name]).nbytes)
+    memory = {
+        'points': _points_nbytes(dataset),
+        'cells': _cell_arrays_nbytes(dataset),
+        'arrays': arrays,
+    }
+    memory['total'] = memory['points'] + memory['cells'] + sum(arrays.values())
+    return memory
+
+
+def nbytes(value: Any) -> int:
+    """Bytes used by the arrays and datasets in a cached product"""
+    if isinstance(value, pv.DataSet):
+        return dataset_memory(value)['total']
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(v) for v in value)
+    return 0
+
+
+def _arrays(value: Any) -> List[np.ndarray]:
+    """The numpy views of the points, cells and data arrays in a cached product"""
+    if isinstance(value, pv.DataSet):
+        arrays = []
+        if isinstance(value, pv.RectilinearGrid):
+            arrays.extend(np.asarray(getattr(value, a)) for a in ('x', 'y', 'z'))
+        elif not isinstance(value, pv.ImageData) and value.GetPoints() is not None:
+            arrays.append(np.asarray(value.points))
+        if isinstance(value, pv.PolyData):
+            cells = (value.GetVerts(), value.GetLines(), value.GetPolys(), value.GetStrips())
+        elif isinstance(value, pv.UnstructuredGrid):
+            cells = (value.GetCells(),)
+            arrays.append(np.asarray(value.celltypes))
+        else:
+            cells = ()
+        for c in cells:
+            arrays.append(vtk_to_numpy(c.GetConnectivityArray()))
+            arrays.append(vtk_to_numpy(c.GetOffsetsArray()))
+        for data in (value.point_data, value.cell_data):
+            arrays.extend(np.asarray(data[name]) for name in data.keys())
+        return arrays
+    if isinstance(value, np.ndarray):
+        return [value]
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return [a for v in value for a in _arrays(v)]
+    return []
+
+
+def buffers(value: Any) -> Set[Tuple[int, int]]:
+    """Address and size of the buffers of the arrays in a cached product, shallow copies
+    of a dataset have the same buffers
+    """
+    return {(a.__array_interface__['data'][0], a.nbytes) for a in _arrays(value) if a.nbytes > 0}
+
+
+def unique_nbytes(values: Iterable[Any]) -> int:
+    """Bytes used by the arrays of several cached products or datasets, arrays shared
+    between them are counted once
+    """
+    unique = set()
+    for value in values:
+        unique |= buffers(value)
+    return sum(size for _address, size in unique)
+
+
+def track_memory(method: Callable) -> Callable:
+    """Record the peak memory allocated during a plot call for the objects it adds.
+
+    Only active when Loop3DView.track_memory is set. The peak is measured with
+    tracemalloc, which follows the allocations made by python and numpy but not the
+    allocations made inside vtk. Nested plot calls are attributed to the outer call.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.track_memory or self._tracking_memory:
+            return method(self, *args, **kwargs)
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        start, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        before = set(self.objects)
+        self._tracking_memory = True
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._tracking_memory = False
+            _current, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            for name in set(self.objects) - before:
+                self.objects[name]['peak_bytes'] = int(peak - start)
+                self.objects[name]['created_by'] = method.__name__
+
+    return wrapper
+
+
+class MemoryBudgetMixin:
+    """Memory report and memory budget of Loop3DView. Hidden objects with a recipe are
+    released, least recently used first, when the budget is exceeded.
+    """
+
+    def memory_report(self, as_dataframe: bool = False) -> Union[dict, pd.DataFrame]:
+        """Report the bytes used by the points, cells and arrays of every object and
+        by the cached products
+
+        Parameters
+        ----------
+        as_dataframe : bool, optional
+            return a table with one row per array instead of a dict, by default False
+
+        Returns
+        -------
+        Union[dict, pd.DataFrame]
+            dict with 'objects' (name to 'points', 'cells', 'arrays', 'total', 'evicted',
+            'peak_bytes' and 'created_by'), 'cache' (key to bytes) and 'total', or a table
+            with the columns object, component and bytes
+        """
+        objects = {}
+        for name, obj in self.objects.items():
+            dataset = source_dataset(self._object_actor(name))
+            if isinstance(dataset, pv.DataSet):
+                memory = dataset_memory(dataset)
+            else:
+                memory = {'points': 0, 'cells': 0, 'arrays': {}, 'total': 0}
+            memory['evicted'] = obj['evicted']
+            memory['peak_bytes'] = obj['peak_bytes']
+            memory['created_by'] = obj['created_by']
+            objects[name] = memory
+        cache = {key: nbytes(value) for key, value in self.cache.items()}
+        report = {
+            'objects': objects,
+            'cache': cache,
+            'total': sum(o['total'] for o in objects.values()) + sum(cache.values()),
+        }
+        if not as_dataframe:
+            return report
+        rows = []
+        for name, memory in objects.items():
+            rows.append((name, 'points', memory['points']))
+            rows.append((name, 'cells', memory['cells']))
+            rows.extend((name, array, size) for array, size in memory['arrays'].items())
+            if memory['peak_bytes'] is not None:
+                rows.append((name, f'peak of {memory["created_by"]}', memory['peak_bytes']))
+        rows.extend(('cache', str(key), size) for key, size in cache.items())
+        return pd.DataFrame(rows, columns=['object', 'component', 'bytes'])
+
+    @property
+    def memory_used(self) -> int:
+        """Bytes used by the datasets of the objects and the cached products, shared
+        arrays are counted once
+        """
+        datasets = [
+            source_dataset(self._object_actor(name))
+            for name, obj in self.objects.items()
+            if not obj['evicted']
+        ]
+        return unique_nbytes(datasets + [value for _key, value in self.cache.items()])
+
+    def _sharing_objects(self, name: str) -> List[str]:
+        """An object and the objects showing its dataset in other views, see share_actor"""
+        return [name] + [n for n, o in self.objects.items() if o['shared_from'] == name]
+
+    def _object_buffers(self) -> set:
+        """Buffers of the datasets of the objects that are not released"""
+        used = set()
+        for name, obj in self.objects.items():
+            if not obj['evicted']:
+                used |= buffers(source_dataset(self._object_actor(name)))
+        return used
+
+    def _release_cache(self, released: Optional[set] = None) -> int:
+        """Drop cached products no object shows, least recently used first. Only the
+        products using the released buffers if given, otherwise until the budget is met.
+        """
+        used = self._object_buffers()
+        dropped = 0
+        for key, value in self.cache.items():
+            if released is None and self.memory_used <= self.memory_budget:
+                break
+            product = buffers(value)
+            if product & used or (released is not None and not product & released):
+                continue
+            self.cache.invalidate(key)
+            dropped += 1
+            logger.info(f'Released cached product {key}')
+        return dropped
+
+    def _evict_object(self, name: str):
+        """Release the dataset of an object and of the objects sharing it, keeping the
+        actors and their properties
+        """
+        obj = self.objects[name]
+        actor = self._object_actor(name)
+        dataset = source_dataset(actor)
+        released = buffers(dataset)
+        mapper = actor.mapper
+        mapper.dataset = type(dataset)()
+        # run the pipeline so filters between the dataset and the mapper release their output
+        mapper.Update()
+        block_model = self._block_models.get(name)
+        if block_model is not None and block_model['block'] is not None:
+            # keep the unit visibility but not the grid so the block model can be released
+            cached = block_model['cache']
+            block_model['cache'] = {'offset': cached['offset'], 'n_units': cached['n_units']}
+            block_model['block'] = None
+        for n in self._sharing_objects(name):
+            for products in (self._locators, self._restorations):
+                products.pop(n, None)
+            self.objects[n]['evicted'] = True
+        self._release_cache(released)
+        logger.info(f'Released {obj["nbytes"] / 1024**2:.1f} MiB used by {name}')
+
+    def _restore_object(self, name: str):
+        """Rebuild the dataset of an object released by _evict_object"""
+        obj = self.objects[name]
+        mesh = obj['recipe']()
+        if obj['compact']:
+            compact_dataset(mesh)
+        self._object_actor(name).mapper.dataset = mesh
+        obj['nbytes'] = dataset_nbytes(mesh)
+        for n in self._sharing_objects(name):
+            self.objects[n]['evicted'] = False
+        logger.info(f'Rebuilt {name}')
+
+    def _enforce_memory_budget(self):
+        """Release hidden objects, least recently used first, and then unused cached
+        products until the memory used is within the budget
+        """
+        if self.memory_budget is None:
+            return
+        if self.memory_used <= self.memory_budget:
+            return
+        candidates = []
+        for name, obj in self.objects.items():
+            if obj['recipe'] is None or obj['evicted'] or obj['shared_from'] is not None:
+                continue
+            sharing = self._sharing_objects(name)
+            actors = [self._object_actor(n) for n in sharing]
+            if any(a is None or a.GetVisibility() for a in actors):
+                continue
+            candidates.append((max(self.objects[n]['last_used'] for n in sharing), name))
+        for _last_used, name in sorted(candidates):
+            self._evict_object(name)
+            if self.memory_used <= self.memory_budget:
+                return
+        self._release_cache()
+        used = self.memory_used
+        if used <= self.memory_budget:
+            return
+        logger.warning(
+            f'Objects use {used / 1024**2:.1f} MiB, more than the memory budget of '
+            f'{self.memory_budget / 1024**2:.1f} MiB. Hide or remove objects to release memory'
+        )
@@ -0,0 +1,210 @@
+from typing import List, Optional, Union
+
+import numpy as np
+import pyvista as pv
+from vtkmodules.util.numpy_support import vtk_to_numpy
+from vtkmodules.vtkCommonDataModel import vtkDataObject
+from vtkmodules.vtkCommonExecutionModel import vtkAlgorithm
+from vtkmodules.vtkFiltersCore import vtkThreshold
+from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
+
+from LoopStructural.datatypes import BoundingBox, ValuePoints, VectorPoints
+from LoopStructural.modelling.features import BaseFeature
+
+
+def _first_cell_points(mesh: pv.PolyData) -> np.ndarray:
+    """Index of the first point of every cell of a polydata, in cell order"""
+    first = []
+    for cells in (mesh.GetVerts(), mesh.GetLines(), mesh.GetPolys(), mesh.GetStrips()):
+        if cells.GetNumberOfCells() == 0:
+            continue
+        connectivity = vtk_to_numpy(cells.GetConnectivityArray())
+        offsets = vtk_to_numpy(cells.GetOffsetsArray())[:-1]
+        first.append(connectivity[offsets])
+    if len(first) == 0:
+        return np.zeros(0, dtype=int)
+    return np.concatenate(first)
+
+
+class MergedDataMixin:
+    """Data of many features plotted as one value and one vector actor, see
+    Loop3DView.plot_data(merge=True)
+    """
+
+    def _merge_data(
+        self,
+        features: List[BaseFeature],
+        value: bool,
+        vector: bool,
+        scale: float,
+        geom: str,
+        scalars: Optional[np.ndarray],
+        normalise: bool,
+        bb: Optional[BoundingBox],
+    ) -> dict:
+        """Concatenate the value points and the vector glyphs of all features.
+        The arrays are gathered and concatenated once, the vectors are normalised
+        in one pass and glyphed with a single filter.
+        """
+        feature_names = [f.name for f in features]
+        gathered = {'value': [], 'vector': []}
+        for i, f in enumerate(features):
+            for d in f.get_data():
+                if isinstance(d, ValuePoints) and value:
+                    gathered['value'].append((i, d))
+                if isinstance(d, VectorPoints) and vector:
+                    gathered['vector'].append((i, d))
+        merged = {'features': feature_names}
+        if len(gathered['value']) > 0:
+            points = pv.PolyData(np.concatenate([d.locations for _, d in gathered['value']]))
+            feature_id = np.concatenate(
+                [np.full(len(d.locations), i) for i, d in gathered['value']]
+            )
+            if scalars is not None and len(scalars) == points.n_points:
+                points['scalars'] = scalars
+            else:
+                points['values'] = np.concatenate([d.values for _, d in gathered['value']])
+            points['feature_id'] = feature_id
+            points.set_active_scalars('scalars' if 'scalars' in points.point_data else 'values')
+            merged['value'] = (points, feature_id)
+        if len(gathered['vector']) > 0:
+            locations = np.concatenate([d.locations for _, d in gathered['vector']])
+            vectors = np.concatenate([d.vectors for _, d in gathered['vector']]).astype(float)
+            feature_id = np.concatenate(
+                [np.full(len(d.locations), i) for i, d in gathered['vector']]
+            )
+            set_id = np.concatenate(
+                [np.full(len(d.locations), j) for j, (_, d) in enumerate(gathered['vector'])]
+            )
+            norm = np.linalg.norm(vectors, axis=1)
+            nonzero = norm > 0
+            vectors[nonzero, :] /= norm[nonzero, None]
+            if not normalise:
+                # scale by the norm relative to the longest vector of each dataset
+                longest = np.zeros(len(gathered['vector']))
+                np.maximum.at(longest, set_id, norm)
+                relative = np.zeros_like(norm)
+                relative[nonzero] = norm[nonzero] / longest[set_id[nonzero]]
+                vectors *= relative[:, None]
+            if bb is not None:
+                locations = bb.project(np.copy(locations))
+            points = pv.PolyData(locations)
+            if scalars is not None and len(scalars) == points.n_points:
+                points['scalars'] = scalars
+            points['feature_id'] = feature_id
+            points.point_data.set_vectors(vectors, 'vectors')
+            if geom == "arrow":
+                geom = pv.Arrow(scale=scale)
+            elif geom == "disc":
+                geom = pv.Disc(inner=0, outer=scale * 0.5, c_res=50).rotate_y(90)
+            glyphs = points.glyph(orient='vectors', scale='vectors', geom=geom, tolerance=None)
+            if bb is not None:
+                glyphs.points = bb.reproject(glyphs.points)
+            cell_feature = glyphs['feature_id'][_first_cell_points(glyphs)]
+            glyphs.set_active_scalars('scalars' if 'scalars' in glyphs.point_data else 'feature_id')
+            merged['vector'] = (glyphs, cell_feature)
+        return merged
+
+    def _plot_merged_data(
+        self,
+        features: List[BaseFeature],
+        value: bool,
+        vector: bool,
+        scale: float,
+        geom: str,
+        name: Optional[str],
+        scalars: Optional[np.ndarray],
+        normalise: bool,
+        pyvista_kwargs: dict,
+        bb: Optional[BoundingBox],
+        sprites: dict,
+    ) -> List[pv.Actor]:
+        """Add the merged value and vector data, see plot_data"""
+        merged = self._merge_data(features, value, vector, scale, geom, scalars, normalise, bb)
+        if name is None:
+            name = 'data' if len(features) > 1 else features[0].name
+        actors = []
+        for kind, suffix in (('value', 'values'), ('vector', 'vectors')):
+            if kind not in merged:
+                continue
+            mesh, cell_feature = merged[kind]
+            object_name = self.increment_name(f'{name}_{suffix}')
+            if kind == 'value':
+                actor = self._add_value_points(
+                    mesh, object_name, 'data', pyvista_kwargs=pyvista_kwargs, **sprites
+                )
+            else:
+                actor = self.add_mesh(mesh, name=object_name, group='data', **pyvista_kwargs)
+            actors.append(actor)
+            self._merged_data[object_name] = {
+                'mesh': mesh,
+                'cell_feature': cell_feature,
+                'features': merged['features'],
+                'visible': np.ones(len(merged['features']), dtype=bool),
+            }
+        return actors
+
+    def set_data_visibility(
+        self,
+        features: Union[str, List[str]],
+        visible: bool = True,
+        name: Optional[str] = None,
+    ):
+        """Show or hide the data of features in the actors added by plot_data(merge=True)
+        without gathering or glyphing the data again
+
+        Parameters
+        ----------
+        features : Union[str, List[str]]
+            name of the feature, or a list of names
+        visible : bool, optional
+            whether to show or hide the data, by default True
+        name : Optional[str], optional
+            name of the merged data object, by default all merged data objects
+        """
+        if isinstance(features, str):
+            features = [features]
+        if name is None:
+            names = list(self._merged_data)
+        elif name in self._merged_data:
+            names = [name]
+        else:
+            raise ValueError(f'{name} is not a merged data object')
+        for n in names:
+            merged = self._merged_data[n]
+            for f in features:
+                if f in merged['features']:
+                    merged['visible'][merged['features'].index(f)] = visible
+            mapper = self._object_actor(n).mapper
+            visible = merged['visible'][merged['cell_feature']]
+            if np.all(visible):
+                mapper.SetInputData(merged['mesh'])
+            else:
+                mapper.SetInputConnection(self._data_threshold(merged, visible).GetOutputPort())
+            self._notify_object_callbacks('modified', n)
+        self._objects_modified()
+
+    @staticmethod
+    def _data_threshold(merged: dict, visible: np.ndarray) -> vtkAlgorithm:
+        """Pipeline extracting the visible cells of merged data as polydata"""
+        mesh = merged['mesh']
+        if 'data_visible' in mesh.cell_data:
+            mesh.cell_data['data_visible'][:] = visible
+            mesh.cell_data.GetArray('data_visible').Modified()
+            mesh.Modified()
+        else:
+            mesh.cell_data['data_visible'] = visible.astype(np.uint8)
+        # the polydata mappers ignore hidden ghost cells, threshold a cell array instead
+        if 'threshold' not in merged:
+            threshold = vtkThreshold()
+            threshold.SetInputData(mesh)
+            threshold.SetInputArrayToProcess(
+                0, 0, 0, vtkDataObject.FIELD_ASSOCIATION_CELLS, 'data_visible'
+            )
+            threshold.SetLowerThreshold(1)
+            threshold.SetUpperThreshold(1)
+            threshold.SetThresholdFunction(vtkThreshold.THRESHOLD_BETWEEN)
+            surface = vtkGeometryFilter()
+            surface.SetInputConnection(threshold.GetOutputPort())
+            merged['threshold'] = surface
+        return merged['threshold']
@@ -0,0 +1,164 @@
+"""Assembly of many surfaces into one polydata without intermediate copies.
+
+Combining meshes with ``pv.MultiBlock(meshes).combine()`` appends them as an
+unstructured grid, copying the points, cells and every data array of each block and
+storing the cell types as well. Here the total size of the combined mesh is computed
+first, the point, connectivity and scalar buffers are allocated once and every
+surface is written into its slice of the buffers, with its face indices offset by the
+number of points before it. The buffers are then given to vtk by reference, so the
+combined mesh is a polydata whose arrays are the numpy buffers.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pyvista as pv
+from vtkmodules.util.numpy_support import numpy_to_vtkIdTypeArray, vtk_to_numpy
+from vtkmodules.vtkCommonCore import vtkIdTypeArray
+from vtkmodules.vtkCommonDataModel import vtkCellArray
+
+# numpy type of vtkIdType, the type of the connectivity and offsets of a vtkCellArray
+ID_TYPE = np.dtype(np.int64) if vtkIdTypeArray().GetDataTypeSize() == 8 else np.dtype(np.int32)
+
+
+def _common_arrays(arrays: Sequence[Dict[str, np.ndarray]]) -> List[str]:
+    """Names of the arrays present in every mesh, in the order of the first mesh"""
+    if len(arrays) == 0:
+        return []
+    return [name for name in arrays[0] if all(name in a for a in arrays[1:])]
+
+
+def assemble_polydata(
+    points: Sequence[np.ndarray],
+    connectivity: Sequence[np.ndarray],
+    offsets: Sequence[np.ndarray],
+    point_data: Optional[Sequence[Dict[str, np.ndarray]]] = None,
+    cell_data: Optional[Sequence[Dict[str, np.ndarray]]] = None,
+    active_scalars: Optional[str] = None,
+) -> pv.PolyData:
+    """Combine meshes given as numpy arrays into a single polydata of polygons
+
+    Parameters
+    ----------
+    points : Sequence[np.ndarray]
+        Nx3 points of each mesh
+    connectivity : Sequence[np.ndarray]
+        point indices of the polygons of each mesh, local to the mesh
+    offsets : Sequence[np.ndarray]
+        start of each polygon in the connectivity of each mesh, followed by the length
+        of the connectivity
+    point_data : Optional[Sequence[Dict[str, np.ndarray]]], optional
+        point arrays of each mesh, only arrays present in every mesh are kept,
+        by default None
+    cell_data : Optional[Sequence[Dict[str, np.ndarray]]], optional
+        cell arrays of each mesh, only arrays present in every mesh are kept,
+        by default None
+    active_scalars : Optional[str], optional
+        point array used as the active scalars, by default no array is active
+
+    Returns
+    -------
+    pv.PolyData
+        polydata sharing the buffers of the combined points, polygons and arrays
+    """
+    n_points = np.array([len(p) for p in points], dtype=int)
+    n_cells = np.array([len(o) - 1 for o in offsets], dtype=int)
+    n_connectivity = np.array([len(c) for c in connectivity], dtype=int)
+    point_start = np.concatenate([[0], np.cumsum(n_points)])
+    cell_start = np.concatenate([[0], np.cumsum(n_cells)])
+    connectivity_start = np.concatenate([[0], np.cumsum(n_connectivity)])
+
+    combined_points = np.empty((point_start[-1], 3), dtype=float)
+    combined_connectivity = np.empty(connectivity_start[-1], dtype=ID_TYPE)
+    combined_offsets = np.empty(cell_start[-1] + 1, dtype=ID_TYPE)
+    combined_offsets[-1] = connectivity_start[-1]
+    for i in range(len(points)):
+        combined_points[point_start[i] : point_start[i + 1]] = points[i]
+        np.add(
+            connectivity[i],
+            point_start[i],
+            out=combined_connectivity[connectivity_start[i] : connectivity_start[i + 1]],
+            casting='unsafe',
+        )
+        np.add(
+            offsets[i][:-1],
+            connectivity_start[i],
+            out=combined_offsets[cell_start[i] : cell_start[i + 1]],
+            casting='unsafe',
+        )
+
+    polys = vtkCellArray()
+    polys.SetData(
+        numpy_to_vtkIdTypeArray(combined_offsets, deep=False),
+        numpy_to_vtkIdTypeArray(combined_connectivity, deep=False),
+    )
+    mesh = pv.PolyData()
+    mesh.points = combined_points
+    mesh.SetPolys(polys)
+    for data, starts, target in (
+        (point_data, point_start, mesh.point_data),
+        (cell_data, cell_start, mesh.cell_data),
+    ):
+        if data is None:
+            continue
+        for name in _common_arrays(data):
+            first = np.asarray(data[0][name])
+            buffer = np.empty((starts[-1],) + first.shape[1:], dtype=first.dtype)
+            for i, arrays in enumerate(data):
+                buffer[starts[i] : starts[i + 1]] = arrays[name]
+            target[name] = buffer
+    # pyvista makes the first array added active
+    mesh.GetPointData().SetActiveScalars(None)
+    mesh.GetCellData().SetActiveScalars(None)
+    if active_scalars is not None and active_scalars in mesh.point_data:
+        mesh.set_active_scalars(active_scalars, preference='point')
+    return mesh
+
+
+def combine_surfaces(surfaces: Sequence) -> pv.PolyData:
+    """Combine LoopStructural surfaces into one polydata, see assemble_polydata.
+    The isovalue of each surface is stored in the 'values' point array, which is the
+    active scalars as in Surface.vtk().
+
+    Parameters
+    ----------
+    surfaces : Sequence[Surface]
+        surfaces with vertices, triangles and optionally values and properties
+
+    Returns
+    -------
+    pv.PolyData
+        the combined triangles
+    """
+    surfaces = [s for s in surfaces if len(s.triangles) > 0]
+    point_data = []
+    cell_data = []
+    for s in surfaces:
+        arrays = dict(s.properties or {})
+        if s.values is not None:
+            arrays['values'] = np.broadcast_to(s.values, len(s.vertices))
+        point_data.append(arrays)
+        cell_data.append(dict(s.cell_properties or {}))
+    return assemble_polydata(
+        [np.asarray(s.vertices) for s in surfaces],
+        [np.asarray(s.triangles).ravel() for s in surfaces],
+        [np.arange(0, 3 * len(s.triangles) + 1, 3) for s in surfaces],
+        point_data,
+        cell_data,
+        active_scalars='values',
+    )
+
+
+def combine_polydata(meshes: Sequence[pv.PolyData]) -> pv.PolyData:
+    """Combine the polygons of polydata into one polydata, see assemble_polydata.
+    The active point scalars of the first mesh are kept.
+    """
+    meshes = [m for m in meshes if m.n_points > 0]
+    return assemble_polydata(
+        [np.asarray(m.points) for m in meshes],
+        [vtk_to_numpy(m.GetPolys().GetConnectivityArray()) for m in meshes],
+        [vtk_to_numpy(m.GetPolys().GetOffsetsArray()) for m in meshes],
+        [{name: np.asarray(m.point_data[name]) for name in m.point_data.keys()} for m in meshes],
+        [{name: np.asarray(m.cell_data[name]) for name in m.cell_data.keys()} for m in meshes],
+        active_scalars=meshes[0].point_data.active_scalars_name if len(meshes) > 0 else None,
+    )
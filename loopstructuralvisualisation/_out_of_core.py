@@ -0,0 +1,369 @@
+"""Evaluation of block models slab by slab into memory-mapped files, with a json
+header recording the geometry and model version next to the file.
+"""
+
+import functools
+import json
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural import GeologicalModel
+from LoopStructural.utils import getLogger
+
+from ._cache import model_digest
+from ._compact import smallest_integer_dtype
+from ._memory import track_memory
+from ._progress import report_progress
+
+logger = getLogger(__name__)
+
+# number of cells evaluated at once, about 100 MB of double precision cell centres
+DEFAULT_SLAB_CELLS = 2**22
+
+
+def _header_path(filename: Union[str, Path]) -> Path:
+    return Path(f'{filename}.json')
+
+
+def block_model_header(model: GeologicalModel, nsteps: Optional[np.ndarray] = None) -> dict:
+    """Geometry, dtype and version of the block model of a model
+
+    Parameters
+    ----------
+    model : GeologicalModel
+        the geological model
+    nsteps : Optional[np.ndarray], optional
+        number of grid points along each axis, there is one cell less than points,
+        by default the nsteps of the bounding box of the model
+
+    Returns
+    -------
+    dict
+        'origin', 'spacing' and 'dimensions' of the cells, 'dtype' of the ids and the
+        'version' of the model, see model_digest
+    """
+    bounding_box = model.bounding_box
+    if nsteps is None:
+        nsteps = bounding_box.nsteps
+    nsteps = np.asarray(nsteps, dtype=int)
+    origin = np.asarray(bounding_box.origin, dtype=float)
+    maximum = np.asarray(bounding_box.maximum, dtype=float)
+    ids = [-1]
+    column = getattr(model, 'stratigraphic_column', None)
+    if column is not None:
+        ids += [int(row[0]) for row in column.get_stratigraphic_ids()]
+    return {
+        'origin': origin.tolist(),
+        'spacing': ((maximum - origin) / (nsteps - 1)).tolist(),
+        'dimensions': (nsteps - 1).tolist(),
+        'dtype': smallest_integer_dtype(np.array(ids)).str,
+        'version': model_digest(model),
+    }
+
+
+def _slab_centres(header: dict, start: int, stop: int) -> np.ndarray:
+    """Cell centres of the layers start:stop along z in Fortran order"""
+    origin = np.asarray(header['origin'])
+    spacing = np.asarray(header['spacing'])
+    dimensions = header['dimensions']
+    axes = [origin[i] + (np.arange(dimensions[i]) + 0.5) * spacing[i] for i in range(2)]
+    axes.append(origin[2] + (np.arange(start, stop) + 0.5) * spacing[2])
+    x, y, z = np.meshgrid(*axes, indexing='ij')
+    return np.column_stack([x.ravel(order='F'), y.ravel(order='F'), z.ravel(order='F')])
+
+
+def evaluate_block_model_to_memmap(
+    model: GeologicalModel,
+    filename: Union[str, Path],
+    nsteps: Optional[np.ndarray] = None,
+    slab_cells: int = DEFAULT_SLAB_CELLS,
+    progress: Optional[Callable[[float, str], None]] = None,
+) -> Tuple[np.memmap, dict]:
+    """Evaluate the block model of a model slab by slab into a memory-mapped file
+
+    Parameters
+    ----------
+    model : GeologicalModel
+        the geological model
+    filename : Union[str, Path]
+        file the unit ids are written to, a header is written to filename.json
+    nsteps : Optional[np.ndarray], optional
+        number of grid points along each axis, by default the nsteps of the bounding box
+    slab_cells : int, optional
+        maximum number of cells evaluated at once, at least one layer of cells is
+        evaluated at a time, by default 2**22
+    progress : Optional[Callable[[float, str], None]], optional
+        function called with the fraction of layers evaluated and a message,
+        by default None
+
+    Returns
+    -------
+    Tuple[np.memmap, dict]
+        read only memory-mapped unit ids of the cells in Fortran order and the header,
+        see block_model_header
+    """
+    header = block_model_header(model, nsteps)
+    dimensions = header['dimensions']
+    n_cells = int(np.prod(dimensions))
+    header_path = _header_path(filename)
+    if Path(filename).exists() and header_path.exists():
+        with open(header_path) as f:
+            current = json.load(f) == header
+        if current:
+            logger.info(f'Using the block model evaluated in {filename}')
+            return np.memmap(filename, dtype=header['dtype'], mode='r', shape=(n_cells,)), header
+    # remove the header first so an interrupted evaluation is never reused
+    header_path.unlink(missing_ok=True)
+    layer = dimensions[0] * dimensions[1]
+    layers_per_slab = max(1, slab_cells // layer)
+    ids = np.memmap(filename, dtype=header['dtype'], mode='w+', shape=(n_cells,))
+    for start in range(0, dimensions[2], layers_per_slab):
+        stop = min(start + layers_per_slab, dimensions[2])
+        values = model.evaluate_model(_slab_centres(header, start, stop), scale=True)
+        ids[start * layer : stop * layer] = values
+        if progress is not None:
+            progress(stop / dimensions[2], f'Evaluated {stop} of {dimensions[2]} layers')
+    ids.flush()
+    del ids
+    with open(header_path, 'w') as f:
+        json.dump(header, f)
+    return np.memmap(filename, dtype=header['dtype'], mode='r', shape=(n_cells,)), header
+
+
+def memmap_section(
+    ids: np.ndarray,
+    header: dict,
+    axis: int,
+    index: int,
+    name: str = 'stratigraphy',
+    slab_cells: int = DEFAULT_SLAB_CELLS,
+) -> pv.ImageData:
+    """A single layer of cells of the memory-mapped ids perpendicular to an axis.
+    A z section only reads its layer from the file. The cells of an x or y section are
+    spread through the whole file, which is read slab by slab along z so the memory
+    used is bounded by the size of a slab.
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        memory-mapped unit ids in Fortran order
+    header : dict
+        header of the ids, see block_model_header
+    axis : int
+        0, 1 or 2 for a layer perpendicular to x, y or z
+    index : int
+        index of the layer of cells along the axis
+    slab_cells : int, optional
+        maximum number of cells read at once for x and y sections, by default 2**22
+
+    Returns
+    -------
+    pv.ImageData
+        image one cell thick with a copy of the ids of the layer
+    """
+    dimensions = np.asarray(header['dimensions'])
+    index = int(np.clip(index, 0, dimensions[axis] - 1))
+    layer_cells = int(dimensions[0] * dimensions[1])
+    if axis == 2:
+        layer = np.array(ids[index * layer_cells : (index + 1) * layer_cells])
+    else:
+        layers_per_slab = max(1, slab_cells // layer_cells)
+        parts = []
+        for start in range(0, dimensions[2], layers_per_slab):
+            stop = min(start + layers_per_slab, dimensions[2])
+            slab = ids[start * layer_cells : stop * layer_cells]
+            slab = slab.reshape((dimensions[0], dimensions[1], stop - start), order='F')
+            parts.append(np.take(slab, [index], axis=axis))
+        layer = np.concatenate(parts, axis=2).ravel(order='F')
+    origin = np.asarray(header['origin'], dtype=float)
+    origin[axis] += index * header['spacing'][axis]
+    shape = dimensions.copy()
+    shape[axis] = 1
+    section = pv.ImageData(dimensions=shape + 1, spacing=header['spacing'], origin=origin)
+    section.cell_data[name] = layer
+    section.set_active_scalars(name, preference='cell')
+    return section
+
+
+def memmap_downsampled(
+    ids: np.ndarray, header: dict, max_cells: int = DEFAULT_SLAB_CELLS, name: str = 'stratigraphy'
+) -> pv.ImageData:
+    """The memory-mapped ids sampled on a coarser grid of at most max_cells cells
+    covering the same bounds. Only the sampled layers along z are read from the file.
+
+    Parameters
+    ----------
+    ids : np.ndarray
+        memory-mapped unit ids in Fortran order
+    header : dict
+        header of the ids, see block_model_header
+    max_cells : int, optional
+        maximum number of cells of the image, by default 2**22
+
+    Returns
+    -------
+    pv.ImageData
+        image with a copy of the sampled ids as cell data
+    """
+    dimensions = np.asarray(header['dimensions'])
+    stride = max(1.0, np.cbrt(np.prod(dimensions) / max_cells))
+    shape = np.maximum(np.floor(dimensions / stride).astype(int), 1)
+    # the cell of the full grid at the centre of each coarse cell
+    samples = [
+        np.minimum(((np.arange(n) + 0.5) * d / n).astype(int), d - 1)
+        for n, d in zip(shape, dimensions)
+    ]
+    layer_cells = int(dimensions[0] * dimensions[1])
+    sampled = np.empty(tuple(shape), dtype=ids.dtype, order='F')
+    for k, z in enumerate(samples[2]):
+        layer = ids[z * layer_cells : (z + 1) * layer_cells]
+        layer = layer.reshape((dimensions[0], dimensions[1]), order='F')
+        sampled[:, :, k] = layer[np.ix_(samples[0], samples[1])]
+    image = pv.ImageData(
+        dimensions=shape + 1,
+        spacing=np.asarray(header['spacing']) * dimensions / shape,
+        origin=header['origin'],
+    )
+    image.cell_data[name] = sampled.ravel(order='F')
+    image.set_active_scalars(name, preference='cell')
+    return image
+
+
+class OutOfCoreMixin:
+    """Block models of Loop3DView evaluated into memory-mapped files"""
+
+    @track_memory
+    def plot_block_model_out_of_core(
+        self,
+        filename: Union[str, Path],
+        model: Optional[GeologicalModel] = None,
+        nsteps: Optional[List[int]] = None,
+        slab_cells: int = DEFAULT_SLAB_CELLS,
+        max_cells: int = DEFAULT_SLAB_CELLS,
+        cmap=None,
+        slicer: bool = False,
+        opacity: Optional[float] = None,
+        pyvista_kwargs: dict = {},
+        show_scalar_bar: bool = False,
+        name: Optional[str] = None,
+        progress: Optional[Callable[[float, str], None]] = None,
+    ) -> pv.Actor:
+        """Plot a block model too large to evaluate in memory. The model is evaluated
+        slab by slab into a memory-mapped file and rendered from the file downsampled to
+        max_cells, see plot_block_model_section for sections at the full resolution.
+
+        Parameters
+        ----------
+        filename : Union[str, Path]
+            file the unit ids are stored in, a header is written to filename.json
+        model : GeologicalModel, optional
+            the model to pass if it is not the active geologicalmodel, by default None
+        nsteps : Optional[List[int]], optional
+            number of grid points along each axis, by default the nsteps of the
+            bounding box of the model
+        slab_cells : int, optional
+            maximum number of cells evaluated at once, by default 2**22
+        max_cells : int, optional
+            maximum number of cells rendered, by default 2**22
+        cmap : optional
+            matplotlib cmap string, by default the colours of the stratigraphic column
+        slicer : bool, optional
+            show a plane slicing widget instead of the outside of the block model,
+            by default False
+        opacity : Optional[float], optional
+            opacity of the block model, by default None
+        pyvista_kwargs : dict, optional
+            additional arguments to be passed to pyvista add_mesh, by default {}
+        show_scalar_bar : bool, optional
+            whether show/hide the scalar bar, by default False
+        name : Optional[str], optional
+            name of the block model, by default 'block_model'
+        progress : Optional[Callable[[float, str], None]], optional
+            function called with the fraction of the model evaluated and a message,
+            by default None
+
+        Returns
+        -------
+        pv.Actor
+            actor of the block model
+        """
+        model = self._check_model(model)
+        ids, header = evaluate_block_model_to_memmap(
+            model,
+            filename,
+            nsteps=nsteps,
+            slab_cells=slab_cells,
+            progress=lambda fraction, message: report_progress(progress, fraction, message),
+        )
+        image = functools.partial(memmap_downsampled, ids, header, max_cells)
+        if cmap is None:
+            cmap = self._build_stratigraphic_cmap(model)
+        name = self.increment_name(name if name is not None else 'block_model')
+        pyvista_kwargs = dict(pyvista_kwargs)
+        pyvista_kwargs.setdefault('clim', self._unit_id_range(model))
+        if opacity is not None:
+            pyvista_kwargs['opacity'] = opacity
+        if slicer:
+            actor = self.add_mesh_slice(
+                image(), cmap=cmap, name=name, group='model', **pyvista_kwargs
+            )
+        else:
+            actor = self.add_mesh(
+                image(), cmap=cmap, name=name, group='model', recipe=image, **pyvista_kwargs
+            )
+        self._out_of_core[name] = {'ids': ids, 'header': header, 'model': model, 'cmap': cmap}
+        if not show_scalar_bar:
+            self.remove_scalar_bar('stratigraphy')
+        return actor
+
+    def plot_block_model_section(
+        self,
+        axis: Union[str, int] = 'z',
+        coordinate: Optional[float] = None,
+        name: str = 'block_model',
+        pyvista_kwargs: dict = {},
+    ) -> pv.Actor:
+        """Add a section at the full resolution through a block model added by
+        plot_block_model_out_of_core
+
+        Parameters
+        ----------
+        axis : Union[str, int], optional
+            'x', 'y' or 'z' (or 0, 1, 2), the axis normal to the section, by default 'z'
+        coordinate : Optional[float], optional
+            position of the section along the axis, by default the centre of the model
+        name : str, optional
+            name of the out-of-core block model, by default 'block_model'
+        pyvista_kwargs : dict, optional
+            additional arguments to be passed to pyvista add_mesh, by default {}
+
+        Returns
+        -------
+        pv.Actor
+            actor of the section
+        """
+        if name not in self._out_of_core:
+            raise ValueError(f'{name} is not an out-of-core block model')
+        block_model = self._out_of_core[name]
+        header = block_model['header']
+        if isinstance(axis, str):
+            axis = 'xyz'.index(axis.lower())
+        if coordinate is None:
+            index = header['dimensions'][axis] // 2
+        else:
+            index = int((coordinate - header['origin'][axis]) // header['spacing'][axis])
+        section = functools.partial(memmap_section, block_model['ids'], header, axis, index)
+        pyvista_kwargs = dict(pyvista_kwargs)
+        pyvista_kwargs.setdefault('clim', self._unit_id_range(block_model['model']))
+        pyvista_kwargs.setdefault('show_scalar_bar', False)
+        return self.add_mesh(
+            section(),
+            cmap=block_model['cmap'],
+            name=self.increment_name(f'{name}_section'),
+            group='model',
+            recipe=section,
+            **pyvista_kwargs,
+        )
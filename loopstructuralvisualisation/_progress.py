@@ -0,0 +1,17 @@
+from typing import Callable, Optional
+
+from LoopStructural.utils import getLogger
+
+logger = getLogger(__name__)
+
+
+def report_progress(
+    progress: Optional[Callable[[float, str], None]], fraction: float, message: str
+):
+    """Call a progress callback, errors in the callback are logged and not raised"""
+    if progress is None:
+        return
+    try:
+        progress(fraction, message)
+    except Exception as e:
+        logger.error(f'Progress callback failed: {e}')
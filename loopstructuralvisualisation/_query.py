@@ -0,0 +1,290 @@
+"""Spatial indexes of the datasets shown in a viewer, regular grids are searched along
+their axes and other datasets with a kd-tree.
+"""
+
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyvista as pv
+from scipy.spatial import cKDTree
+
+from LoopStructural import GeologicalModel
+from LoopStructural.modelling.features import BaseFeature
+
+from ._memory import source_dataset
+
+
+class DatasetLocator:
+    def __init__(self, dataset: pv.DataSet, preference: str = 'point'):
+        """Index the points or cells of a dataset for nearest neighbour queries
+
+        Parameters
+        ----------
+        dataset : pv.DataSet
+            dataset to index
+        preference : str, optional
+            'point' to find the nearest point or 'cell' to find the cell containing or
+            nearest to the query, by default 'point'
+        """
+        self.dataset = dataset
+        self.preference = preference
+        self.mtime = dataset.GetMTime()
+        self._axes = None
+        self._tree = None
+        if isinstance(dataset, pv.RectilinearGrid):
+            self._axes = [np.asarray(a, dtype=float) for a in (dataset.x, dataset.y, dataset.z)]
+        elif isinstance(dataset, pv.ImageData):
+            dimensions = dataset.dimensions
+            self._axes = [
+                dataset.origin[i] + np.arange(dimensions[i]) * dataset.spacing[i] for i in range(3)
+            ]
+        elif preference == 'cell':
+            self._tree = cKDTree(np.asarray(dataset.cell_centers().points, dtype=float))
+        else:
+            self._tree = cKDTree(np.asarray(dataset.points, dtype=float))
+
+    def is_current(self, dataset: pv.DataSet) -> bool:
+        """Whether the locator still describes the dataset"""
+        return dataset is self.dataset and dataset.GetMTime() == self.mtime
+
+    def query(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the nearest point or cell of the dataset to each query point
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Nx3 array of query points
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            index of the point or cell and distance to it, the distance to a cell of a
+            regular grid is 0 inside the cell
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        if self._tree is not None:
+            distance, index = self._tree.query(points)
+            return index, distance
+        if self.preference == 'cell':
+            return self._query_cells(points)
+        return self._query_grid_points(points)
+
+    def _query_cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        index = np.zeros(points.shape[0], dtype=int)
+        outside = np.zeros(points.shape)
+        stride = 1
+        for i, axis in enumerate(self._axes):
+            n_cells = max(len(axis) - 1, 1)
+            cell = np.clip(np.searchsorted(axis, points[:, i], side='right') - 1, 0, n_cells - 1)
+            outside[:, i] = np.maximum(axis[0] - points[:, i], 0) + np.maximum(
+                points[:, i] - axis[-1], 0
+            )
+            index += cell * stride
+            stride *= n_cells
+        return index, np.linalg.norm(outside, axis=1)
+
+    def _query_grid_points(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        index = np.zeros(points.shape[0], dtype=int)
+        nearest = np.zeros(points.shape)
+        stride = 1
+        for i, axis in enumerate(self._axes):
+            if len(axis) == 1:
+                closest = np.zeros(points.shape[0], dtype=int)
+            else:
+                upper = np.clip(np.searchsorted(axis, points[:, i]), 1, len(axis) - 1)
+                lower = upper - 1
+                closest = np.where(
+                    np.abs(points[:, i] - axis[lower]) <= np.abs(axis[upper] - points[:, i]),
+                    lower,
+                    upper,
+                )
+            nearest[:, i] = axis[closest]
+            index += closest * stride
+            stride *= len(axis)
+        return index, np.linalg.norm(points - nearest, axis=1)
+
+
+def active_array(dataset: pv.DataSet) -> Tuple[Optional[str], Optional[str]]:
+    """Name and association ('point' or 'cell') of the array displayed for a dataset"""
+    for preference, data in (('point', dataset.point_data), ('cell', dataset.cell_data)):
+        if data.active_scalars_name is not None:
+            return data.active_scalars_name, preference
+    for preference, data in (('cell', dataset.cell_data), ('point', dataset.point_data)):
+        names = [n for n in data.keys() if n != 'vtkGhostType']
+        if len(names) > 0:
+            return names[0], preference
+    return None, None
+
+
+class QueryMixin:
+    """Picking and bulk point queries of the objects of Loop3DView"""
+
+    def _locator(self, name: str) -> Optional[DatasetLocator]:
+        """Spatial index of the dataset of an actor, rebuilt when the dataset changes"""
+        mesh = source_dataset(self._object_actor(name))
+        if mesh is None or mesh.n_points == 0:
+            return None
+        locator = self._locators.get(name)
+        if locator is None or not locator.is_current(mesh):
+            _array, preference = active_array(mesh)
+            locator = DatasetLocator(mesh, preference or 'point')
+            self._locators[name] = locator
+        return locator
+
+    def _query_units(self, model: GeologicalModel, points: np.ndarray) -> dict:
+        """Evaluate the stratigraphic unit of points with the model"""
+        ids = np.asarray(model.evaluate_model(points, scale=True)).astype(int)
+        column = {
+            int(row[0]): (row[2], row[1])
+            for row in model.stratigraphic_column.get_stratigraphic_ids()
+        }
+        return {
+            'unit_id': ids,
+            'unit': [column.get(i, (None, None))[0] for i in ids],
+            'unit_group': [column.get(i, (None, None))[1] for i in ids],
+        }
+
+    def query(
+        self,
+        points: np.ndarray,
+        names: Optional[List[str]] = None,
+        features: Optional[List[Union[str, BaseFeature]]] = None,
+        max_distance: Optional[float] = None,
+        model: Optional[GeologicalModel] = None,
+    ) -> pd.DataFrame:
+        """Find the object nearest to each point, the value of the object there and the
+        stratigraphic unit of the point
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Nx3 array of points, e.g. drillhole samples
+        names : Optional[List[str]], optional
+            names of the objects to query, by default all visible objects
+        features : Optional[List[Union[str, BaseFeature]]], optional
+            features (or feature names) to evaluate at the points, by default None
+        max_distance : Optional[float], optional
+            points further than this from every object are not assigned an object,
+            by default None
+        model : Optional[GeologicalModel], optional
+            model used for the stratigraphic units and feature names,
+            by default Loop3DView.model
+
+        Returns
+        -------
+        pd.DataFrame
+            one row per point with the columns X, Y, Z, object, group (the feature or fault
+            the object belongs to), distance, array, value, unit_id, unit and unit_group
+            and a column for each feature
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        n_points = points.shape[0]
+        if names is None:
+            actors = {n: self._object_actor(n) for n in self.objects}
+            names = [n for n, a in actors.items() if a is not None and a.GetVisibility()]
+        nearest = np.full(n_points, None, dtype=object)
+        array = np.full(n_points, None, dtype=object)
+        value = np.full(n_points, np.nan)
+        best = np.full(n_points, np.inf)
+        for name in names:
+            locator = self._locator(name)
+            if locator is None:
+                continue
+            index, distance = locator.query(points)
+            closer = distance < best
+            if not np.any(closer):
+                continue
+            best[closer] = distance[closer]
+            nearest[closer] = name
+            dataset = locator.dataset
+            array_name, preference = active_array(dataset)
+            values = None
+            if array_name is not None:
+                data = dataset.point_data if preference == 'point' else dataset.cell_data
+                values = np.asarray(data[array_name])
+            if values is not None and values.ndim == 1 and np.issubdtype(values.dtype, np.number):
+                array[closer] = array_name
+                value[closer] = values[index[closer]]
+            else:
+                array[closer] = None
+                value[closer] = np.nan
+        if max_distance is not None:
+            too_far = best > max_distance
+            nearest[too_far] = None
+            array[too_far] = None
+            value[too_far] = np.nan
+        result = pd.DataFrame(
+            {
+                'X': points[:, 0],
+                'Y': points[:, 1],
+                'Z': points[:, 2],
+                'object': nearest,
+                'group': [self.objects.get(n, {}).get('group') for n in nearest],
+                'distance': np.where(np.isfinite(best), best, np.nan),
+                'array': array,
+                'value': value,
+            }
+        )
+        if model is None:
+            model = self.model
+        if model is not None:
+            for column, values in self._query_units(model, points).items():
+                result[column] = values
+        for feature in features or []:
+            if isinstance(feature, str):
+                feature = self._check_model(model)[feature]
+            result[feature.name] = feature.evaluate_value(points)
+        return result
+
+    def pick(
+        self,
+        point: np.ndarray,
+        names: Optional[List[str]] = None,
+        features: Optional[List[Union[str, BaseFeature]]] = None,
+        model: Optional[GeologicalModel] = None,
+    ) -> dict:
+        """Query a single point, see query
+
+        Returns
+        -------
+        dict
+            the columns of query for the point
+        """
+        return self.query(point, names=names, features=features, model=model).iloc[0].to_dict()
+
+    def enable_query_picking(
+        self,
+        callback: Optional[Callable[[dict], None]] = None,
+        features: Optional[List[Union[str, BaseFeature]]] = None,
+        **kwargs,
+    ):
+        """Query the point under the cursor when it is picked, see pick.
+        By default the object, unit and values are shown as text in the viewer.
+
+        Parameters
+        ----------
+        callback : Optional[Callable[[dict], None]], optional
+            function called with the result of pick, by default None
+        features : Optional[List[Union[str, BaseFeature]]], optional
+            features to evaluate at the picked point, by default None
+        kwargs
+            passed to pyvista.Plotter.enable_point_picking
+        """
+
+        def show(result: dict):
+            lines = [f'{k}: {v}' for k, v in result.items() if k not in ('X', 'Y', 'Z')]
+            lines.insert(0, f"({result['X']:.1f}, {result['Y']:.1f}, {result['Z']:.1f})")
+            self.add_text('\n'.join(lines), position='lower_left', font_size=10, name='query')
+
+        if callback is None:
+            callback = show
+
+        def picked(point):
+            if point is None:
+                return
+            callback(self.pick(point, features=features))
+
+        kwargs.setdefault('show_message', False)
+        kwargs.setdefault('show_point', False)
+        self.enable_point_picking(callback=picked, **kwargs)
@@ -0,0 +1,175 @@
+from typing import List, Union
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural import GeologicalModel
+
+from ._cache import model_version
+from ._compact import smallest_integer_dtype
+from ._memory import track_memory
+
+
+class BlockModelRefinementMixin:
+    """Local refinement of a region of the block models of Loop3DView"""
+
+    def _evaluate_refinement(
+        self, model: GeologicalModel, cached: dict, lower: tuple, upper: tuple, factor: tuple
+    ) -> dict:
+        """Evaluate the model on a finer grid covering the parent cells lower:upper"""
+        parent = cached['grid']
+        axes = (parent.x, parent.y, parent.z)
+        origin = np.array([axes[i][lower[i]] for i in range(3)], dtype=float)
+        spacing = np.array(
+            [
+                (axes[i][upper[i]] - axes[i][lower[i]]) / ((upper[i] - lower[i]) * factor[i])
+                for i in range(3)
+            ]
+        )
+        dimensions = (np.array(upper) - np.array(lower)) * np.array(factor) + 1
+        grid = pv.ImageData(dimensions=dimensions, spacing=spacing, origin=origin)
+        stratigraphy = model.evaluate_model(grid.cell_centers().points, scale=True)
+        grid.cell_data['stratigraphy'] = stratigraphy
+        # index the units in the same way as the parent so they share the visibility
+        unit_index = np.asarray(stratigraphy, dtype=int) - cached['offset']
+        unit_index[(unit_index < 0) | (unit_index >= cached['n_units'])] = cached['n_units']
+        unit_index = unit_index.astype(smallest_integer_dtype(unit_index), copy=False)
+        return {'grid': grid, 'unit_index': unit_index}
+
+    @track_memory
+    def refine_block_model(
+        self,
+        bounds: List[float],
+        factor: Union[int, List[int]] = 4,
+        name: str = 'block_model',
+    ) -> pv.Actor:
+        """Evaluate the model at a finer resolution inside a region of a block model.
+        The refined grid replaces the cells of the block model it covers and any
+        previously refined region.
+
+        Parameters
+        ----------
+        bounds : List[float]
+            xmin, xmax, ymin, ymax, zmin, zmax of the region
+        factor : Union[int, List[int]], optional
+            number of refined cells along each axis of a block model cell, by default 4
+        name : str, optional
+            name of the block model, by default 'block_model'
+
+        Returns
+        -------
+        pv.Actor
+            actor of the refined grid
+        """
+        block_model = self._block_models.get(name)
+        if block_model is None:
+            raise ValueError(f'{name} is not a block model')
+        if block_model.get('volume', False):
+            raise ValueError('Only block models rendered as a grid can be refined')
+        if self.objects[name]['evicted']:
+            self._restore_object(name)
+        cached = block_model['cache']
+        model = block_model['model']
+        parent = cached['grid']
+        factor = tuple(np.broadcast_to(np.asarray(factor, dtype=int), (3,)))
+        lower = []
+        upper = []
+        for i, axis in enumerate((parent.x, parent.y, parent.z)):
+            n_cells = len(axis) - 1
+            low = np.searchsorted(axis, bounds[2 * i], side='right') - 1
+            low = int(np.clip(low, 0, n_cells - 1))
+            high = np.searchsorted(axis, bounds[2 * i + 1], side='left')
+            lower.append(low)
+            upper.append(int(np.clip(high, low + 1, n_cells)))
+        lower = tuple(lower)
+        upper = tuple(upper)
+        refined = self.cache.get(
+            ('block_model_refinement', model_version(model), lower, upper, factor),
+            lambda: self._evaluate_refinement(model, cached, lower, upper, factor),
+        )
+        self.clear_block_model_refinement(name, render=False)
+        # cells of the parent grid covered by the region, in vtk (x fastest) order
+        covered = np.zeros(tuple(len(a) - 1 for a in (parent.z, parent.y, parent.x)), dtype=bool)
+        covered[lower[2] : upper[2], lower[1] : upper[1], lower[0] : upper[0]] = True
+        block = refined['grid'].copy(deep=False)
+        refined_name = self.increment_name(f'{name}_refined')
+        actor = self._object_actor(name)
+        pyvista_kwargs = {'opacity': actor.prop.opacity}
+        if actor.mapper.lookup_table is not None:
+            pyvista_kwargs['cmap'] = actor.mapper.lookup_table
+        block_model['refinement'] = {
+            'name': refined_name,
+            'block': block,
+            'cache': refined,
+            'parent_cells': covered.ravel(),
+        }
+        self._apply_block_model_mask(block_model)
+        refined_actor = self.add_mesh(
+            block,
+            scalars='stratigraphy',
+            preference='cell',
+            name=refined_name,
+            group='model',
+            show_scalar_bar=False,
+            **pyvista_kwargs,
+        )
+        self._notify_object_callbacks('modified', name)
+        self._objects_modified()
+        return refined_actor
+
+    def clear_block_model_refinement(self, name: str = 'block_model', render: bool = True):
+        """Remove the refined region of a block model and show the block model cells again
+
+        Parameters
+        ----------
+        name : str, optional
+            name of the block model, by default 'block_model'
+        render : bool, optional
+            render the viewer after the refinement is removed, by default True
+        """
+        block_model = self._block_models.get(name)
+        if block_model is None or block_model.get('refinement') is None:
+            return
+        refinement = block_model.pop('refinement')
+        # pyvista.Plotter.remove_actor, the mixin is before it in the bases of Loop3DView
+        super().remove_actor(refinement['name'], render=False)
+        self._remove_object_record(refinement['name'])
+        self._notify_object_callbacks('removed', refinement['name'])
+        self._apply_block_model_mask(block_model)
+        self._notify_object_callbacks('modified', name)
+        if render:
+            self._objects_modified()
+
+    def add_block_model_refinement_widget(
+        self, factor: Union[int, List[int]] = 4, name: str = 'block_model'
+    ):
+        """Add a box widget selecting the region of a block model to refine,
+        see refine_block_model. The region is evaluated when the box is released.
+
+        Parameters
+        ----------
+        factor : Union[int, List[int]], optional
+            number of refined cells along each axis of a block model cell, by default 4
+        name : str, optional
+            name of the block model, by default 'block_model'
+
+        Returns
+        -------
+        vtkBoxWidget
+            the box widget
+        """
+        if name not in self._block_models:
+            raise ValueError(f'{name} is not a block model')
+        if self.objects[name]['evicted']:
+            self._restore_object(name)
+        bounds = np.array(self._block_models[name]['cache']['grid'].bounds).reshape(3, 2)
+        centre = bounds.mean(axis=1)
+        quarter = (bounds[:, 1] - bounds[:, 0]) / 4
+        initial = np.column_stack([centre - quarter, centre + quarter]).ravel()
+        return self.add_box_widget(
+            lambda box: self.refine_block_model(box.bounds, factor=factor, name=name),
+            bounds=initial,
+            factor=1.0,
+            rotation_enabled=False,
+            interaction_event='end',
+        )
@@ -0,0 +1,239 @@
+from typing import Callable, List, Optional
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural import GeologicalModel
+from LoopStructural.modelling.features.fault import FaultSegment
+from LoopStructural.utils import getLogger
+
+from ._animation import FrameEncoder
+from ._cache import feature_version
+from ._memory import source_dataset
+from ._progress import report_progress
+
+logger = getLogger(__name__)
+
+
+class FaultRestorationMixin:
+    """Fault restoration of the objects of Loop3DView by warping their vertices"""
+
+    def _warpable_mesh(self, name: str) -> Optional[pv.DataSet]:
+        """The dataset of an actor if its points are stored explicitly"""
+        mesh = source_dataset(self._object_actor(name))
+        if isinstance(mesh, (pv.PolyData, pv.UnstructuredGrid, pv.StructuredGrid)):
+            return mesh
+        return None
+
+    def _own_points(self, name: str, mesh: pv.DataSet) -> pv.DataSet:
+        """Show a shallow copy of the dataset of an object with a copy of its points"""
+        warped = mesh.copy(deep=False)
+        # new vtkPoints, setting warped.points would write into the shared vtkPoints
+        warped.SetPoints(pv.vtk_points(mesh.points, deep=True))
+        self._object_actor(name).mapper.dataset = warped
+        return warped
+
+    def _fault_restorations(
+        self,
+        names: Optional[List[str]] = None,
+        faults: Optional[List[FaultSegment]] = None,
+        model: Optional[GeologicalModel] = None,
+    ) -> dict:
+        """Evaluate the restoration displacement of the vertices of the objects, kept
+        until the faults or the dataset of the actor change
+        """
+        if faults is None:
+            model = self._check_model(model)
+            faults = model.faults
+        version = tuple(feature_version(f) for f in faults)
+        if names is None:
+            # objects belonging to the restored faults move with the fault, skip them
+            fault_groups = {'faults'} | {f.name for f in faults}
+            names = [n for n, o in self.objects.items() if o['group'] not in fault_groups]
+        restorations = {}
+        missing = []
+        for name in names:
+            mesh = self._warpable_mesh(name)
+            if mesh is None:
+                logger.debug(f'{name} does not have explicit points, it is not restored')
+                continue
+            restoration = self._restorations.get(name)
+            if (
+                restoration is not None
+                and restoration['mesh'] is mesh
+                and restoration['version'] == version
+            ):
+                restorations[name] = restoration
+                continue
+            if restoration is not None and restoration['mesh'] is mesh:
+                # start from the present day geometry if the faults changed
+                mesh.points[:] = restoration['points']
+            else:
+                # the dataset may share its points with the cache or other objects,
+                # warp a shallow copy with its own points
+                mesh = self._own_points(name, mesh)
+            missing.append((name, mesh))
+        if len(missing) == 0:
+            return restorations
+        points = np.vstack([np.asarray(mesh.points, dtype=float) for _, mesh in missing])
+        restored = points
+        for fault in faults:
+            restored = fault.apply_to_points(restored)
+        displacement = np.nan_to_num(restored - points)
+        start = 0
+        for name, mesh in missing:
+            end = start + mesh.n_points
+            self._restorations[name] = {
+                'mesh': mesh,
+                'version': version,
+                'points': np.array(mesh.points, copy=True),
+                'displacement': displacement[start:end].astype(mesh.points.dtype),
+            }
+            restorations[name] = self._restorations[name]
+            start = end
+        return restorations
+
+    def set_fault_restoration(
+        self,
+        fraction: float,
+        names: Optional[List[str]] = None,
+        faults: Optional[List[FaultSegment]] = None,
+        model: Optional[GeologicalModel] = None,
+    ):
+        """Move the vertices of the displayed objects part of the way to their position
+        before faulting. The displacement is evaluated once and the vertices are warped
+        in place.
+
+        Parameters
+        ----------
+        fraction : float
+            0 for the present day geometry and 1 for the restored geometry
+        names : Optional[List[str]], optional
+            names of the objects to restore, by default all objects with explicit points
+            except the objects of the faults
+        faults : Optional[List[FaultSegment]], optional
+            faults to restore in the order they are applied, by default model.faults
+        model : Optional[GeologicalModel], optional
+            model the faults belong to, by default Loop3DView.model
+        """
+        restorations = self._fault_restorations(names, faults, model)
+        for name, restoration in restorations.items():
+            mesh = restoration['mesh']
+            points = mesh.points
+            np.multiply(restoration['displacement'], fraction, out=points)
+            points += restoration['points']
+            mesh.GetPoints().Modified()
+            mesh.Modified()
+            self._notify_object_callbacks('modified', name)
+        self._objects_modified()
+
+    def add_fault_restoration_slider(
+        self,
+        names: Optional[List[str]] = None,
+        faults: Optional[List[FaultSegment]] = None,
+        model: Optional[GeologicalModel] = None,
+        pointa: tuple = (0.6, 0.9),
+        pointb: tuple = (0.95, 0.9),
+    ):
+        """Add a slider that moves the displayed objects between the present day and
+        restored geometry, see set_fault_restoration
+
+        Parameters
+        ----------
+        names : Optional[List[str]], optional
+            names of the objects to restore, by default all objects except the faults
+        faults : Optional[List[FaultSegment]], optional
+            faults to restore, by default model.faults
+        model : Optional[GeologicalModel], optional
+            model the faults belong to, by default Loop3DView.model
+        pointa : tuple, optional
+            start of the slider in normalised display coordinates, by default (0.6, 0.9)
+        pointb : tuple, optional
+            end of the slider in normalised display coordinates, by default (0.95, 0.9)
+
+        Returns
+        -------
+        vtkSliderWidget
+            the slider widget
+        """
+        # evaluate the displacement before the slider is used
+        self._fault_restorations(names, faults, model)
+        return self.add_slider_widget(
+            lambda value: self.set_fault_restoration(value, names, faults, model),
+            rng=[0.0, 1.0],
+            value=0.0,
+            title='Fault restoration',
+            pointa=pointa,
+            pointb=pointb,
+            interaction_event='always',
+        )
+
+    def animate_fault_restoration(
+        self,
+        filename: Optional[str] = None,
+        n_frames: int = 60,
+        names: Optional[List[str]] = None,
+        faults: Optional[List[FaultSegment]] = None,
+        model: Optional[GeologicalModel] = None,
+        bounce: bool = False,
+        fps: int = 24,
+        quality: int = 5,
+        parallel: bool = True,
+        progress: Optional[Callable[[float, str], None]] = None,
+    ) -> int:
+        """Animate the restoration of the faults, see set_fault_restoration. The frames
+        are rendered in the viewer or written to a movie or gif if a filename is given.
+
+        Parameters
+        ----------
+        filename : Optional[str], optional
+            file to write e.g. 'restoration.mp4', by default None
+        n_frames : int, optional
+            number of frames from 0 to 100% restoration, by default 60
+        names : Optional[List[str]], optional
+            names of the objects to restore, by default all objects except the faults
+        faults : Optional[List[FaultSegment]], optional
+            faults to restore in the order they are applied, by default model.faults
+        model : Optional[GeologicalModel], optional
+            model the faults belong to, by default Loop3DView.model
+        bounce : bool, optional
+            return to the present day geometry at the end of the animation,
+            by default False
+        fps : int, optional
+            frames per second of the file, by default 24
+        quality : int, optional
+            video quality from 0 to 10, by default 5
+        parallel : bool, optional
+            encode frames in a separate thread, by default True
+        progress : Optional[Callable[[float, str], None]], optional
+            function called with the fraction of frames rendered and a message, by default None
+
+        Returns
+        -------
+        int
+            number of frames rendered
+        """
+        fractions = np.linspace(0.0, 1.0, n_frames)
+        if bounce:
+            fractions = np.concatenate([fractions, fractions[-2::-1]])
+        self._fault_restorations(names, faults, model)
+        encoder = None
+        if filename is not None:
+            encoder = FrameEncoder(filename, fps=fps, quality=quality, parallel=parallel)
+        try:
+            for i, fraction in enumerate(fractions):
+                self.set_fault_restoration(fraction, names, faults, model)
+                if encoder is None:
+                    self.render()
+                else:
+                    encoder.write(self.screenshot(return_img=True))
+                report_progress(
+                    progress,
+                    (i + 1) / len(fractions),
+                    f'Rendered frame {i + 1} of {len(fractions)}',
+                )
+        finally:
+            if encoder is not None:
+                encoder.close()
+            self.set_fault_restoration(0.0, names, faults, model)
+        return len(fractions)
@@ -5,6 +5,8 @@ from matplotlib.patches import Polygon
 from matplotlib.collections import PatchCollection
 from LoopStructural.utils import rng
 
+from ._lookup_table import stratigraphic_lookup_table
+
 
 class StratigraphicColumnView:
     def __init__(self, model, ax=None, cmap=None, labels=None):
@@ -26,12 +28,14 @@ class StratigraphicColumnView:
 
         total_height = 0
         prev_coords = [0, 0]
+        ids = []  # stratigraphic id of each polygon
 
         # iterate through groups, skipping faults
 
         for g in reversed(self.model.stratigraphic_column.get_groups()):
             for u in g.units:
                 n_units += 1
+                ids.append(u.id)
 
                 ymax = total_height
                 ymin = ymax - (u.thickness)
@@ -52,25 +56,17 @@ class StratigraphicColumnView:
                     self.ax.annotate(u.name, xy)
 
         if self.cmap is None:
-            import matplotlib.colors as colors
-
-            colours = []
-            boundaries = []
-            data = []
-            for g in self.model.stratigraphic_column.get_groups():
-                if g == "faults":
-                    continue
-                for u in g.units:
-                    data.append((u.id, u.colour))
-                    colours.append(u.colour)
-                    boundaries.append(u.id)  # print(u,v)
-            cmap = colors.ListedColormap(colours)
+            # colour the units from the lookup table shared with the 2D and 3D views
+            lookup = stratigraphic_lookup_table(self.model)
+            p = PatchCollection(patches, cmap=lookup.cmap, norm=lookup.norm)
+            p.set_array(np.array(ids))
+            lookup.add_artist(p)
         else:
             cmap = cm.get_cmap(self.cmap, n_units - 1)
-        p = PatchCollection(patches, cmap=cmap)
+            p = PatchCollection(patches, cmap=cmap)
 
-        colors = np.arange(len(patches))
-        p.set_array(np.array(colors))
+            colors = np.arange(len(patches))
+            p.set_array(np.array(colors))
 
         self.ax.add_collection(p)
 
@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from typing import List, Optional, Union
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural.datatypes import BoundingBox
+from LoopStructural.modelling.features import StructuralFrame
+
+from ._cache import feature_version
+from ._memory import track_memory
+from ._mesh_assembly import combine_polydata
+
+
+class StructuralFrameMixin:
+    """Structural frame plots of Loop3DView"""
+
+    @track_memory
+    def plot_structural_frame(
+        self,
+        structural_frame: StructuralFrame,
+        value: Optional[Union[float, int, List[float]]] = None,
+        surfaces: bool = True,
+        slices: bool = False,
+        coordinates: List[int] = [0, 1, 2],
+        colours: List[str] = ['red', 'green', 'blue'],
+        cmaps: List[str] = ['Reds', 'Greens', 'Blues'],
+        opacity: Optional[float] = None,
+        parallel: bool = False,
+        pyvista_kwargs: dict = {},
+        name: Optional[str] = None,
+        bounding_box: Optional[BoundingBox] = None,
+    ) -> dict:
+        """Plot the isosurfaces and slices of the coordinates of a structural frame from
+        a single evaluation of all coordinates on one grid
+
+        Parameters
+        ----------
+        structural_frame : StructuralFrame
+            the structural frame to plot, e.g. a fault or fold frame
+        value : Optional[Union[float, int, List[float]]], optional
+            isosurface value, list of values or number of surfaces of each coordinate,
+            by default the average value of each coordinate
+        surfaces : bool, optional
+            whether to plot the isosurfaces, by default True
+        slices : bool, optional
+            whether to plot the coordinates on orthogonal slices through the centre of
+            the grid. The slices of every coordinate are in the same place so only the
+            first coordinate is shown, by default False
+        coordinates : List[int], optional
+            index of the coordinates to plot, by default [0, 1, 2]
+        colours : List[str], optional
+            colour of the isosurfaces of each coordinate, by default ['red', 'green', 'blue']
+        cmaps : List[str], optional
+            colourmap of the slices of each coordinate, by default ['Reds', 'Greens', 'Blues']
+        opacity : Optional[float], optional
+            opacity of the isosurfaces, by default None
+        parallel : bool, optional
+            evaluate the coordinates in separate threads, by default False
+        pyvista_kwargs : dict, optional
+            additional kwargs sent to add_mesh, by default {}
+        name : Optional[str], optional
+            prefix of the object names followed by the index of the coordinate, by
+            default the name of each coordinate
+        bounding_box : Optional[BoundingBox], optional
+            bounding box to evaluate the frame in, by default the model bounding box
+
+        Returns
+        -------
+        dict
+            actors added for each coordinate name with the keys 'surfaces' and 'slices'
+        """
+        grid = self._build_structural_frame(structural_frame, bounding_box, parallel)
+        actors = {}
+        for i in coordinates:
+            coordinate = structural_frame[i]
+            if coordinate is None:
+                continue
+            actors[coordinate.name] = {}
+            prefix = coordinate.name if name is None else f'{name}_{i}'
+            if surfaces:
+                surface = functools.partial(
+                    self._build_structural_frame_surface,
+                    structural_frame,
+                    i,
+                    value,
+                    bounding_box,
+                    parallel,
+                )
+                actors[coordinate.name]['surfaces'] = self._add_surface(
+                    surface(),
+                    coordinate,
+                    recipe=surface,
+                    colour=colours[i % len(colours)],
+                    opacity=opacity,
+                    pyvista_kwargs=pyvista_kwargs,
+                    name=f'{prefix}_surfaces',
+                )
+            if slices:
+                section = functools.partial(
+                    self._build_structural_frame_slices,
+                    structural_frame,
+                    i,
+                    bounding_box,
+                    parallel,
+                )
+                object_name = self.increment_name(f'{prefix}_slices')
+                actor = self.add_mesh(
+                    section(),
+                    cmap=cmaps[i % len(cmaps)],
+                    clim=grid.get_data_range(coordinate.name),
+                    name=object_name,
+                    group=coordinate.name,
+                    recipe=section,
+                    show_scalar_bar=False,
+                    **pyvista_kwargs,
+                )
+                actors[coordinate.name]['slices'] = actor
+                if i != coordinates[0]:
+                    self.set_object_visibility(object_name, False)
+        return actors
+
+    def _build_structural_frame(
+        self,
+        structural_frame: StructuralFrame,
+        bounding_box: Optional[BoundingBox] = None,
+        parallel: bool = False,
+    ) -> pv.RectilinearGrid:
+        """Evaluate every coordinate of a structural frame on one grid.
+        The points of the grid are built once and shared by the coordinates, the grid
+        is cached per frame version and bounding box.
+        """
+        bounding_box = self._structural_frame_bounding_box(structural_frame, bounding_box)
+        key = self._structural_frame_key(structural_frame, bounding_box)
+
+        def evaluate():
+            axes = [
+                np.linspace(bounding_box.origin[i], bounding_box.maximum[i], bounding_box.nsteps[i])
+                for i in range(3)
+            ]
+            grid = pv.RectilinearGrid(*axes)
+            points = grid.points
+            coordinates = [c for c in structural_frame.features if c is not None]
+            if parallel:
+                with ThreadPoolExecutor(max_workers=len(coordinates)) as executor:
+                    values = list(executor.map(lambda c: c.evaluate_value(points), coordinates))
+            else:
+                values = [c.evaluate_value(points) for c in coordinates]
+            for coordinate, value in zip(coordinates, values):
+                grid.point_data[coordinate.name] = value
+            return grid
+
+        return self.cache.get(key, evaluate)
+
+    def _structural_frame_bounding_box(
+        self, structural_frame: StructuralFrame, bounding_box: Optional[BoundingBox] = None
+    ) -> BoundingBox:
+        if bounding_box is not None:
+            return bounding_box
+        if structural_frame.model is None:
+            raise ValueError('Must specify bounding box')
+        return structural_frame.model.bounding_box
+
+    def _structural_frame_key(
+        self, structural_frame: StructuralFrame, bounding_box: BoundingBox
+    ) -> tuple:
+        """Cache key of the evaluated coordinates of a frame"""
+        return (
+            'structural_frame',
+            feature_version(structural_frame),
+            tuple(np.asarray(bounding_box.origin, dtype=float)),
+            tuple(np.asarray(bounding_box.maximum, dtype=float)),
+            tuple(np.asarray(bounding_box.nsteps, dtype=int)),
+        )
+
+    def _build_structural_frame_surface(
+        self,
+        structural_frame: StructuralFrame,
+        coordinate: int,
+        value: Optional[Union[float, int, List[float]]] = None,
+        bounding_box: Optional[BoundingBox] = None,
+        parallel: bool = False,
+    ) -> pv.DataSet:
+        """Contour the isosurfaces of one coordinate of the evaluated frame"""
+        grid = self._build_structural_frame(structural_frame, bounding_box, parallel)
+        return self._contour_scalar_field(grid, structural_frame[coordinate].name, value)
+
+    def _build_structural_frame_slices(
+        self,
+        structural_frame: StructuralFrame,
+        coordinate: int,
+        bounding_box: Optional[BoundingBox] = None,
+        parallel: bool = False,
+    ) -> pv.DataSet:
+        """Orthogonal slices through the centre of the evaluated frame coloured by one
+        coordinate. The slices are cached with the grid and shallow copied so every
+        coordinate shares the geometry.
+        """
+        grid = self._build_structural_frame(structural_frame, bounding_box, parallel)
+        bounding_box = self._structural_frame_bounding_box(structural_frame, bounding_box)
+        key = ('slices',) + self._structural_frame_key(structural_frame, bounding_box)
+        slices = self.cache.get(key, lambda: combine_polydata(grid.slice_orthogonal()))
+        slices = slices.copy(deep=False)
+        slices.set_active_scalars(structural_frame[coordinate].name, preference='point')
+        return slices
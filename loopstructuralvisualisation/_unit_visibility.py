@@ -0,0 +1,151 @@
+from typing import List, Optional, Union
+
+import numpy as np
+import pyvista as pv
+from vtkmodules.vtkCommonDataModel import vtkPiecewiseFunction
+
+from LoopStructural import GeologicalModel
+
+# value of vtkGhostType used to hide a cell, vtkDataSetAttributes.HIDDENCELL
+HIDDEN_CELL = 32
+
+
+class UnitVisibilityMixin:
+    """Show and hide the stratigraphic units of the block models of Loop3DView"""
+
+    def _unit_ids(self, model: GeologicalModel, units) -> List[int]:
+        """Convert unit names or ids to stratigraphic ids"""
+        if isinstance(units, (str, int, np.integer)):
+            units = [units]
+        names = {}
+        if any(isinstance(u, str) for u in units):
+            for row in model.stratigraphic_column.get_stratigraphic_ids():
+                names[row[2]] = row[0]
+        ids = []
+        for unit in units:
+            if isinstance(unit, str):
+                if unit not in names:
+                    raise ValueError(f'{unit} is not a unit in the stratigraphic column')
+                ids.append(int(names[unit]))
+            else:
+                ids.append(int(unit))
+        return ids
+
+    def set_unit_visibility(
+        self,
+        units: Union[str, int, List[Union[str, int]]],
+        visible: bool = True,
+        name: Optional[str] = None,
+    ):
+        """Show or hide stratigraphic units of a block model without evaluating the
+        model again
+
+        Parameters
+        ----------
+        units : Union[str, int, List[Union[str, int]]]
+            unit name or stratigraphic id, or a list of them
+        visible : bool, optional
+            whether to show or hide the units, by default True
+        name : Optional[str], optional
+            name of the block model, by default all block models
+        """
+        self._update_unit_visibility(name, units, visible)
+
+    def isolate_units(
+        self, units: Union[str, int, List[Union[str, int]]], name: Optional[str] = None
+    ):
+        """Only show the given stratigraphic units of a block model, see set_unit_visibility
+
+        Parameters
+        ----------
+        units : Union[str, int, List[Union[str, int]]]
+            unit name or stratigraphic id, or a list of them
+        name : Optional[str], optional
+            name of the block model, by default all block models
+        """
+        self._update_unit_visibility(name, units, True, reset=False)
+
+    def show_all_units(self, name: Optional[str] = None):
+        """Show all units of a block model, see set_unit_visibility
+
+        Parameters
+        ----------
+        name : Optional[str], optional
+            name of the block model, by default all block models
+        """
+        self._update_unit_visibility(name, [], True, reset=True)
+
+    def _update_unit_visibility(
+        self, name: Optional[str], units, visible: bool, reset: Optional[bool] = None
+    ):
+        """Change the visibility of units, reset sets the visibility of all units first"""
+        if name is None:
+            names = list(self._block_models)
+        elif name in self._block_models:
+            names = [name]
+        else:
+            raise ValueError(f'{name} is not a block model')
+        for n in names:
+            block_model = self._block_models[n]
+            cached = block_model['cache']
+            if reset is not None:
+                block_model['visible'][:] = reset
+            index = np.array(self._unit_ids(block_model['model'], units), dtype=int)
+            index = index - cached['offset']
+            index = index[(index >= 0) & (index < cached['n_units'])]
+            block_model['visible'][index] = visible
+            if block_model.get('volume', False):
+                self._apply_unit_opacity(self._object_actor(n), block_model)
+            else:
+                self._apply_block_model_mask(block_model)
+            self._notify_object_callbacks('modified', n)
+        self._objects_modified()
+
+    @staticmethod
+    def _apply_unit_opacity(actor: pv.Volume, block_model: dict):
+        """Make the hidden units of a volume rendered block model transparent by
+        replacing the scalar opacity transfer function with a step per unit
+        """
+        cached = block_model['cache']
+        function = vtkPiecewiseFunction()
+        for i, visible in enumerate(block_model['visible']):
+            unit = cached['offset'] + i
+            value = block_model['opacity'] if visible else 0.0
+            function.AddPoint(unit - 0.5, value)
+            function.AddPoint(unit + 0.499, value)
+        actor.prop.SetScalarOpacity(function)
+
+    @staticmethod
+    def _apply_unit_mask(
+        block: pv.DataSet,
+        cached: dict,
+        visible: np.ndarray,
+        hidden_cells: Optional[np.ndarray] = None,
+    ):
+        """Hide the cells of the units that are not visible using the ghost cell array,
+        cells of units only found in a refined region are visible
+        """
+        hidden = np.append(np.where(visible, 0, HIDDEN_CELL), 0).astype(np.uint8)
+        if 'vtkGhostType' not in block.cell_data:
+            block.cell_data['vtkGhostType'] = np.zeros(block.n_cells, dtype=np.uint8)
+        ghost = block.cell_data['vtkGhostType']
+        np.take(hidden, cached['unit_index'], out=ghost)
+        if hidden_cells is not None:
+            ghost[hidden_cells] = HIDDEN_CELL
+        block.cell_data.GetArray('vtkGhostType').Modified()
+        block.Modified()
+
+    def _apply_block_model_mask(self, block_model: dict):
+        """Hide the hidden units and the cells covered by a refined region of a block model"""
+        if block_model['block'] is None:
+            # released by the memory budget, the mask is applied when it is rebuilt
+            return
+        refinement = block_model.get('refinement')
+        self._apply_unit_mask(
+            block_model['block'],
+            block_model['cache'],
+            block_model['visible'],
+            None if refinement is None else refinement['parent_cells'],
+        )
+        if refinement is not None:
+            self._apply_unit_mask(refinement['block'], refinement['cache'], block_model['visible'])
@@ -1,6 +1,8 @@
 from pyvista.trame.ui import UI_TITLE
 from pyvista.trame.ui import get_viewer
 from .ui.vuetify3 import LoopViewer as Viewer
+from ._adaptive_quality import AdaptiveQuality
+from ._level_of_detail import LevelOfDetail
 from .. import Loop3DView
 
 
@@ -10,14 +12,39 @@ def initialize(
     mode=None,
     default_server_rendering=True,
     collapse_menu=False,
+    adaptive_quality=True,
+    level_of_detail=True,
     **kwargs,
 ):  # numpydoc ignore=PR01,RT01
-    """Generate the UI for a given plotter."""
+    """Generate the UI for a given plotter.
+
+    adaptive_quality can be True, False or an AdaptiveQuality object. When enabled
+    the server rendered views of a Loop3DView stream reduced resolution and jpeg
+    quality images and use a reduced level of detail for large actors while the
+    camera is moving, and render at full quality when the interaction ends.
+
+    level_of_detail can be True, False or a LevelOfDetail object. When enabled and the
+    scene is rendered in the browser, large surfaces are sent at a reduced resolution
+    chosen from their size on the screen.
+    """
     state = server.state
     state.trame__title = UI_TITLE
+    quality = None
+    lod = None
     if issubclass(type(plotter), Loop3DView):
         # only use the loopviewer if the plotter is a Loop3DView
         viewer = Viewer(plotter, server=server)
+        if adaptive_quality is True:
+            quality = AdaptiveQuality()
+        elif isinstance(adaptive_quality, AdaptiveQuality):
+            quality = adaptive_quality
+        if quality is not None and mode != "client":
+            for k, v in quality.view_kwargs().items():
+                kwargs.setdefault(k, v)
+        if level_of_detail is True:
+            lod = LevelOfDetail()
+        elif isinstance(level_of_detail, LevelOfDetail):
+            lod = level_of_detail
 
     else:
         # if pyvista use trame.ui.Viewer
@@ -36,5 +63,11 @@ def initialize(
         )
         if issubclass(type(plotter), Loop3DView):
             viewer.object_menu()
+    if quality is not None and mode != "client":
+        quality.attach(viewer)
+        viewer.adaptive_quality = quality
+    if lod is not None and mode != "server":
+        lod.attach(viewer)
+        viewer.level_of_detail = lod
 
     return viewer
@@ -0,0 +1,217 @@
+"""Adaptive interaction quality for server side rendering in trame.
+
+While the camera is being moved the remote view streams smaller, more compressed
+images and large actors are swapped for a reduced level of detail. The reduced
+meshes are built when the actors are added, not when the interaction starts. When
+the interaction ends the full resolution meshes are restored and a full quality
+frame is rendered.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pyvista as pv
+from vtkmodules.vtkFiltersCore import vtkQuadricClustering
+
+from LoopStructural.utils import getLogger
+
+from ._scene_sync import actor_dataset, scene_actors
+
+logger = getLogger(__name__)
+
+# vtkCommand event names
+_START_INTERACTION_EVENT = 'StartInteractionEvent'
+_END_INTERACTION_EVENT = 'EndInteractionEvent'
+
+
+def reduced_mesh(dataset: pv.DataSet, reduction: float) -> pv.PolyData:
+    """Build a reduced level of detail surface for a dataset.
+    The outer surface is extracted and clustered on a regular grid, cell data is
+    copied so categorical colouring (e.g. stratigraphy) is kept.
+
+    Parameters
+    ----------
+    dataset : pv.DataSet
+        the full resolution dataset
+    reduction : float
+        approximate fraction of cells to remove, between 0 and 1
+
+    Returns
+    -------
+    pv.PolyData
+        reduced surface
+    """
+    surface = dataset if isinstance(dataset, pv.PolyData) else dataset.extract_surface()
+    divisions = max(8, int(np.sqrt(surface.n_cells * (1.0 - reduction))))
+    clustering = vtkQuadricClustering()
+    clustering.SetInputData(surface)
+    clustering.SetNumberOfDivisions(divisions, divisions, divisions)
+    clustering.SetCopyCellData(True)
+    clustering.SetAutoAdjustNumberOfDivisions(True)
+    clustering.Update()
+    return pv.wrap(clustering.GetOutput())
+
+
+class AdaptiveQuality:
+    def __init__(
+        self,
+        interactive_ratio: float = 0.5,
+        interactive_quality: int = 50,
+        still_ratio: float = 1.0,
+        still_quality: int = 94,
+        lod_cell_threshold: Optional[int] = 500_000,
+        lod_reduction: float = 0.8,
+    ):
+        """Configuration of the image quality used by a remote view while the
+        user is interacting with the scene and when the scene is idle.
+
+        Parameters
+        ----------
+        interactive_ratio : float, optional
+            image size scale factor while interacting, by default 0.5
+        interactive_quality : int, optional
+            jpeg quality [0, 100] while interacting, by default 50
+        still_ratio : float, optional
+            image size scale factor when idle, by default 1.0
+        still_quality : int, optional
+            jpeg quality [0, 100] when idle, by default 94
+        lod_cell_threshold : Optional[int], optional
+            actors with more cells than this are rendered with a reduced level of
+            detail while interacting, None disables the level of detail,
+            by default 500000
+        lod_reduction : float, optional
+            fraction of cells removed for the interactive level of detail, by default 0.8
+        """
+        self.interactive_ratio = interactive_ratio
+        self.interactive_quality = interactive_quality
+        self.still_ratio = still_ratio
+        self.still_quality = still_quality
+        self.lod_cell_threshold = lod_cell_threshold
+        self.lod_reduction = lod_reduction
+        self.viewer = None
+        self.interacting = False
+        self._lod_cache = {}
+        self._swapped = {}
+        self._observers = []
+
+    def view_kwargs(self) -> dict:
+        """Keyword arguments for the trame remote view"""
+        return {
+            'interactive_ratio': self.interactive_ratio,
+            'interactive_quality': self.interactive_quality,
+            'still_ratio': self.still_ratio,
+            'still_quality': self.still_quality,
+        }
+
+    def attach(self, viewer):
+        """Observe the interactor of the viewer's plotter to switch the level
+        of detail at the start and end of an interaction, and the objects of a
+        Loop3DView to build the level of detail of large actors when they are added
+
+        Parameters
+        ----------
+        viewer : LoopViewer
+            the trame viewer
+        """
+        self.detach()
+        self.viewer = viewer
+        interactor = viewer.plotter.iren
+        if interactor is None or self.lod_cell_threshold is None:
+            return
+        self._observers = [
+            interactor.add_observer(_START_INTERACTION_EVENT, self.start_interaction),
+            interactor.add_observer(_END_INTERACTION_EVENT, self.end_interaction),
+        ]
+        if hasattr(viewer.plotter, 'add_object_callback'):
+            viewer.plotter.add_object_callback(self._on_object_change)
+        for name in scene_actors(viewer.plotter):
+            self.precompute(name)
+
+    def detach(self):
+        """Remove the interactor observers and restore any reduced actors"""
+        if self.viewer is not None:
+            if self.viewer.plotter.iren is not None:
+                for observer in self._observers:
+                    self.viewer.plotter.iren.remove_observer(observer)
+            if hasattr(self.viewer.plotter, 'remove_object_callback'):
+                self.viewer.plotter.remove_object_callback(self._on_object_change)
+            self._restore()
+        self._observers = []
+        self._lod_cache = {}
+
+    def _on_object_change(self, event: str, name: str):
+        """Called by Loop3DView, build the level of detail of added objects and drop
+        the level of detail of removed objects
+        """
+        if event == 'added':
+            self.precompute(name)
+        elif event == 'removed':
+            self._lod_cache.pop(name, None)
+
+    def _large_dataset(self, actor) -> Optional[pv.DataSet]:
+        """The dataset of an actor if it is large enough to use a level of detail"""
+        if type(actor) is not pv.Actor or self.lod_cell_threshold is None:
+            return None
+        dataset = actor_dataset(actor)
+        if dataset is None or dataset.n_cells < self.lod_cell_threshold:
+            return None
+        return dataset
+
+    def _cached_lod(self, name: str, dataset: pv.DataSet) -> Optional[pv.PolyData]:
+        cached = self._lod_cache.get(name)
+        if cached is not None and cached[0] == dataset.GetMTime():
+            return cached[1]
+        return None
+
+    def precompute(self, name: str):
+        """Build the level of detail of an actor if it is large and the level of detail
+        is missing or out of date
+        """
+        if self.viewer is None:
+            return
+        dataset = self._large_dataset(scene_actors(self.viewer.plotter).get(name))
+        if dataset is None or self._cached_lod(name, dataset) is not None:
+            return
+        self._lod_cache[name] = (dataset.GetMTime(), reduced_mesh(dataset, self.lod_reduction))
+
+    def start_interaction(self, *args):
+        """Swap large actors for their reduced level of detail. Actors whose level of
+        detail is not built yet are kept at full resolution, their level of detail is
+        built when the interaction ends.
+        """
+        if self.interacting:
+            return
+        self.interacting = True
+        for renderer in self.viewer.plotter.renderers:
+            for name, actor in renderer.actors.items():
+                dataset = self._large_dataset(actor)
+                if dataset is None or not actor.visibility:
+                    continue
+                lod = self._cached_lod(name, dataset)
+                if lod is None:
+                    continue
+                # keep the input connection so filters feeding the mapper (e.g. clip
+                # plane widgets) are reconnected when the interaction ends
+                connection = actor.mapper.GetInputConnection(0, 0)
+                self._swapped[name] = (renderer, connection.GetProducer(), connection.GetIndex())
+                actor.mapper.SetInputData(lod)
+
+    def end_interaction(self, *args):
+        """Restore the full resolution actors and render a full quality frame"""
+        self.interacting = False
+        if self.viewer is None:
+            return
+        if self._restore():
+            self.viewer.request_update()
+        for name in scene_actors(self.viewer.plotter):
+            self.precompute(name)
+
+    def _restore(self) -> bool:
+        restored = False
+        for name, (renderer, producer, index) in self._swapped.items():
+            actor = renderer.actors.get(name)
+            if actor is not None:
+                actor.mapper.SetInputConnection(producer.GetOutputPort(index))
+                restored = True
+        self._swapped = {}
+        return restored
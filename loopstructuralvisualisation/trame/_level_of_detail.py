@@ -0,0 +1,272 @@
+"""Screen space level of detail for surfaces rendered in the browser.
+
+With client side rendering every actor is serialised and sent to vtk.js at full
+resolution. :class:`LevelOfDetail` pre-generates a few decimated levels for each large
+surface and, like ``vtkLODProp3D``, picks the level from the size of the surface on
+the screen when the camera stops moving. The camera is moved in the browser, so the
+client sends its camera to the server when an interaction ends and the levels are
+chosen from that camera. The mapper is connected to the chosen level, so only that
+level is serialised and sent to the client. Decimation keeps the point data but not
+the cell data, so surfaces coloured by cell data are always sent at full resolution.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural.utils import getLogger
+
+from ._scene_sync import actor_dataset
+
+logger = getLogger(__name__)
+
+# vtkMapper scalar modes that colour by cell data, VTK_SCALAR_MODE_USE_CELL_DATA and
+# VTK_SCALAR_MODE_USE_CELL_FIELD_DATA
+_CELL_SCALAR_MODES = (2, 4)
+
+
+def projected_area(renderer, bounds: Sequence[float]) -> float:
+    """Area in pixels of the screen covered by the bounding box of an object
+
+    Parameters
+    ----------
+    renderer : pv.Renderer
+        renderer the object is shown in
+    bounds : Sequence[float]
+        xmin, xmax, ymin, ymax, zmin, zmax of the object
+
+    Returns
+    -------
+    float
+        area of the screen rectangle covered by the projected bounding box, clipped to
+        the viewport
+    """
+    width, height = renderer.GetSize()
+    if width == 0 or height == 0:
+        return 0.0
+    corners = np.array(np.meshgrid(bounds[0:2], bounds[2:4], bounds[4:6])).reshape(3, -1).T
+    matrix = renderer.GetActiveCamera().GetCompositeProjectionTransformMatrix(
+        renderer.GetTiledAspectRatio(), -1, 1
+    )
+    matrix = np.array([[matrix.GetElement(i, j) for j in range(4)] for i in range(4)])
+    projected = np.column_stack([corners, np.ones(len(corners))]) @ matrix.T
+    w = projected[:, 3]
+    if np.any(w <= 0):
+        # part of the object is behind the camera, treat it as filling the viewport
+        return float(width * height)
+    ndc = np.clip(projected[:, :2] / w[:, None], -1, 1)
+    extent = (ndc.max(axis=0) - ndc.min(axis=0)) / 2 * np.array([width, height])
+    return float(extent[0] * extent[1])
+
+
+def decimated_levels(surface: pv.PolyData, reductions: Sequence[float]) -> List[pv.PolyData]:
+    """Decimate a surface to each reduction, every level is decimated from the previous
+    one so the cost is dominated by the first level
+
+    Parameters
+    ----------
+    surface : pv.PolyData
+        full resolution surface
+    reductions : Sequence[float]
+        increasing fractions of the cells to remove
+
+    Returns
+    -------
+    List[pv.PolyData]
+        one surface for each reduction
+    """
+    level = surface if surface.is_all_triangles else surface.triangulate()
+    levels = []
+    previous = 0.0
+    for reduction in reductions:
+        level = level.decimate_pro(1.0 - (1.0 - reduction) / (1.0 - previous))
+        levels.append(level)
+        previous = reduction
+    return levels
+
+
+def apply_client_camera(renderer, camera: dict):
+    """Set the camera of a renderer from the camera of a vtk.js view
+
+    Parameters
+    ----------
+    renderer : pv.Renderer
+        renderer to update
+    camera : dict
+        'position', 'focalPoint', 'viewUp' and optionally 'viewAngle',
+        'parallelProjection' and 'parallelScale' as returned by getCamera() of the view
+    """
+    vtk_camera = renderer.GetActiveCamera()
+    vtk_camera.SetPosition(*camera['position'])
+    vtk_camera.SetFocalPoint(*camera['focalPoint'])
+    vtk_camera.SetViewUp(*camera['viewUp'])
+    if camera.get('viewAngle') is not None:
+        vtk_camera.SetViewAngle(camera['viewAngle'])
+    if camera.get('parallelProjection') is not None:
+        vtk_camera.SetParallelProjection(bool(camera['parallelProjection']))
+    if camera.get('parallelScale') is not None:
+        vtk_camera.SetParallelScale(camera['parallelScale'])
+    renderer.ResetCameraClippingRange()
+
+
+class LevelOfDetail:
+    def __init__(
+        self,
+        reductions: Sequence[float] = (0.5, 0.8, 0.95),
+        pixels_per_cell: float = 4.0,
+        min_cells: int = 50_000,
+    ):
+        """Configuration of the levels of detail used for surfaces sent to the client.
+
+        Parameters
+        ----------
+        reductions : Sequence[float], optional
+            fraction of the cells removed for each reduced level, by default
+            (0.5, 0.8, 0.95)
+        pixels_per_cell : float, optional
+            screen area in pixels for each cell, the coarsest level with at least the
+            projected area / pixels_per_cell cells is shown, by default 4.0
+        min_cells : int, optional
+            surfaces with fewer cells are always sent at full resolution,
+            by default 50000
+        """
+        self.reductions = tuple(sorted(reductions))
+        self.pixels_per_cell = pixels_per_cell
+        self.min_cells = min_cells
+        self.viewer = None
+        self._levels = {}
+        self._swapped = {}
+
+    def attach(self, viewer):
+        """Update the levels of detail of the viewer's plotter when an interaction in
+        the client ends, the viewer calls end_interaction with the client camera
+
+        Parameters
+        ----------
+        viewer : LoopViewer
+            the trame viewer
+        """
+        self.detach()
+        self.viewer = viewer
+
+    def detach(self):
+        """Show every surface at full resolution and forget the levels"""
+        self.reset()
+        self._levels = {}
+        self.viewer = None
+
+    def reset(self) -> bool:
+        """Show every surface at full resolution, return True if a level changed"""
+        changed = False
+        if self.viewer is not None:
+            for name, swapped in list(self._swapped.items()):
+                changed |= self._set_level(swapped['renderer'], name, 0)
+        return changed
+
+    def end_interaction(self, camera: Optional[dict] = None):
+        """Update the levels when the camera stops moving in the client
+
+        Parameters
+        ----------
+        camera : Optional[dict], optional
+            camera of the client view, see apply_client_camera. The browser reports
+            the camera of the view it last interacted with, which is applied to the
+            active view of the plotter, by default the camera of the plotter is used
+        """
+        if self.viewer is None:
+            return
+        if camera is not None:
+            apply_client_camera(self.viewer.plotter.renderer, camera)
+        if getattr(self.viewer, 'client_rendering', True) and self.update():
+            self.viewer.request_update()
+
+    def levels(self, name: str, dataset: pv.DataSet) -> List[pv.DataSet]:
+        """The full resolution dataset and its reduced levels, generated once for each
+        version of the dataset
+        """
+        cached = self._levels.get(name)
+        version = (dataset.memory_address, dataset.GetMTime())
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        levels = [dataset] + decimated_levels(dataset, self.reductions)
+        logger.debug(f'Levels of detail of {name}: {[level.n_cells for level in levels]}')
+        self._levels[name] = (version, levels)
+        return levels
+
+    def select_level(self, levels: List[pv.DataSet], area: float) -> int:
+        """Index of the coarsest level with enough cells for the projected area"""
+        needed = area / self.pixels_per_cell
+        selected = 0
+        for i, level in enumerate(levels):
+            if level.n_cells >= needed:
+                selected = i
+        return selected
+
+    def _full_dataset(self, name: str, actor: pv.Actor) -> Optional[pv.DataSet]:
+        if name in self._swapped:
+            return self._swapped[name]['dataset']
+        return actor_dataset(actor)
+
+    def _set_level(self, renderer, name: str, index: int) -> bool:
+        """Connect the mapper of an actor of a renderer to a level, return True if
+        it changed
+        """
+        actor = renderer.actors.get(name)
+        if actor is None:
+            self._swapped.pop(name, None)
+            return False
+        if index == 0:
+            if name not in self._swapped:
+                return False
+            swapped = self._swapped.pop(name)
+            actor.mapper.SetInputConnection(swapped['producer'].GetOutputPort(swapped['port']))
+            return True
+        if name in self._swapped and self._swapped[name]['index'] == index:
+            return False
+        dataset = self._full_dataset(name, actor)
+        if name not in self._swapped:
+            # keep the input connection so filters feeding the mapper are reconnected
+            connection = actor.mapper.GetInputConnection(0, 0)
+            self._swapped[name] = {
+                'renderer': renderer,
+                'producer': connection.GetProducer(),
+                'port': connection.GetIndex(),
+                'dataset': dataset,
+            }
+        self._swapped[name]['index'] = index
+        actor.mapper.SetInputData(self._levels[name][1][index])
+        return True
+
+    def update(self) -> bool:
+        """Choose the level of every large surface from its size on the screen
+
+        Returns
+        -------
+        bool
+            whether the level of any surface changed
+        """
+        if self.viewer is None:
+            return False
+        plotter = self.viewer.plotter
+        changed = False
+        for renderer in plotter.renderers:
+            for name, actor in renderer.actors.items():
+                if type(actor) is not pv.Actor:
+                    continue
+                dataset = self._full_dataset(name, actor)
+                if (
+                    not isinstance(dataset, pv.PolyData)
+                    or dataset.n_cells < self.min_cells
+                    or actor.mapper.GetScalarMode() in _CELL_SCALAR_MODES
+                ):
+                    changed |= self._set_level(renderer, name, 0)
+                    continue
+                levels = self.levels(name, dataset)
+                index = 0
+                if actor.visibility:
+                    index = self.select_level(levels, projected_area(renderer, dataset.bounds))
+                changed |= self._set_level(renderer, name, index)
+        if changed:
+            logger.debug(f'Surfaces shown with a reduced level of detail {list(self._swapped)}')
+        return changed
@@ -0,0 +1,295 @@
+"""Delta synchronisation of a plotter scene with a client side (vtk.js) renderer.
+
+The trame local view serialises the render window every time it is updated. The
+:class:`SceneSynchroniser` keeps a digest of the geometry and rendering properties
+of every actor and volume so that the viewer only pushes the scene when something has
+actually changed, and so that only the actors that changed are reported. The geometry
+can be sent in single precision, the mappers are connected to single precision copies
+of the datasets while the scene is serialised so the datasets are never modified.
+"""
+
+from contextlib import contextmanager
+import hashlib
+from typing import Optional, Tuple
+
+import numpy as np
+import pyvista as pv
+
+from LoopStructural.utils import getLogger
+
+logger = getLogger(__name__)
+
+# datasets where the points are stored explicitly, implicit grids only store
+# origin/spacing or the axis coordinates
+_EXPLICIT_POINTS = (pv.PolyData, pv.UnstructuredGrid, pv.StructuredGrid)
+
+
+def actor_dataset(actor: pv.Prop3D) -> Optional[pv.DataSet]:
+    """Get the dataset rendered by an actor or volume, None if there is no input"""
+    mapper = actor.mapper
+    if mapper is None:
+        return None
+    # filters feeding the mapper (e.g. selecting the active scalars) only update
+    # when the scene is rendered
+    algorithm = mapper.GetInputAlgorithm()
+    if algorithm is not None:
+        algorithm.Update()
+    dataset = mapper.GetInputDataObject(0, 0)
+    if dataset is None or not dataset.IsA('vtkDataSet'):
+        return None
+    return pv.wrap(dataset)
+
+
+def scene_actors(plotter: pv.Plotter) -> dict:
+    """Actors of every view of a plotter by name, Plotter.actors only holds the active view"""
+    actors = {}
+    for renderer in plotter.renderers:
+        for name, actor in renderer.actors.items():
+            actors.setdefault(name, actor)
+    return actors
+
+
+def quantize_dataset(dataset: pv.DataSet) -> Tuple[Optional[pv.DataSet], int]:
+    """Copy a dataset with its float64 points and data arrays cast to float32.
+
+    vtk.js renders in single precision so this does not change what is displayed
+    but halves the size of the arrays that are sent to the client. The copy is
+    shallow, it shares the arrays that are not cast with the dataset, which is not
+    modified.
+
+    Parameters
+    ----------
+    dataset : pv.DataSet
+        dataset to quantize
+
+    Returns
+    -------
+    Tuple[Optional[pv.DataSet], int]
+        the quantized copy, None if the dataset has no float64 arrays, and the number
+        of bytes saved
+    """
+    saved = 0
+    quantized = dataset.copy(deep=False)
+    if isinstance(dataset, _EXPLICIT_POINTS) and dataset.points.dtype == np.float64:
+        saved += dataset.points.nbytes // 2
+        # new vtkPoints, setting quantized.points would write into the shared vtkPoints
+        quantized.SetPoints(pv.vtk_points(dataset.points.astype(np.float32), deep=True))
+    for data in (quantized.point_data, quantized.cell_data):
+        active = data.active_scalars_name
+        for name in list(data.keys()):
+            array = data[name]
+            if array.dtype != np.float64:
+                continue
+            saved += array.nbytes // 2
+            data[name] = array.astype(np.float32)
+        if active is not None:
+            data.active_scalars_name = active
+    if saved == 0:
+        return None, 0
+    return quantized, saved
+
+
+def _hash_array(digest, array):
+    array = np.ascontiguousarray(array)
+    digest.update(str(array.dtype).encode())
+    digest.update(str(array.shape).encode())
+    digest.update(array.data)
+
+
+def geometry_digest(dataset: Optional[pv.DataSet]) -> str:
+    """Hash the geometry, topology and data arrays of a dataset"""
+    digest = hashlib.blake2b(digest_size=16)
+    if dataset is None:
+        return digest.hexdigest()
+    digest.update(type(dataset).__name__.encode())
+    if isinstance(dataset, pv.ImageData):
+        digest.update(np.array([*dataset.dimensions, *dataset.origin, *dataset.spacing]).tobytes())
+    elif isinstance(dataset, pv.RectilinearGrid):
+        for axis in (dataset.x, dataset.y, dataset.z):
+            _hash_array(digest, axis)
+    else:
+        _hash_array(digest, dataset.points)
+    if isinstance(dataset, pv.PolyData):
+        for cells in (dataset.verts, dataset.lines, dataset.faces, dataset.strips):
+            _hash_array(digest, cells)
+    elif isinstance(dataset, pv.UnstructuredGrid):
+        _hash_array(digest, dataset.cells)
+        _hash_array(digest, dataset.celltypes)
+    for data in (dataset.point_data, dataset.cell_data):
+        for name in data.keys():
+            digest.update(name.encode())
+            _hash_array(digest, data[name])
+    return digest.hexdigest()
+
+
+def _transfer_function_nodes(function) -> list:
+    """The nodes of a colour transfer function or piecewise function"""
+    if function is None:
+        return []
+    size = 6 if function.IsA('vtkColorTransferFunction') else 4
+    nodes = []
+    for i in range(function.GetSize()):
+        node = [0.0] * size
+        function.GetNodeValue(i, node)
+        nodes.append(tuple(node))
+    return nodes
+
+
+def volume_property_digest(volume: pv.Volume) -> str:
+    """Hash the rendering properties and transfer functions of a volume"""
+    prop = volume.prop
+    mapper = volume.mapper
+    values = [
+        volume.GetVisibility(),
+        prop.interpolation_type,
+        prop.shade,
+        prop.opacity_unit_distance,
+        prop.independent_components,
+        _transfer_function_nodes(prop.GetRGBTransferFunction(0)),
+        _transfer_function_nodes(prop.GetScalarOpacity(0)),
+        _transfer_function_nodes(prop.GetGradientOpacity(0)),
+    ]
+    if mapper is not None:
+        values += [mapper.GetArrayName(), mapper.GetBlendMode()]
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
+def property_digest(actor: pv.Actor) -> str:
+    """Hash the rendering properties of an actor, see volume_property_digest for volumes"""
+    if isinstance(actor, pv.Volume):
+        return volume_property_digest(actor)
+    prop = actor.prop
+    mapper = actor.mapper
+    values = [
+        actor.visibility,
+        prop.opacity,
+        prop.color,
+        prop.style,
+        prop.point_size,
+        prop.line_width,
+        prop.show_edges,
+    ]
+    if mapper is not None:
+        values += [
+            mapper.scalar_visibility,
+            mapper.GetArrayName(),
+            tuple(mapper.scalar_range),
+        ]
+        lut = mapper.GetLookupTable()
+        if lut is not None:
+            values.append(lut.GetMTime())
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
+class SceneSynchroniser:
+    def __init__(self, plotter: pv.Plotter, quantize: bool = True):
+        """Track the actors of a plotter to work out what needs to be sent to
+        a client side renderer.
+
+        VTK modification times are used as a cheap first check, the geometry
+        and property digests are only recomputed for actors whose modification
+        time changed. An actor is only reported as changed if one of its digests
+        changed.
+
+        Parameters
+        ----------
+        plotter : pv.Plotter
+            the plotter to synchronise
+        quantize : bool, optional
+            send float32 copies of float64 geometry, see quantized, by default True
+        """
+        self.plotter = plotter
+        self.quantize = quantize
+        self.bytes_sent = 0
+        self.bytes_skipped = 0
+        self.bytes_quantized = 0
+        self._records = {}
+
+    def reset(self):
+        """Forget what has been sent, the next call to changes reports every actor"""
+        self._records = {}
+
+    def changes(self) -> dict:
+        """Find the actors that were added, changed or removed since the last call
+
+        Returns
+        -------
+        dict
+            dictionary with lists of actor names for 'added', 'geometry', 'properties'
+            and 'removed'
+        """
+        delta = {'added': [], 'geometry': [], 'properties': [], 'removed': []}
+        records = {}
+        for name, actor in scene_actors(self.plotter).items():
+            if type(actor) not in (pv.Actor, pv.Volume):
+                continue
+            dataset = actor_dataset(actor)
+            record = self._records.get(name)
+            data_mtime = dataset.GetMTime() if dataset is not None else 0
+            mtime = (actor.GetMTime(), actor.prop.GetMTime(), data_mtime)
+            if record is not None and record['mtime'] == mtime:
+                records[name] = record
+                self.bytes_skipped += record['nbytes']
+                continue
+            geometry_changed = record is None or record['mtime'][2] != data_mtime
+            if not geometry_changed:
+                quantized = record['quantized']
+            elif dataset is not None and self.quantize:
+                quantized, saved = quantize_dataset(dataset)
+                self.bytes_quantized += saved
+            else:
+                quantized = None
+            new = {
+                'mtime': mtime,
+                'geometry': geometry_digest(dataset) if geometry_changed else record['geometry'],
+                'properties': property_digest(actor),
+                'nbytes': dataset.actual_memory_size * 1024 if dataset is not None else 0,
+                'quantized': quantized,
+            }
+            records[name] = new
+            if record is None:
+                delta['added'].append(name)
+                self.bytes_sent += new['nbytes']
+            elif new['geometry'] != record['geometry']:
+                delta['geometry'].append(name)
+                self.bytes_sent += new['nbytes']
+            else:
+                self.bytes_skipped += new['nbytes']
+                if new['properties'] != record['properties']:
+                    delta['properties'].append(name)
+        delta['removed'] = [name for name in self._records if name not in records]
+        self._records = records
+        if any(delta.values()):
+            logger.debug(f'Scene delta {delta}')
+        return delta
+
+    @contextmanager
+    def quantized(self):
+        """Context manager connecting the mappers to the single precision copies of
+        their datasets made by changes, use it while the scene is serialised. The
+        mappers are connected to their inputs again when the context exits.
+        """
+        swapped = []
+        for name, actor in scene_actors(self.plotter).items():
+            record = self._records.get(name)
+            if record is None or record['quantized'] is None:
+                continue
+            connection = actor.mapper.GetInputConnection(0, 0)
+            if connection is None:
+                continue
+            swapped.append((actor, connection.GetProducer(), connection.GetIndex()))
+            actor.mapper.SetInputData(record['quantized'])
+        try:
+            yield self
+        finally:
+            for actor, producer, index in swapped:
+                actor.mapper.SetInputConnection(producer.GetOutputPort(index))
+
+    @property
+    def stats(self) -> dict:
+        """Bytes of geometry sent, skipped because unchanged and removed by quantization"""
+        return {
+            'sent': self.bytes_sent,
+            'skipped': self.bytes_skipped,
+            'quantized': self.bytes_quantized,
+        }
@@ -8,6 +8,9 @@ Therefore, the `ui` method implemented by this class utilizes the API of Vuetify
 
 from __future__ import annotations
 
+import asyncio
+from contextlib import contextmanager
+import time
 from typing import TYPE_CHECKING
 
 from trame.ui.vuetify3 import SinglePageWithDrawerLayout
@@ -16,94 +19,530 @@ from trame.widgets import vuetify3 as vuetify
 import pyvista
 from pyvista.trame.ui.vuetify3 import Viewer
 
+from LoopStructural.utils import getLogger
+
+from .._scene_sync import SceneSynchroniser, scene_actors
+
+logger = getLogger(__name__)
+
 
 if TYPE_CHECKING:  # pragma: no cover
     from trame_client.ui.core import AbstractLayout
 
 
 class LoopViewer(Viewer):
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self, *args, render_delay=0.05, slider_interval=0.1, quantize_client=True, **kwargs
+    ):
         """Overwrite the pyvista trame layout to use a singlepage layout
         and add an object visibility menu to the drawer
+
+        State changes from the object menu do not render directly, they request
+        a render which is coalesced with any other request made within
+        ``render_delay`` seconds. Slider driven changes are additionally throttled
+        so that at most one render is streamed every ``slider_interval`` seconds.
+
+        Parameters
+        ----------
+        render_delay : float, optional
+            window in seconds used to coalesce render requests, by default 0.05
+        slider_interval : float, optional
+            minimum time in seconds between renders triggered by sliders, by default 0.1
+        quantize_client : bool, optional
+            send float32 copies of float64 geometry to a client side renderer,
+            by default True
         """
         super().__init__(*args, **kwargs)
+        self.render_delay = render_delay
+        self.slider_interval = slider_interval
+        self.render_count = 0
+        self.render_requests = 0
+        self._render_handle = None
+        self._last_render = 0.0
+        self._batch_depth = 0
+        self._batch_pending = False
+        # changes made by the viewer request their own render
+        self._changing_objects = 0
+        self._mode = None
+        self.skipped_count = 0
+        self.scene_sync = SceneSynchroniser(self.plotter, quantize=quantize_client)
+        # LevelOfDetail choosing the resolution of surfaces sent to the client
+        self.level_of_detail = None
+
+        # object menu state variable names
+        self.OBJECTS = f'{self.plotter._id_name}_loop_objects'
+        self.OBJECT_FILTER = f'{self.plotter._id_name}_loop_object_filter'
+        self.OBJECT_GROUP = f'{self.plotter._id_name}_loop_object_group'
+        self.OBJECT_CONTROLS = f'{self.plotter._id_name}_loop_object_controls'
+        # opacity of the object whose controls are open, kept out of the rows so a
+        # slider does not send the whole menu
+        self.OBJECT_OPACITY = f'{self.plotter._id_name}_loop_object_opacity'
+        # prefix of the state keys holding the visibility of each row, so a checkbox
+        # only sends its own key
+        self.OBJECT_VISIBLE = f'{self.plotter._id_name}_loop_object_visible'
+        self._row_keys = {}
+        self.server.state[self.OBJECTS] = []
+        self.server.state[self.OBJECT_FILTER] = ''
+        self.server.state[self.OBJECT_GROUP] = True
+        self.server.state[self.OBJECT_CONTROLS] = None
+        self.server.state[self.OBJECT_OPACITY] = 1.0
+
+        # progress of plots running in the background
+        self.PROGRESS = f'{self.plotter._id_name}_loop_progress'
+        self.PROGRESS_MESSAGE = f'{self.plotter._id_name}_loop_progress_message'
+        self.server.state[self.PROGRESS] = None
+        self.server.state[self.PROGRESS_MESSAGE] = ''
+        self._plot_tasks = set()
 
     def make_layout(self, *args, **kwargs) -> AbstractLayout:
 
         return SinglePageWithDrawerLayout(*args, **kwargs)
 
     def ui(self, *args, **kwargs):
+        self._mode = kwargs.get('mode', None)
+        if self._mode is None:
+            self._mode = self.plotter._theme.trame.default_mode
+        if self._mode != 'server':
+            # send the camera of the browser to the server when an interaction ends
+            ref = f'view_{self.plotter._id_name}'
+            kwargs.setdefault(
+                'EndAnimation', (self.on_client_camera, f"[trame.refs['{ref}'].getCamera()]")
+            )
         with self.layout as layout:
             layout.title.set_text("LoopStructural Viewer")
         with self.layout.content:
 
             return super().ui(*args, **kwargs)
 
-    def toggle_visibility(self, **kwargs):
-        """Toggle the visibility of an object in the plotter.
-        this is a slot called by the state change, the kwargs are the current state
-        so we need to check the keys and update accordingly
-        """
-        for k in kwargs.keys():
-            object_name = k.split("__visibility")[0]
-            if object_name in self.plotter.actors:
-                self.plotter.actors[object_name].visibility = kwargs[k]
+    @property
+    def client_rendering(self) -> bool:
+        """Whether the scene is currently rendered by vtk.js in the browser"""
+        if self._mode == 'client':
+            return True
+        if self._mode == 'trame':
+            return not self.server.state[self.SERVER_RENDERING]
+        return False
+
+    def on_client_camera(self, camera: dict):
+        """Called with the camera of the browser when an interaction in a client side
+        view ends, the levels of detail are chosen from this camera
+        """
+        if self.level_of_detail is not None:
+            self.level_of_detail.end_interaction(camera)
+
+    def on_rendering_mode_change(self, **kwargs):
+        # the client needs the full scene after switching rendering mode
+        self.scene_sync.reset()
+        if self.level_of_detail is not None and not self.client_rendering:
+            self.level_of_detail.reset()
+        return super().on_rendering_mode_change(**kwargs)
+
+    def update(self, **kwargs):
+        """Render and push all views, counting every render that is streamed.
+        When rendering on the client the scene is only pushed if an actor was
+        added, removed or changed.
+        """
+        if self._render_handle is not None:
+            self._render_handle.cancel()
+            self._render_handle = None
+        if self.client_rendering:
+            if self.level_of_detail is not None:
+                self.level_of_detail.update()
+            delta = self.scene_sync.changes()
+            if not any(delta.values()):
+                self.skipped_count += 1
+                return
+        self.render_count += 1
+        self._last_render = time.monotonic()
+        if self.client_rendering:
+            # serialise single precision copies of the datasets
+            with self.scene_sync.quantized():
+                super().update(**kwargs)
+            return
+        super().update(**kwargs)
+
+    @property
+    def render_stats(self) -> dict:
+        """Number of render requests and the number of renders actually performed"""
+        return {
+            'requests': self.render_requests,
+            'renders': self.render_count,
+            'saved': max(self.render_requests - self.render_count, 0),
+            'skipped': self.skipped_count,
+            'bytes': self.scene_sync.stats,
+        }
+
+    def request_update(self, throttle: bool = False):
+        """Request a render of the views.
+
+        Requests made within ``render_delay`` of each other are merged into a single
+        render. If throttle is True the render is also delayed until ``slider_interval``
+        has passed since the previous render. Without a running event loop the views
+        are updated immediately.
+
+        Parameters
+        ----------
+        throttle : bool, optional
+            whether to throttle the render, by default False
+        """
+        self.render_requests += 1
+        if self._batch_depth > 0:
+            self._batch_pending = True
+            return
+        if self._render_handle is not None:
+            # a render is already scheduled and will include this change
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.update()
+            return
+        delay = self.render_delay
+        if throttle:
+            delay = max(delay, self.slider_interval - (time.monotonic() - self._last_render))
+        self._render_handle = loop.call_later(delay, self._flush)
+
+    def _flush(self):
+        self._render_handle = None
+        logger.debug(f'Rendering after {self.render_requests} requests')
         self.update()
-        # self.actors[k].visibility = not self.actors[k].visibility
 
-    def set_opacity(self, **kwargs):
+    @contextmanager
+    def batch_update(self):
+        """Context manager to apply several object changes as a single render
+
+        Examples
+        --------
+        >>> with viewer.batch_update():
+        ...     viewer.set_objects(visibility={'block_model_1': False}, opacity={'fault_surface_1': 0.5})
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_pending:
+                self._batch_pending = False
+                self.update()
+
+    @contextmanager
+    def _changing(self):
+        """Ignore the render requests of the object callback while the viewer changes
+        objects, the viewer requests the render itself
+        """
+        self._changing_objects += 1
+        try:
+            yield
+        finally:
+            self._changing_objects -= 1
+
+    def set_objects(self, visibility: dict = None, opacity: dict = None):
+        """Change the visibility and/or opacity of several objects atomically.
+        The menu state is updated to match and the scene is rendered once.
+
+        Parameters
+        ----------
+        visibility : dict, optional
+            object name to visibility, by default None
+        opacity : dict, optional
+            object name to opacity, by default None
+        """
+        actors = scene_actors(self.plotter)
+        with self.batch_update(), self._changing():
+            for k, v in (visibility or {}).items():
+                if k in actors:
+                    self._set_visibility(k, v)
+            for k, v in (opacity or {}).items():
+                if k in actors:
+                    self._set_opacity(k, v)
+            self.refresh_object_menu()
+            self.request_update()
+
+    def set_object_visibility(self, name: str, visible: bool):
+        """Set the visibility of an object in the plotter.
+        this is the slot called by the checkboxes in the object menu
+        """
+        if name in scene_actors(self.plotter):
+            with self._changing():
+                self._set_visibility(name, bool(visible))
+            self._update_menu_row(name, visible=bool(visible))
+        self.request_update()
+
+    def toggle_visibility(self, **kwargs):
+        """Set the visibility of objects from state keys named ``{name}__visibility``"""
+        self.set_objects(
+            visibility={k.split('__visibility')[0]: bool(v) for k, v in kwargs.items()}
+        )
+
+    def _set_visibility(self, name: str, visible: bool):
+        # Loop3DView rebuilds objects released by its memory budget when shown
+        if hasattr(self.plotter, 'set_object_visibility'):
+            self.plotter.set_object_visibility(name, visible)
+        else:
+            scene_actors(self.plotter)[name].SetVisibility(visible)
+
+    def set_object_opacity(self, name: str, opacity: float):
         """Set the opacity of an object in the plotter.
-        this is a slot called by the state change, the kwargs are the current state
-        so we need to check the keys and update accordingly
+        Renders are throttled because the opacity is driven by a slider.
         """
-        for k in kwargs.keys():
-            object_name = k.split("__opacity")[0]
-            if object_name in self.plotter.actors:
-                self.plotter.actors[object_name].prop.opacity = kwargs[k]
-        self.update()
-        # self.actors[k].visibility = not self.actors[k].visibility
-
-    def object_menu(self):
-        with self.layout.drawer as drawer:
-            with vuetify.VCard():
-
-                for k, a in self.plotter.actors.items():
-                    if type(a) is not pyvista.plotting.actor.Actor:
-                        continue
-                    drawer.server.state[f"{k}__visibility"] = True
-                    drawer.server.state[f"{k}__control_visibility"] = False
-                    drawer.server.state[f"{k}__opacity"] = a.prop.opacity
-                    drawer.server.state.change(f"{k}__visibility")(self.toggle_visibility)
-                    drawer.server.state.change(f"{k}__opacity")(self.set_opacity)
-                    with vuetify.VRow(
-                        classes='pa-0 ma-0 align-center fill-height',
-                        style='flex-wrap: nowrap',
-                    ):
-                        with vuetify.VCol():
+        self._set_opacity(name, float(opacity))
+        self.request_update(throttle=True)
+
+    def set_opacity(self, **kwargs):
+        """Set the opacity of objects from state keys named ``{name}__opacity``"""
+        self.set_objects(opacity={k.split('__opacity')[0]: float(v) for k, v in kwargs.items()})
+
+    def _set_opacity(self, name: str, opacity: float):
+        actor = scene_actors(self.plotter).get(name)
+        if actor is None or not hasattr(actor.prop, 'opacity'):
+            return
+        if actor.prop.opacity != opacity:
+            actor.prop.opacity = opacity
+        if self.server.state[self.OBJECT_CONTROLS] == name:
+            self.server.state[self.OBJECT_OPACITY] = opacity
+
+    def _on_object_controls(self, **kwargs):
+        """Show the opacity of the object whose controls are opened in the slider"""
+        actor = scene_actors(self.plotter).get(self.server.state[self.OBJECT_CONTROLS])
+        if actor is not None:
+            self.server.state[self.OBJECT_OPACITY] = getattr(actor.prop, 'opacity', 1.0)
+
+    def _on_object_opacity(self, **kwargs):
+        """Slot of the opacity slider in the object menu"""
+        name = self.server.state[self.OBJECT_CONTROLS]
+        actor = scene_actors(self.plotter).get(name)
+        opacity = self.server.state[self.OBJECT_OPACITY]
+        if actor is None or getattr(actor.prop, 'opacity', opacity) == opacity:
+            return
+        self.set_object_opacity(name, opacity)
+
+    def _set_progress(self, fraction: float, message: str):
+        with self.server.state:
+            self.server.state[self.PROGRESS] = (
+                None if fraction is None or fraction >= 1 else fraction * 100
+            )
+            self.server.state[self.PROGRESS_MESSAGE] = message
+
+    def plot_async(self, method: str, *args, **kwargs) -> asyncio.Task:
+        """Run one of the asynchronous plotting methods of the plotter (e.g.
+        ``plot_surface_async``) as a background task on the server event loop.
+        The progress is shown in the drawer and the views are updated when the
+        actor has been added.
+
+        Parameters
+        ----------
+        method : str
+            name of the plotter method, with or without the ``_async`` suffix
+        args, kwargs :
+            arguments for the plotting method
 
+        Returns
+        -------
+        asyncio.Task
+            the task running the plot, cancel it to discard the result
+        """
+        if not method.endswith('_async'):
+            method = f'{method}_async'
+        coroutine = getattr(self.plotter, method)(*args, progress=self._set_progress, **kwargs)
+        task = asyncio.ensure_future(coroutine)
+        self._plot_tasks.add(task)
+        task.add_done_callback(self._on_plot_done)
+        return task
+
+    def _on_plot_done(self, task: asyncio.Task):
+        self._plot_tasks.discard(task)
+        if task.cancelled():
+            self._set_progress(None, 'Cancelled')
+            return
+        if task.exception() is not None:
+            logger.error(f'Plotting failed: {task.exception()}')
+            self._set_progress(None, f'Failed: {task.exception()}')
+            return
+        self.request_update()
+
+    def cancel_plots(self):
+        """Cancel all plots running in the background, their evaluation stops at its next
+        stage and the results are discarded
+        """
+        for task in list(self._plot_tasks):
+            task.cancel()
+
+    def _on_object_change(self, event: str, name: str):
+        """Called by Loop3DView when an object is added, removed or modified. The menu
+        is only rebuilt when the list of objects changes, a modified object only
+        updates its own row.
+        """
+        if event in ('added', 'removed'):
+            self.refresh_object_menu()
+        else:
+            actor = scene_actors(self.plotter).get(name)
+            if actor is not None:
+                self._update_menu_row(name, visible=bool(actor.GetVisibility()))
+        if self._changing_objects == 0:
+            self.request_update()
+
+    def _menu_rows(self) -> list:
+        """Build the rows of the object menu from the actors of the plotter,
+        applying the text filter and adding a header row for each group
+        """
+        state = self.server.state
+        text = (state[self.OBJECT_FILTER] or '').lower()
+        grouped = state[self.OBJECT_GROUP]
+        objects = getattr(self.plotter, 'objects', {})
+        rows = {}
+        for k, a in scene_actors(self.plotter).items():
+            if type(a) not in (pyvista.Actor, pyvista.Volume):
+                continue
+            group = objects.get(k, {}).get('group') or 'other'
+            if text and text not in k.lower() and text not in group.lower():
+                continue
+            rows.setdefault(group if grouped else '', []).append(
+                {'id': k, 'name': k, 'group': group, 'header': False, 'key': self._row_key(k)}
+            )
+        if not grouped:
+            return rows.get('', [])
+        menu = []
+        for group in sorted(rows):
+            menu.append({'id': f'{group}__group', 'name': group, 'header': True})
+            menu.extend(rows[group])
+        return menu
+
+    def _row_key(self, name: str) -> str:
+        """State key of the visibility of the row of an object"""
+        if name not in self._row_keys:
+            self._row_keys[name] = f'{self.OBJECT_VISIBLE}_{len(self._row_keys)}'
+        return self._row_keys[name]
+
+    def refresh_object_menu(self, **kwargs):
+        """Rebuild the object menu rows, this is cheap as only the list of rows is
+        sent to the client and the rows are rendered virtually
+        """
+        actors = scene_actors(self.plotter)
+        with self.server.state:
+            rows = self._menu_rows()
+            for row in rows:
+                if not row['header']:
+                    self.server.state[row['key']] = bool(actors[row['id']].GetVisibility())
+            self.server.state[self.OBJECTS] = rows
+
+    def _update_menu_row(self, name: str, visible: bool):
+        """Change the visibility shown in the row of an object, only the state key
+        of the row is sent to the client
+        """
+        key = self._row_key(name)
+        if self.server.state[key] != visible:
+            self.server.state[key] = visible
+
+    def object_menu(self, height: int = 600, row_height: int = 48):
+        """Add the object menu to the drawer. The menu is a single list in the state
+        that is updated when objects are added or removed from the plotter. Only
+        the visible rows are rendered and the rows can be filtered by name and
+        grouped by feature.
+
+        The opacity of an object is changed in a panel above the list, opened with the
+        button of its row, so every row has the same height.
+
+        Parameters
+        ----------
+        height : int, optional
+            height of the scrolling list in pixels, by default 600
+        row_height : int, optional
+            height of a row in pixels, by default 48
+        """
+        state = self.server.state
+        state.change(self.OBJECT_FILTER, self.OBJECT_GROUP)(self.refresh_object_menu)
+        state.change(self.OBJECT_CONTROLS)(self._on_object_controls)
+        state.change(self.OBJECT_OPACITY)(self._on_object_opacity)
+        if hasattr(self.plotter, 'add_object_callback'):
+            self.plotter.add_object_callback(self._on_object_change)
+        self.refresh_object_menu()
+        with self.layout.drawer:
+            with vuetify.VCard(classes="pa-1"):
+                with vuetify.VRow(
+                    v_show=(f"{self.PROGRESS} != null",),
+                    classes='pa-0 ma-0 align-center',
+                    style='flex-wrap: nowrap',
+                ):
+                    vuetify.VProgressLinear(
+                        model_value=(self.PROGRESS,),
+                        height=20,
+                        children=["{{ %s }}" % self.PROGRESS_MESSAGE],
+                    )
+                    vuetify.VBtn(
+                        icon='mdi-close',
+                        variant="text",
+                        size="small",
+                        click=self.cancel_plots,
+                    )
+                with vuetify.VRow(
+                    classes='pa-0 ma-0 align-center',
+                    style='flex-wrap: nowrap',
+                ):
+                    vuetify.VTextField(
+                        v_model=(self.OBJECT_FILTER,),
+                        label="Filter",
+                        prepend_inner_icon="mdi-magnify",
+                        clearable=True,
+                        density="compact",
+                        hide_details=True,
+                    )
+                    vuetify.VSwitch(
+                        v_model=(self.OBJECT_GROUP,),
+                        label="Group",
+                        density="compact",
+                        hide_details=True,
+                        classes="ml-2",
+                    )
+                with vuetify.VRow(
+                    v_show=(f"{self.OBJECT_CONTROLS} != null",),
+                    classes='pa-0 ma-0 align-center',
+                    style='flex-wrap: nowrap',
+                ):
+                    vuetify.VSlider(
+                        v_model=(self.OBJECT_OPACITY,),
+                        label=(f"{self.OBJECT_CONTROLS}",),
+                        min=0,
+                        max=1,
+                        step=0.1,
+                        thumb_label=True,
+                        density="compact",
+                        hide_details=True,
+                    )
+                    vuetify.VBtn(
+                        icon='mdi-close',
+                        variant="text",
+                        size="small",
+                        click=f"{self.OBJECT_CONTROLS} = null",
+                    )
+                with vuetify.VVirtualScroll(
+                    items=(self.OBJECTS,),
+                    item_height=row_height,
+                    height=height,
+                ):
+                    with vuetify.Template(v_slot="{ item }"):
+                        vuetify.VListSubheader("{{ item.name }}", v_if="item.header")
+                        with vuetify.VRow(
+                            v_else=True,
+                            classes='pa-0 ma-0 align-center fill-height',
+                            style='flex-wrap: nowrap',
+                        ):
                             vuetify.VCheckbox(
-                                label=k,
+                                label=("item.name",),
+                                model_value=("trame.state.get(item.key)",),
+                                update_modelValue=(
+                                    self.set_object_visibility,
+                                    "[item.name, $event]",
+                                ),
                                 classes="ma-0 pa-0",
-                                v_model=(f"{k}__visibility"),
-                                # click=(self.toggle_visibility("test")),
+                                density="compact",
+                                hide_details=True,
                             )
-                        with vuetify.VCol():
                             vuetify.VBtn(
                                 icon='mdi-dots-horizontal',
-                                click=(f'{k}__control_visibility=!{k}__control_visibility'),
-                                # click=(self.toggle_visibility("test")),
-                            )
-                    with vuetify.VCard(classes="ma-0 pa-0", v_show=f'{k}__control_visibility'):
-
-                        with vuetify.VRow(
-                            classes="ma-0 pa-0 d-flex align-center",
-                        ):
-
-                            vuetify.VSlider(
-                                v_model=(f"{k}__opacity"),
-                                label="Opacity",
-                                min=0,
-                                max=1,
-                                step=0.1,
-                                thumb_label=True,
+                                variant="text",
+                                size="small",
+                                click=(
+                                    f"{self.OBJECT_CONTROLS} = "
+                                    f"{self.OBJECT_CONTROLS} == item.name ? null : item.name"
+                                ),
                             )
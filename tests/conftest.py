@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import pyvista as pv
+
+from LoopStructural import GeologicalModel
+from LoopStructural.datasets import load_claudius
+
+from loopstructuralvisualisation import Loop3DView
+
+pv.OFF_SCREEN = True
+
+
+@pytest.fixture
+def view():
+    view = Loop3DView(off_screen=True)
+    yield view
+    view.close()
+
+
+@pytest.fixture
+def views():
+    """Two views side by side"""
+    view = Loop3DView(shape=(1, 2), off_screen=True)
+    yield view
+    view.close()
+
+
+def _build_model():
+    data, bb = load_claudius()
+    model = GeologicalModel(bb[0, :], bb[1, :])
+    model.data = data
+    model.create_and_add_foliation('strati', nelements=2000)
+    column = model.stratigraphic_column
+    for name, thickness, colour in (
+        ('a', 60, 'red'),
+        ('b', 100, 'green'),
+        ('c', 250, 'blue'),
+        ('d', 330, 'orange'),
+    ):
+        column.add_unit(name, thickness=thickness, colour=colour)
+    column.group_mapping['Group_0'] = 'strati'
+    model.update()
+    model.bounding_box.nsteps = np.array([20, 20, 10])
+    return model
+
+
+@pytest.fixture(scope='session')
+def build_model():
+    """Function building a new small model of the claudius dataset"""
+    return _build_model
+
+
+@pytest.fixture(scope='session')
+def model(build_model):
+    """A small model of the claudius dataset with four stratigraphic units"""
+    return build_model()
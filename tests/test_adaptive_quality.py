@@ -0,0 +1,33 @@
+import pyvista as pv
+from trame.app import get_server
+
+from loopstructuralvisualisation.trame._adaptive_quality import AdaptiveQuality
+from loopstructuralvisualisation.trame._scene_sync import actor_dataset
+from loopstructuralvisualisation.trame.ui.vuetify3 import LoopViewer
+
+
+def test_levels_are_built_when_objects_are_added(views, request, monkeypatch):
+    viewer = LoopViewer(views, server=get_server(request.node.name, client_type='vue3'))
+    quality = AdaptiveQuality(lod_cell_threshold=1000)
+    quality.attach(viewer)
+    views.subplot(0, 1)
+    views.add_mesh(pv.Sphere(theta_resolution=100, phi_resolution=100), name='unit_sphere')
+    views.subplot(0, 0)
+    assert 'unit_sphere' in quality._lod_cache
+
+    actor = views.renderers[1].actors['unit_sphere']
+    full = actor_dataset(actor).n_cells
+    built = []
+    monkeypatch.setattr(
+        'loopstructuralvisualisation.trame._adaptive_quality.reduced_mesh',
+        lambda *args: built.append(args),
+    )
+    quality.start_interaction()
+    assert actor_dataset(actor).n_cells < full
+    assert len(built) == 0
+    quality.end_interaction()
+    assert actor_dataset(actor).n_cells == full
+
+    views.remove_actor('unit_sphere')
+    assert 'unit_sphere' not in quality._lod_cache
+    quality.detach()
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from loopstructuralvisualisation._animation import keyframe_path, orbit_path
+
+
+def test_orbit_path_frame_count():
+    poses = orbit_path((1, 0, 0), (0, 0, 0), (0, 0, 1), n_frames=8)
+    assert len(poses) == 8
+    # a full orbit does not repeat the first frame
+    assert not np.allclose(poses[-1][0], poses[0][0])
+    np.testing.assert_allclose(poses[2][0], (0, 1, 0), atol=1e-12)
+    half = orbit_path((1, 0, 0), (0, 0, 0), (0, 0, 1), n_frames=5, degrees=180)
+    assert len(half) == 5
+    np.testing.assert_allclose(half[-1][0], (-1, 0, 0), atol=1e-12)
+
+
+def test_keyframe_path_frame_count():
+    keyframes = [((0, 0, 1), (0, 0, 0), (0, 1, 0)), ((3, 0, 1), (0, 0, 0), (0, 1, 0))]
+    poses = keyframe_path(keyframes, n_frames=4)
+    assert len(poses) == 4
+    assert poses[0] == keyframes[0]
+    np.testing.assert_allclose([p[0][0] for p in poses], [0, 1, 2, 3])
+    with pytest.raises(ValueError):
+        keyframe_path(keyframes[:1])
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+
+
+def test_plot_surface_async(view, model):
+    actor = asyncio.run(view.plot_surface_async(model['strati'], value=0.0, name='strati_surface'))
+    recipe = view.objects['strati_surface']['recipe']
+    assert recipe is not None
+    assert recipe().n_points == actor.mapper.dataset.n_points
+
+
+def test_plot_scalar_field_async(view, model):
+    asyncio.run(view.plot_scalar_field_async(model['strati'], name='strati_field'))
+    recipe = view.objects['strati_field']['recipe']
+    assert recipe is not None
+    assert recipe().n_points > 0
+
+
+def test_cancel_stops_the_build(view):
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def build(cancelled=None):
+        started.set()
+        assert cancelled.wait(5)
+        stopped.set()
+
+    async def cancel():
+        task = asyncio.ensure_future(view._build_async(build))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    assert stopped.wait(5)
+
+
+def test_cancelled_build_stops(view, model):
+    cancelled = threading.Event()
+    cancelled.set()
+    with pytest.raises(asyncio.CancelledError):
+        view._build_surface(model['strati'], 0.0, cancelled=cancelled)
+    with pytest.raises(asyncio.CancelledError):
+        view._build_block_model(model, cancelled=cancelled)
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import numpy as np
+
+from loopstructuralvisualisation._cache import ViewerCache, feature_version
+
+
+def test_concurrent_get_builds_once():
+    cache = ViewerCache()
+    built = []
+
+    def builder():
+        built.append(1)
+        time.sleep(0.1)
+        return object()
+
+    values = []
+    threads = [
+        threading.Thread(target=lambda: values.append(cache.get('product', builder)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert len(values) == 8 and all(v is values[0] for v in values)
+    assert cache.misses == 1 and cache.hits == 7
+
+
+class Interpolator:
+    def __init__(self):
+        self.up_to_date = True
+        self.c = np.arange(10.0)
+
+
+class Feature:
+    name = 'feature'
+
+    def __init__(self):
+        self.interpolator = Interpolator()
+
+
+def test_feature_version_is_kept_while_up_to_date():
+    feature = Feature()
+    version = feature_version(feature)
+    # the solution is not hashed again while the interpolator is up to date
+    feature.interpolator.c[:] = 0.0
+    assert feature_version(feature) == version
+
+    feature.interpolator.up_to_date = False
+    stale = feature_version(feature)
+    assert stale != version
+
+    feature.interpolator.c = np.ones(10)
+    feature.interpolator.up_to_date = True
+    solved = feature_version(feature)
+    assert solved not in (version, stale)
+    assert feature_version(feature) == solved
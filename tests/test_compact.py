@@ -0,0 +1,24 @@
+import numpy as np
+import pyvista as pv
+
+from loopstructuralvisualisation import Loop3DView
+
+
+def test_compact_add_mesh():
+    view = Loop3DView(compact=True, off_screen=True)
+    mesh = pv.Sphere()
+    mesh.points = mesh.points.astype(np.float64)
+    view.add_mesh(mesh, name='unit_sphere')
+    assert mesh.points.dtype == np.float32
+    assert view.objects['unit_sphere']['bytes_saved'] > 0
+    view.close()
+
+
+def test_compact_widgets():
+    # the widgets add the outline of the mesh as a vtk algorithm
+    view = Loop3DView(compact=True, off_screen=True)
+    view.add_mesh_clip_plane(pv.Wavelet(), name='clipped')
+    view.add_mesh_slice(pv.Wavelet(), name='sliced')
+    assert 'clipped_outline' in view.objects
+    assert 'sliced_outline' in view.objects
+    view.close()
@@ -0,0 +1,20 @@
+from loopstructuralvisualisation._memory import source_dataset
+
+
+def test_set_data_visibility_keeps_the_mesh(view, model):
+    actors = view.plot_data(model['strati'], merge=True, name='strati_data')
+    actor = actors[0]
+    name = next(n for n in view._merged_data if view._object_actor(n) is actor)
+    mesh = view._merged_data[name]['mesh']
+    n_cells = mesh.n_cells
+
+    view.set_data_visibility('strati', False, name=name)
+    view.render()
+    assert actor.mapper.GetInput().GetNumberOfCells() == 0
+    # the hidden cells are extracted from the merged mesh, which is not copied
+    assert source_dataset(actor).n_cells == n_cells
+    assert view._merged_data[name]['mesh'] is mesh
+    assert mesh.n_cells == n_cells
+
+    view.set_data_visibility('strati', True, name=name)
+    assert actor.mapper.GetInput().GetNumberOfCells() == n_cells
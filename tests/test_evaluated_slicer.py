@@ -0,0 +1,32 @@
+def _move(widget, normal, origin):
+    widget.SetNormal(normal)
+    widget.SetOrigin(origin)
+    widget.InvokeEvent('EndInteractionEvent')
+
+
+def test_slices_cached_per_pose(view, model, monkeypatch):
+    feature = model['strati']
+    evaluated = []
+    evaluate_value = feature.evaluate_value
+
+    def counting(points):
+        evaluated.append(len(points))
+        return evaluate_value(points)
+
+    monkeypatch.setattr(feature, 'evaluate_value', counting)
+    view.model = model
+    actor = view.plot_scalar_field(feature, slicer='evaluate', name='strati_slice')
+    # only the points on the plane are evaluated, the others set the colour range
+    assert evaluated[-1] == actor.mapper.dataset.n_points
+    assert evaluated[-1] < model.bounding_box.nsteps.prod()
+    n_evaluations = len(evaluated)
+
+    widget = view.plane_widgets[-1]
+    centre = (model.bounding_box.origin + model.bounding_box.maximum) / 2
+    _move(widget, (0, 0, 1), centre)
+    assert len(evaluated) == n_evaluations + 1
+    # returning to the previous poses uses the cached slices
+    _move(widget, (1, 0, 0), centre)
+    _move(widget, (0, 0, 1), centre)
+    assert len(evaluated) == n_evaluations + 1
+    assert 'strati' in actor.mapper.dataset.point_data
@@ -0,0 +1,58 @@
+import numpy as np
+from LoopStructural.modelling.features import AnalyticalGeologicalFeature, StructuralFrame
+from LoopStructural.modelling.features.fold import FoldEvent
+
+from loopstructuralvisualisation._fold import evaluate_fold, probe_rotation_angle, rotate_vectors
+
+
+def _unit(rng, n):
+    vectors = rng.normal(size=(n, 3))
+    return vectors / np.linalg.norm(vectors, axis=1)[:, None]
+
+
+def test_rotate_vectors_matches_fold_event():
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng, 50)
+    axes = _unit(rng, 50)
+    angles = rng.uniform(-180, 180, 50)
+    fold = FoldEvent(None)
+    # FoldEvent applies the transpose of its rotation matrices
+    expected = np.einsum('ijk,ki->kj', fold.rot_mat(-axes, angles), vectors)
+    np.testing.assert_allclose(rotate_vectors(vectors, axes, angles), expected, atol=1e-12)
+    expected = np.einsum('ijk,ki->kj', fold.rot_mat(axes, angles), vectors)
+    np.testing.assert_allclose(rotate_vectors(vectors, axes, -angles), expected, atol=1e-12)
+
+
+def test_probe_rotation_angle():
+    coordinate = np.linspace(-100, 100, 1000)
+    coordinate[::7] = np.nan
+    angle = probe_rotation_angle(lambda x: 40 * np.sin(x / 50), coordinate, n_samples=400)
+    mask = np.isfinite(coordinate)
+    assert np.all(np.isnan(angle[~mask]))
+    np.testing.assert_allclose(angle[mask], 40 * np.sin(coordinate[mask] / 50), atol=0.01)
+
+
+def test_evaluate_fold_matches_fold_event(model):
+    origin = np.asarray(model.bounding_box.origin, dtype=float)
+    maximum = np.asarray(model.bounding_box.maximum, dtype=float)
+    features = [
+        AnalyticalGeologicalFeature(f'fold_frame_{i}', vector, (origin + maximum) / 2, model=model)
+        for i, vector in enumerate(([1, 0, 0.2], [0, 1, 0.3], [0, 0, 1]))
+    ]
+    frame = StructuralFrame('fold_frame', features, model=model)
+    # linear profiles are interpolated exactly
+    fold = FoldEvent(
+        frame,
+        fold_axis_rotation=lambda gy: 0.05 * gy + 10,
+        fold_limb_rotation=lambda gx: -0.02 * gx + 30,
+    )
+    points = origin + np.random.default_rng(1).random((100, 3)) * (maximum - origin)
+    geometry = evaluate_fold(fold, points)
+    np.testing.assert_allclose(
+        geometry['fold_axis'], fold.get_fold_axis_orientation(points), atol=1e-9
+    )
+    fold_direction, _fold_axis, _dgz = fold.get_deformed_orientation(points)
+    fold_direction /= np.linalg.norm(fold_direction, axis=1)[:, None]
+    # FoldEvent scales the fold direction by the sum of its components, not its norm
+    cosine = np.einsum('ij,ij->i', geometry['fold_limb'], fold_direction)
+    np.testing.assert_allclose(np.abs(cosine), 1, atol=1e-9)
@@ -0,0 +1,32 @@
+import pyvista as pv
+from trame.app import get_server
+
+from loopstructuralvisualisation.trame._level_of_detail import LevelOfDetail
+from loopstructuralvisualisation.trame._scene_sync import actor_dataset
+from loopstructuralvisualisation.trame.ui.vuetify3 import LoopViewer
+
+
+def _camera(distance):
+    return {'position': (0.0, 0.0, distance), 'focalPoint': (0.0, 0.0, 0.0), 'viewUp': (0, 1, 0)}
+
+
+def test_levels_follow_the_client_camera(views, request):
+    views.subplot(0, 1)
+    views.add_mesh(pv.Sphere(theta_resolution=200, phi_resolution=200), name='unit_sphere')
+    views.subplot(0, 0)
+    views.render()
+    viewer = LoopViewer(views, server=get_server(request.node.name, client_type='vue3'))
+    viewer._mode = 'client'
+    lod = LevelOfDetail(min_cells=1000)
+    lod.attach(viewer)
+    viewer.level_of_detail = lod
+    actor = views.renderers[1].actors['unit_sphere']
+    full = actor_dataset(actor).n_cells
+
+    # the client camera is applied to the active view, share it with the sphere's view
+    views.renderers[1].camera = views.renderers[0].camera
+    viewer.on_client_camera(_camera(1000.0))
+    assert actor_dataset(actor).n_cells < full
+    viewer.on_client_camera(_camera(2.0))
+    assert actor_dataset(actor).n_cells == full
+    lod.detach()
@@ -0,0 +1,122 @@
+import numpy as np
+import pyvista as pv
+
+from loopstructuralvisualisation import Loop3DView
+from loopstructuralvisualisation._memory import source_dataset
+from loopstructuralvisualisation._memory import unique_nbytes
+
+
+def test_shared_actor_record(views):
+    views.add_mesh(pv.Sphere(), name='a_sphere')
+    views.share_actor('a_sphere', 0, 1)
+    shared = views.objects['a_sphere_1']
+    assert shared['shared_from'] == 'a_sphere'
+    assert shared['nbytes'] == 0
+    assert not shared['evicted']
+    report = views.memory_report()
+    assert set(report['objects']) == {'a_sphere', 'a_sphere_1'}
+    # the dataset is shared so it is only counted once
+    assert views.memory_used == unique_nbytes([source_dataset(views._object_actor('a_sphere'))])
+    views.memory_report(as_dataframe=True)
+
+
+def test_budget_with_shared_actor():
+    view = Loop3DView(shape=(1, 2), off_screen=True, memory_budget=1)
+    view.add_mesh(pv.Sphere(), name='a_sphere', recipe=pv.Sphere)
+    view.share_actor('a_sphere', 1)
+    view.add_mesh(pv.Cube(), name='a_cube')
+    # hidden in one view only, the dataset is still shown in the other
+    view.set_object_visibility('a_sphere', False)
+    assert not view.objects['a_sphere']['evicted']
+    assert source_dataset(view._object_actor('a_sphere')).n_points > 0
+    view.set_object_visibility('a_sphere_1', False)
+    assert view.objects['a_sphere']['evicted']
+    assert view.objects['a_sphere_1']['evicted']
+    assert source_dataset(view._object_actor('a_sphere_1')).n_points == 0
+    # showing the shared actor rebuilds the dataset of the original
+    view.set_object_visibility('a_sphere_1', True)
+    assert not view.objects['a_sphere']['evicted']
+    assert source_dataset(view._object_actor('a_sphere_1')).n_points == pv.Sphere().n_points
+    view.close()
+
+
+def test_remove_shared_source(views):
+    views.add_mesh(pv.Sphere(), name='a_sphere', recipe=pv.Sphere)
+    views.share_actor('a_sphere', 1)
+    views.remove_actor('a_sphere')
+    heir = views.objects['a_sphere_1']
+    assert heir['shared_from'] is None
+    assert heir['recipe'] is pv.Sphere
+
+
+def test_eviction_releases_cache():
+    view = Loop3DView(off_screen=True, memory_budget=1)
+    key = ('wavelet',)
+
+    def recipe():
+        return view.cache.get(key, pv.Wavelet).copy(deep=False)
+
+    view.add_mesh(recipe(), name='a_wavelet', recipe=recipe)
+    assert key in view.cache
+    # the cached grid and the shallow copy shown share their arrays
+    assert view.memory_used == unique_nbytes([pv.Wavelet()])
+    view.set_object_visibility('a_wavelet', False)
+    assert view.objects['a_wavelet']['evicted']
+    assert key not in view.cache
+    assert view.memory_used == 0
+    view.set_object_visibility('a_wavelet', True)
+    assert key in view.cache
+    assert source_dataset(view._object_actor('a_wavelet')).n_points == pv.Wavelet().n_points
+    view.close()
+
+
+def test_unused_cache_is_released():
+    view = Loop3DView(off_screen=True)
+    view.cache.put(('unused',), pv.Wavelet())
+    view.add_mesh(pv.Sphere(), name='a_sphere')
+    view.memory_budget = view.memory_used - 1
+    view._enforce_memory_budget()
+    assert ('unused',) not in view.cache
+    assert source_dataset(view._object_actor('a_sphere')).n_points > 0
+    view.close()
+
+
+def test_block_model_eviction(model):
+    view = Loop3DView(model, off_screen=True)
+    view.plot_block_model(name='block_model')
+    view.set_unit_visibility('a', False)
+    assert view.objects['block_model']['recipe'] is not None
+    view.memory_budget = 1
+    view.set_object_visibility('block_model', False)
+    assert view.objects['block_model']['evicted']
+    assert len(view.cache) == 0
+    # the unit visibility can be changed while the block model is released
+    view.set_unit_visibility('b', False)
+    view.set_object_visibility('block_model', True)
+    block = source_dataset(view._object_actor('block_model'))
+    hidden = np.isin(block['stratigraphy'], view._unit_ids(model, ['a', 'b']))
+    assert np.any(hidden)
+    np.testing.assert_array_equal(block['vtkGhostType'] > 0, hidden)
+    view.close()
+
+
+def test_memory_report_totals(view, model):
+    sphere = pv.Sphere()
+    sphere.point_data['values'] = np.zeros(sphere.n_points)
+    view.add_mesh(sphere, name='unit_sphere', compact=False)
+    view.plot_scalar_field(model['strati'], name='strati_field')
+    report = view.memory_report()
+    memory = report['objects']['unit_sphere']
+    assert memory['arrays']['point/values'] == sphere.n_points * 8
+    assert memory['points'] == sphere.n_points * 3 * sphere.points.itemsize
+    for memory in report['objects'].values():
+        assert memory['total'] == memory['points'] + memory['cells'] + sum(
+            memory['arrays'].values()
+        )
+    # the evaluated scalar field is kept in the cache
+    assert len(report['cache']) > 0
+    assert report['total'] == sum(m['total'] for m in report['objects'].values()) + sum(
+        report['cache'].values()
+    )
+    table = view.memory_report(as_dataframe=True)
+    assert table['bytes'].sum() == report['total']
@@ -0,0 +1,51 @@
+import numpy as np
+import pyvista as pv
+from LoopStructural.datatypes import Surface
+from vtkmodules.util.numpy_support import vtk_to_numpy
+
+from loopstructuralvisualisation import _mesh_assembly
+from loopstructuralvisualisation._mesh_assembly import combine_polydata, combine_surfaces
+
+
+def _surface(mesh, value):
+    return Surface(
+        vertices=np.asarray(mesh.points),
+        triangles=mesh.faces.reshape(-1, 4)[:, 1:],
+        values=np.full(mesh.n_points, value),
+        properties={'depth': np.asarray(mesh.points[:, 2])},
+    )
+
+
+def test_assembly_shares_its_buffers(monkeypatch):
+    given = []
+    numpy_to_vtk = _mesh_assembly.numpy_to_vtkIdTypeArray
+
+    def recording(array, deep=False):
+        given.append((array, deep))
+        return numpy_to_vtk(array, deep=deep)
+
+    monkeypatch.setattr(_mesh_assembly, 'numpy_to_vtkIdTypeArray', recording)
+    sphere = pv.Sphere()
+    cube = pv.Cube().triangulate()
+    mesh = combine_surfaces([_surface(sphere, 0.0), _surface(cube, 1.0)])
+    (offsets, deep_offsets), (connectivity, deep_connectivity) = given
+    assert not deep_offsets and not deep_connectivity
+    polys = mesh.GetPolys()
+    assert np.shares_memory(vtk_to_numpy(polys.GetOffsetsArray()), offsets)
+    assert np.shares_memory(vtk_to_numpy(polys.GetConnectivityArray()), connectivity)
+    # the points and arrays are the numpy buffers filled from the surfaces
+    assert np.shares_memory(mesh.points, vtk_to_numpy(mesh.GetPoints().GetData()))
+    assert isinstance(mesh, pv.PolyData)
+    assert mesh.n_points == sphere.n_points + cube.n_points
+    assert mesh.n_cells == sphere.n_cells + cube.n_cells
+    np.testing.assert_array_equal(connectivity[-3:], cube.faces[-3:] + sphere.n_points)
+
+
+def test_values_are_the_active_scalars():
+    mesh = combine_surfaces([_surface(pv.Sphere(), 0.0), _surface(pv.Cube().triangulate(), 1.0)])
+    assert mesh.active_scalars_name == 'values'
+    assert set(mesh.point_data.keys()) == {'values', 'depth'}
+    np.testing.assert_array_equal(np.unique(mesh['values']), [0.0, 1.0])
+    # the normals of the spheres are not taken as scalars
+    combined = combine_polydata([pv.Sphere(), pv.Sphere(center=(2, 0, 0))])
+    assert combined.active_scalars_name is None
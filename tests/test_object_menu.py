@@ -0,0 +1,77 @@
+import pytest
+import pyvista as pv
+from trame.app import get_server
+
+from loopstructuralvisualisation.trame.ui.vuetify3 import LoopViewer
+
+
+@pytest.fixture
+def viewer(view, request):
+    view.add_mesh(pv.Sphere(), name='unit_sphere')
+    view.add_mesh(pv.Cube(), name='a_cube')
+    viewer = LoopViewer(view, server=get_server(request.node.name, client_type='vue3'))
+    view.add_object_callback(viewer._on_object_change)
+    viewer.refresh_object_menu()
+    return viewer
+
+
+def _visible(viewer, name):
+    row = next(row for row in viewer.server.state[viewer.OBJECTS] if row['id'] == name)
+    return viewer.server.state[row['key']]
+
+
+def test_modified_object_updates_its_row(viewer, monkeypatch):
+    rebuilds = []
+    monkeypatch.setattr(viewer, '_menu_rows', lambda: rebuilds.append(1) or [])
+    rows = viewer.server.state[viewer.OBJECTS]
+    viewer.plotter.set_object_visibility('unit_sphere', False)
+    assert not _visible(viewer, 'unit_sphere')
+    assert _visible(viewer, 'a_cube')
+    assert len(rebuilds) == 0
+    # only the state key of the row changes, the list of rows is not sent again
+    assert viewer.server.state[viewer.OBJECTS] is rows
+    assert all('visible' not in row for row in rows)
+
+
+def test_added_and_removed_objects_rebuild_the_menu(viewer):
+    viewer.plotter.add_mesh(pv.Cone(), name='a_cone')
+    assert _visible(viewer, 'a_cone')
+    viewer.plotter.remove_actor('a_cone')
+    assert 'a_cone' not in [row['id'] for row in viewer.server.state[viewer.OBJECTS]]
+
+
+def test_opacity_does_not_send_the_menu(viewer, monkeypatch):
+    state = viewer.server.state
+    state[viewer.OBJECT_CONTROLS] = 'unit_sphere'
+    viewer._on_object_controls()
+    assert state[viewer.OBJECT_OPACITY] == 1.0
+
+    dirty = []
+    monkeypatch.setattr(state, 'dirty', lambda *keys: dirty.extend(keys))
+    rows = state[viewer.OBJECTS]
+    state[viewer.OBJECT_OPACITY] = 0.3
+    viewer._on_object_opacity()
+    assert viewer.plotter.renderer.actors['unit_sphere'].prop.opacity == 0.3
+    assert viewer.OBJECTS not in dirty
+    assert state[viewer.OBJECTS] is rows
+    assert all('opacity' not in row for row in rows)
+
+    viewer.set_object_opacity('unit_sphere', 0.6)
+    assert state[viewer.OBJECT_OPACITY] == 0.6
+    viewer.set_object_opacity('a_cube', 0.2)
+    assert state[viewer.OBJECT_OPACITY] == 0.6
+    assert viewer.plotter.renderer.actors['a_cube'].prop.opacity == 0.2
+
+
+def test_visibility_click_requests_one_render(viewer):
+    requests = viewer.render_requests
+    viewer.set_object_visibility('unit_sphere', False)
+    assert viewer.render_requests == requests + 1
+    assert not _visible(viewer, 'unit_sphere')
+
+
+def test_state_key_slots(viewer):
+    viewer.toggle_visibility(unit_sphere__visibility=False)
+    assert not viewer.plotter.renderer.actors['unit_sphere'].GetVisibility()
+    viewer.set_opacity(a_cube__opacity=0.4)
+    assert viewer.plotter.renderer.actors['a_cube'].prop.opacity == 0.4
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from loopstructuralvisualisation._out_of_core import (
+    _slab_centres,
+    block_model_header,
+    evaluate_block_model_to_memmap,
+    memmap_downsampled,
+    memmap_section,
+)
+
+
+def test_header_reopened_in_another_session(model, build_model, tmp_path, monkeypatch):
+    filename = tmp_path / 'block_model.ids'
+    ids, header = evaluate_block_model_to_memmap(model, filename)
+    # an identical model built again stands in for the model of a new session
+    other = build_model()
+    assert block_model_header(other) == header
+
+    def evaluate_model(*args, **kwargs):
+        raise AssertionError('the block model was evaluated again')
+
+    monkeypatch.setattr(other, 'evaluate_model', evaluate_model)
+    reopened, _ = evaluate_block_model_to_memmap(other, filename)
+    np.testing.assert_array_equal(reopened, ids)
+
+
+def test_header_changes_with_geometry(model):
+    assert block_model_header(model, nsteps=[10, 10, 10]) != block_model_header(model)
+
+
+def test_slab_evaluation(model, tmp_path):
+    # one layer of cells per slab
+    ids, header = evaluate_block_model_to_memmap(model, tmp_path / 'ids', slab_cells=1)
+    dimensions = header['dimensions']
+    expected = model.evaluate_model(_slab_centres(header, 0, dimensions[2]), scale=True)
+    assert ids.dtype == np.dtype(header['dtype'])
+    np.testing.assert_array_equal(ids, expected)
+
+
+@pytest.mark.parametrize('axis', [0, 1, 2])
+def test_memmap_section(model, tmp_path, axis):
+    ids, header = evaluate_block_model_to_memmap(model, tmp_path / 'ids')
+    grid = np.asarray(ids).reshape(header['dimensions'], order='F')
+    index = header['dimensions'][axis] // 2
+    section = memmap_section(ids, header, axis, index, slab_cells=1)
+    assert section.n_cells == grid.size // grid.shape[axis]
+    expected = np.take(grid, [index], axis=axis).ravel(order='F')
+    np.testing.assert_array_equal(section['stratigraphy'], expected)
+    assert section.bounds[2 * axis] == pytest.approx(
+        header['origin'][axis] + index * header['spacing'][axis]
+    )
+
+
+def test_memmap_downsampled(model, tmp_path):
+    ids, header = evaluate_block_model_to_memmap(model, tmp_path / 'ids')
+    image = memmap_downsampled(ids, header, max_cells=100)
+    assert 0 < image.n_cells <= 100
+    full = memmap_downsampled(ids, header, max_cells=ids.size)
+    np.testing.assert_array_equal(full['stratigraphy'], ids)
+    np.testing.assert_allclose(image.bounds, full.bounds)
+
+
+def test_plot_block_model_out_of_core(view, model, tmp_path):
+    view.plot_block_model_out_of_core(tmp_path / 'ids', model, max_cells=100, name='block_ooc')
+    assert view.objects['block_ooc']['recipe']().n_cells <= 100
+    view.plot_block_model_section('x', name='block_ooc')
+    assert 'block_ooc_section' in view.objects
@@ -0,0 +1,61 @@
+import numpy as np
+import pyvista as pv
+
+from loopstructuralvisualisation._query import DatasetLocator
+
+
+def _sphere():
+    sphere = pv.Sphere()
+    sphere.point_data['height'] = sphere.points[:, 2]
+    sphere.set_active_scalars('height')
+    return sphere
+
+
+def test_query_nearest_object(view):
+    sphere = _sphere()
+    view.add_mesh(sphere, name='unit_sphere')
+    view.add_mesh(pv.Cube(center=(10, 0, 0)), name='unit_cube')
+    points = sphere.points[:3] * 1.01
+    result = view.query(points)
+    assert list(result['object']) == ['unit_sphere'] * 3
+    assert list(result['array']) == ['height'] * 3
+    np.testing.assert_allclose(result['value'], sphere.points[:3, 2])
+    far = view.query([[100, 0, 0]], max_distance=1)
+    assert far['object'][0] is None
+
+
+def test_pick(view):
+    sphere = _sphere()
+    view.add_mesh(sphere, name='unit_sphere')
+    picked = view.pick(sphere.points[0])
+    assert picked['object'] == 'unit_sphere'
+    assert picked['distance'] == 0
+    assert picked['value'] == sphere.points[0, 2]
+
+
+def test_locator_rebuilt_when_dataset_changes(view):
+    sphere = _sphere()
+    view.add_mesh(sphere, name='unit_sphere')
+    locator = view._locator('unit_sphere')
+    assert view._locator('unit_sphere') is locator
+    sphere.points = sphere.points + 5
+    assert not locator.is_current(sphere)
+    assert view._locator('unit_sphere') is not locator
+    assert view.pick(sphere.points[0])['distance'] == 0
+
+
+def test_grid_locator():
+    grid = pv.ImageData(dimensions=(4, 4, 4))
+    index, distance = DatasetLocator(grid, 'cell').query([[0.5, 1.5, 2.5], [-1, 0.5, 0.5]])
+    np.testing.assert_array_equal(index, [0 + 1 * 3 + 2 * 9, 0])
+    np.testing.assert_allclose(distance, [0, 1])
+
+
+def test_query_units(view, model):
+    # points outside the block model are still evaluated
+    points = np.vstack([model.bounding_box.origin, model.bounding_box.maximum + 100])
+    result = view.query(points, model=model)
+    ids = model.evaluate_model(points, scale=True)
+    np.testing.assert_array_equal(result['unit_id'], ids)
+    column = {row[0]: row[2] for row in model.stratigraphic_column.get_stratigraphic_ids()}
+    assert result['unit'][0] == column[ids[0]]
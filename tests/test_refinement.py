@@ -0,0 +1,27 @@
+import numpy as np
+
+from loopstructuralvisualisation._unit_visibility import HIDDEN_CELL
+
+
+def test_refinement_cell_ordering(view, model):
+    view.model = model
+    view.plot_block_model(name='block_model')
+    origin = np.asarray(model.bounding_box.origin, dtype=float)
+    maximum = np.asarray(model.bounding_box.maximum, dtype=float)
+    # a region that is not symmetric so a wrong axis order would cover other cells
+    lower = origin + (maximum - origin) * [0.1, 0.4, 0.2]
+    upper = origin + (maximum - origin) * [0.3, 0.9, 0.5]
+    bounds = np.column_stack([lower, upper]).ravel()
+    view.refine_block_model(bounds, factor=2, name='block_model')
+    block_model = view._block_models['block_model']
+    refined = block_model['refinement']['block']
+    np.testing.assert_array_equal(
+        refined['stratigraphy'], model.evaluate_model(refined.cell_centers().points, scale=True)
+    )
+
+    parent = block_model['cache']['grid']
+    centres = parent.cell_centers().points
+    region = np.asarray(refined.bounds).reshape(3, 2)
+    inside = np.all((centres > region[:, 0]) & (centres < region[:, 1]), axis=1)
+    hidden = np.asarray(block_model['block'].cell_data['vtkGhostType']) == HIDDEN_CELL
+    np.testing.assert_array_equal(hidden, inside)
@@ -0,0 +1,26 @@
+import numpy as np
+import pyvista as pv
+
+from loopstructuralvisualisation._memory import source_dataset
+
+
+class Uplift:
+    name = 'uplift'
+
+    def apply_to_points(self, points):
+        return points + np.array([0.0, 0.0, 1.0])
+
+
+def test_restoration_keeps_cached_points(view):
+    cached = view.cache.get(('sphere',), pv.Sphere)
+    present = np.array(cached.points)
+    view.add_mesh(cached.copy(deep=False), name='unit_sphere')
+
+    view.set_fault_restoration(0.5, names=['unit_sphere'], faults=[Uplift()])
+    assert np.allclose(cached.points, present)
+    shown = source_dataset(view.renderer.actors['unit_sphere'])
+    assert np.allclose(shown.points, present + [0.0, 0.0, 0.5])
+
+    view.set_fault_restoration(0.0, names=['unit_sphere'], faults=[Uplift()])
+    assert np.allclose(shown.points, present)
+    assert np.allclose(cached.points, present)
@@ -0,0 +1,63 @@
+import numpy as np
+import pyvista as pv
+
+from loopstructuralvisualisation._memory import source_dataset
+from loopstructuralvisualisation.trame._scene_sync import SceneSynchroniser, actor_dataset
+
+
+def test_volume_changes(view):
+    view.add_mesh(pv.Sphere(), name='unit_sphere')
+    view.add_volume(pv.Wavelet(), name='a_volume')
+    synchroniser = SceneSynchroniser(view)
+    assert sorted(synchroniser.changes()['added']) == ['a_volume', 'unit_sphere']
+    assert not any(synchroniser.changes().values())
+
+    volume = view.renderer.actors['a_volume']
+    volume.prop.GetScalarOpacity(0).AddPoint(100.0, 0.5)
+    assert synchroniser.changes()['properties'] == ['a_volume']
+    view.set_object_visibility('a_volume', False)
+    assert synchroniser.changes()['properties'] == ['a_volume']
+
+    dataset = volume.mapper.GetInputDataObject(0, 0)
+    pv.wrap(dataset).point_data['RTData'] += 1.0
+    assert synchroniser.changes()['geometry'] == ['a_volume']
+
+    view.remove_actor('a_volume')
+    assert synchroniser.changes()['removed'] == ['a_volume']
+
+
+def test_volume_menu(view):
+    from trame.app import get_server
+
+    from loopstructuralvisualisation.trame.ui.vuetify3 import LoopViewer
+
+    view.add_volume(pv.Wavelet(), name='a_volume')
+    viewer = LoopViewer(view, server=get_server('test_volume_menu', client_type='vue3'))
+    viewer.refresh_object_menu()
+    rows = {row['id']: row for row in viewer.server.state[viewer.OBJECTS]}
+    assert viewer.server.state[rows['a_volume']['key']]
+    viewer.set_object_visibility('a_volume', False)
+    assert not view.renderer.actors['a_volume'].GetVisibility()
+
+
+def test_quantize_keeps_the_datasets(view):
+    sphere = pv.Sphere()
+    sphere.points = sphere.points.astype(np.float64)
+    sphere.point_data['values'] = np.arange(sphere.n_points, dtype=np.float64)
+    view.add_mesh(sphere, name='unit_sphere', compact=False)
+    actor = view.renderer.actors['unit_sphere']
+    dataset = actor_dataset(actor)
+    synchroniser = SceneSynchroniser(view)
+    assert synchroniser.changes()['added'] == ['unit_sphere']
+    assert synchroniser.stats['quantized'] > 0
+    assert dataset.points.dtype == np.float64
+    assert dataset.point_data['values'].dtype == np.float64
+
+    with synchroniser.quantized():
+        sent = actor.mapper.GetInputDataObject(0, 0)
+        assert pv.wrap(sent).points.dtype == np.float32
+        assert pv.wrap(sent).point_data['values'].dtype == np.float32
+    source = source_dataset(actor)
+    assert source.points.dtype == np.float64
+    assert source.point_data['values'].dtype == np.float64
+    assert not any(synchroniser.changes().values())
@@ -0,0 +1,20 @@
+def test_one_evaluation_for_volume_slice_and_surfaces(view, model, monkeypatch):
+    feature = model['strati']
+    evaluations = []
+    scalar_field = feature.scalar_field
+
+    def counting(*args, **kwargs):
+        evaluations.append(1)
+        return scalar_field(*args, **kwargs)
+
+    def surfaces(*args, **kwargs):
+        raise AssertionError('the isosurfaces were evaluated instead of contoured')
+
+    monkeypatch.setattr(feature, 'scalar_field', counting)
+    monkeypatch.setattr(feature, 'surfaces', surfaces)
+    actors = view.plot_feature(feature, value=3, volume=True, name='strati_feature')
+    view.plot_scalar_field(feature, slicer=True, name='strati_slicer')
+    view.plot_surface(feature, value=0.0, name='strati_surface')
+    assert len(evaluations) == 1
+    assert set(actors) == {'scalar_field', 'surfaces'}
+    assert view.objects['strati_surface']['recipe']().n_points > 0
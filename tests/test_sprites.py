@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from pyvista.plotting.mapper import PointGaussianMapper
+
+
+def _value_points(view, model, **kwargs):
+    (actor,) = view.plot_data(model['strati'], vector=False, **kwargs)
+    return actor
+
+
+def test_sprite_threshold_switches_mode(view, model):
+    points = _value_points(view, model, name='points_data')
+    assert not isinstance(points.mapper, PointGaussianMapper)
+    n_points = points.mapper.dataset.n_points
+    points = _value_points(view, model, sprite_threshold=n_points, name='points_data')
+    assert not isinstance(points.mapper, PointGaussianMapper)
+    sprites = _value_points(view, model, sprite_threshold=n_points - 1, name='sprite_data')
+    assert isinstance(sprites.mapper, PointGaussianMapper)
+
+
+def test_sprite_radius(view, model):
+    actor = _value_points(view, model, point_style='sprite', radius=5.0, name='sprite_data')
+    assert actor.mapper.scale_factor == 5.0
+    dataset = actor.mapper.dataset
+    radius = np.arange(dataset.n_points, dtype=float)
+    actor = _value_points(view, model, point_style='sprite', radius=radius, name='radius_data')
+    assert actor.mapper.scale_array == 'radius'
+    with pytest.raises(ValueError):
+        _value_points(view, model, point_style='sprite', radius=radius[1:], name='bad_data')
+    with pytest.raises(ValueError):
+        _value_points(view, model, point_style='spheres', name='bad_data')
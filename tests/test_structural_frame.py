@@ -0,0 +1,44 @@
+import numpy as np
+from LoopStructural.modelling.features import AnalyticalGeologicalFeature, StructuralFrame
+
+
+def _frame(model):
+    centre = (np.asarray(model.bounding_box.origin) + np.asarray(model.bounding_box.maximum)) / 2
+    features = [
+        AnalyticalGeologicalFeature(f'frame_{i}', np.eye(3)[i], centre, model=model)
+        for i in range(3)
+    ]
+    return StructuralFrame('frame', features, model=model)
+
+
+def test_plot_structural_frame(view, model, monkeypatch):
+    frame = _frame(model)
+    evaluated = []
+    for coordinate in frame.features:
+        evaluate_value = coordinate.evaluate_value
+        monkeypatch.setattr(
+            coordinate,
+            'evaluate_value',
+            lambda points, f=evaluate_value, n=coordinate.name: evaluated.append(n) or f(points),
+        )
+    actors = view.plot_structural_frame(frame, slices=True)
+    # every coordinate is evaluated once on the shared grid
+    assert sorted(evaluated) == ['frame_0', 'frame_1', 'frame_2']
+    assert set(actors) == {'frame_0', 'frame_1', 'frame_2'}
+    for i, name in enumerate(actors):
+        assert set(actors[name]) == {'surfaces', 'slices'}
+        surfaces = view.objects[f'{name}_surfaces']['recipe']()
+        assert surfaces.n_points > 0
+        # the isosurface through the centre is normal to the axis of the coordinate
+        assert np.ptp(surfaces.points[:, i]) < 1e-6 * np.ptp(surfaces.points)
+        # only the slices of the first coordinate are shown
+        assert bool(actors[name]['slices'].GetVisibility()) == (i == 0)
+
+
+def test_parallel_structural_frame(view, model):
+    frame = _frame(model)
+    serial = view._build_structural_frame(frame)
+    view.cache.clear()
+    parallel = view._build_structural_frame(frame, parallel=True)
+    for name in ('frame_0', 'frame_1', 'frame_2'):
+        np.testing.assert_array_equal(parallel[name], serial[name])
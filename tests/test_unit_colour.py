@@ -0,0 +1,22 @@
+import numpy as np
+from matplotlib import colors
+
+from loopstructuralvisualisation import Loop2DView
+from loopstructuralvisualisation._lookup_table import stratigraphic_lookup_table
+
+
+def test_set_unit_colour_recolours_2d_views(view, model):
+    map_view = Loop2DView(model)
+    centre = (model.bounding_box.origin[2] + model.bounding_box.maximum[2]) / 2
+    image = map_view.add_model(z=centre)
+    lookup = stratigraphic_lookup_table(model)
+    i = lookup.index('b')
+    unit_id = int(lookup.ids[i])
+    try:
+        view.set_unit_colour('b', 'purple', model=model)
+        # the image keeps its data and norm, only the colourmap is replaced
+        np.testing.assert_allclose(image.cmap(image.norm(unit_id)), colors.to_rgba('purple'))
+        np.testing.assert_allclose(lookup.lookup_table.GetTableValue(i), colors.to_rgba('purple'))
+        assert model.stratigraphic_column.get_unit_by_name('b').colour == colors.to_hex('purple')
+    finally:
+        view.set_unit_colour('b', 'green', model=model)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import pyvista as pv
+from trame.app import get_server
+
+from loopstructuralvisualisation.trame._scene_sync import SceneSynchroniser, scene_actors
+from loopstructuralvisualisation.trame.ui.vuetify3 import LoopViewer
+
+
+@pytest.fixture
+def two_views(views):
+    """A sphere in the first view and a cube in the second, the first view is active"""
+    views.add_mesh(pv.Sphere(), name='a_sphere')
+    views.subplot(0, 1)
+    views.add_mesh(pv.Cube(center=(5, 0, 0)), name='a_cube')
+    views.subplot(0, 0)
+    return views
+
+
+def test_share_actor_flat_index(two_views):
+    actor = two_views.share_actor('a_sphere', 1)
+    assert two_views.renderers[1].actors['a_sphere_1'] is actor
+    assert actor.mapper is two_views.renderers[0].actors['a_sphere'].mapper
+    assert two_views.objects['a_sphere_1']['subplot'] == (0, 1)
+    assert two_views._active_subplot == (0, 0)
+
+
+def test_share_actor_from_other_view(two_views):
+    two_views.share_actor('a_cube', 0, 0)
+    assert 'a_cube_1' in two_views.renderers[0].actors
+
+
+def test_object_in_other_view(two_views):
+    two_views.set_object_visibility('a_cube', False)
+    assert not two_views.renderers[1].actors['a_cube'].visibility
+    assert 'a_cube' in two_views.memory_report()['objects']
+    two_views.set_object_visibility('a_cube', True)
+    result = two_views.query(np.array([[5.0, 0, 0], [0, 0, 0]]))
+    assert list(result['object']) == ['a_cube', 'a_sphere']
+
+
+def test_remove_object_in_other_view(two_views):
+    two_views.remove_actor('a_cube')
+    assert 'a_cube' not in two_views.objects
+    assert 'a_cube' not in two_views.renderers[1].actors
+
+
+def test_trame_views(two_views):
+    assert set(scene_actors(two_views)) >= {'a_sphere', 'a_cube'}
+    sync = SceneSynchroniser(two_views)
+    assert set(sync.changes()['added']) >= {'a_sphere', 'a_cube'}
+    viewer = LoopViewer(two_views, server=get_server('test_trame_views', client_type='vue3'))
+    names = [row['name'] for row in viewer._menu_rows() if not row['header']]
+    assert names == ['a_sphere', 'a_cube']
+    viewer.set_object_visibility('a_cube', False)
+    assert not two_views.renderers[1].actors['a_cube'].visibility